@@ -8,16 +8,27 @@ import matplotlib
 matplotlib.use('Agg')  # GUI不要のバックエンド
 
 import os
+import sys
 
-# 画像保存先
-output_dir = os.path.dirname(os.path.abspath(__file__)) + "/images"
-os.makedirs(output_dir, exist_ok=True)
+# CH7 共通の図レジストリ (figkit) を読み込めるようにする
+CHAPTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHAPTER_DIR not in sys.path:
+    sys.path.insert(0, CHAPTER_DIR)
+from figkit import lazy, registry
+
+# pandas は app_dual_axis でしか使わないので、その図を描くときに読み込む
+pd = lazy.module('pandas')
+
+# 画像保存先（images/）と保存パラメータは全図共通
+section = registry.Section(__file__, dpi=150)
+figure = section.figure
 
 # =============================================================================
 # 技術説明用の画像
 # =============================================================================
 
 # 1. plt.plot() の基本 (tech_plot_basic.png)
+@figure('tech_plot_basic.png')
 def generate_tech_plot_basic():
     x = [1, 2, 3, 4, 5]
     y = [10, 40, 20, 50, 30]
@@ -28,12 +39,9 @@ def generate_tech_plot_basic():
     plt.ylabel('y', fontsize=12)
     plt.title('plt.plot(x, y)', fontsize=14)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_plot_basic.png", dpi=150)
-    plt.close()
-    print("Generated: tech_plot_basic.png")
 
 # 2. y データだけを渡す場合 (tech_plot_y_only.png)
+@figure('tech_plot_y_only.png')
 def generate_tech_plot_y_only():
     y = [10, 40, 20, 50, 30]
     
@@ -43,12 +51,9 @@ def generate_tech_plot_y_only():
     plt.ylabel('y', fontsize=12)
     plt.title('plt.plot(y) - x is automatically 0, 1, 2, ...', fontsize=14)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_plot_y_only.png", dpi=150)
-    plt.close()
-    print("Generated: tech_plot_y_only.png")
 
 # 3. Figure と Axes を明示的に作成 (tech_fig_ax.png)
+@figure('tech_fig_ax.png')
 def generate_tech_fig_ax():
     fig, ax = plt.subplots(figsize=(8, 5))
     
@@ -60,13 +65,9 @@ def generate_tech_fig_ax():
     ax.set_ylabel('y', fontsize=12)
     ax.set_title('fig, ax = plt.subplots()', fontsize=14)
     ax.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_fig_ax.png", dpi=150)
-    plt.close()
-    print("Generated: tech_fig_ax.png")
 
 # 4. 複数の線を描く (tech_multiple_lines.png)
+@figure('tech_multiple_lines.png')
 def generate_tech_multiple_lines():
     months = [1, 2, 3, 4, 5]
     sales_2023 = [100, 120, 150, 180, 200]
@@ -81,12 +82,9 @@ def generate_tech_multiple_lines():
     plt.title('Sales Comparison by Year', fontsize=14)
     plt.legend(fontsize=11)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_multiple_lines.png", dpi=150)
-    plt.close()
-    print("Generated: tech_multiple_lines.png")
 
 # 5. 実践：簡単な売上グラフ (tech_sales_example.png)
+@figure('tech_sales_example.png')
 def generate_tech_sales_example():
     months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
     sales = [100, 150, 120, 200, 250, 300]
@@ -98,16 +96,13 @@ def generate_tech_sales_example():
     plt.xlabel("Month", fontsize=12)
     plt.ylabel("Sales (10,000 yen)", fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_sales_example.png", dpi=150)
-    plt.close()
-    print("Generated: tech_sales_example.png")
 
 # =============================================================================
 # 演習用の画像
 # =============================================================================
 
 # 6. 問題 1-1 期待する出力 (exercise_1_1.png)
+@figure('exercise_1_1.png')
 def generate_exercise_1_1():
     x = [1, 2, 3, 4, 5]
     y = [10, 25, 15, 35, 20]
@@ -117,12 +112,9 @@ def generate_exercise_1_1():
     plt.xlabel('x', fontsize=12)
     plt.ylabel('y', fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_1_1.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_1_1.png")
 
 # 7. 問題 2-1 期待する出力 (exercise_2_1.png)
+@figure('exercise_2_1.png')
 def generate_exercise_2_1():
     days = [1, 2, 3, 4, 5, 6, 7]
     temp = [20, 22, 19, 25, 28, 26, 23]
@@ -133,12 +125,9 @@ def generate_exercise_2_1():
     plt.xlabel("Day", fontsize=12)
     plt.ylabel("Celsius", fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_2_1.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_2_1.png")
 
 # 8. 問題 3-1 期待する出力 (exercise_3_1.png)
+@figure('exercise_3_1.png')
 def generate_exercise_3_1():
     x = [1, 2, 3, 4, 5]
     y1 = [10, 20, 30, 40, 50]
@@ -151,16 +140,13 @@ def generate_exercise_3_1():
     plt.ylabel('y', fontsize=12)
     plt.legend(fontsize=11)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_3_1.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_3_1.png")
 
 # =============================================================================
 # 応用問題用の画像
 # =============================================================================
 
 # 9. 応用問題1: 週間気温グラフ - タスク1 (app_weekly_temp.png)
+@figure('app_weekly_temp.png')
 def generate_app_weekly_temp():
     days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
     high_temp = [25, 27, 24, 28, 30, 29, 26]
@@ -175,12 +161,9 @@ def generate_app_weekly_temp():
     plt.ylabel("Temperature (°C)", fontsize=12)
     plt.legend(fontsize=11)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_weekly_temp.png", dpi=150)
-    plt.close()
-    print("Generated: app_weekly_temp.png")
 
 # 10. 応用問題2: 月別売上比較 - タスク2 (app_sales_comparison.png)
+@figure('app_sales_comparison.png')
 def generate_app_sales_comparison():
     months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", 
               "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
@@ -198,15 +181,10 @@ def generate_app_sales_comparison():
     plt.ylabel("Sales", fontsize=12)
     plt.legend(fontsize=11)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_sales_comparison.png", dpi=150)
-    plt.close()
-    print("Generated: app_sales_comparison.png")
 
 # 11. 応用問題4: 2つの y 軸 (app_dual_axis.png)
+@figure('app_dual_axis.png')
 def generate_app_dual_axis():
-    import pandas as pd
-    
     df = pd.DataFrame({
         "Month": ["Jan", "Feb", "Mar", "Apr", "May", "Jun"],
         "Sales": [100, 150, 120, 200, 250, 300],
@@ -239,10 +217,6 @@ def generate_app_dual_axis():
     ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left', fontsize=11)
     
     ax1.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_dual_axis.png", dpi=150)
-    plt.close()
-    print("Generated: app_dual_axis.png")
 
 # =============================================================================
 # すべての画像を生成
@@ -252,23 +226,10 @@ if __name__ == "__main__":
     print("Generating images for CH7-Section1...")
     print("=" * 50)
     
-    # 技術説明
-    generate_tech_plot_basic()
-    generate_tech_plot_y_only()
-    generate_tech_fig_ax()
-    generate_tech_multiple_lines()
-    generate_tech_sales_example()
-    
-    # 演習
-    generate_exercise_1_1()
-    generate_exercise_2_1()
-    generate_exercise_3_1()
-    
-    # 応用問題
-    generate_app_weekly_temp()
-    generate_app_sales_comparison()
-    generate_app_dual_axis()
+    # 技術説明・演習・応用問題の順に登録された図を生成する
+    # 引数でパターンを渡すとその図だけを生成する（例: python generate_images.py 'app_*'）
+    section.generate(sys.argv[1:])
     
     print("=" * 50)
     print("All images generated successfully!")
-    print(f"Output directory: {output_dir}")
+    print(f"Output directory: {section.output_dir}")
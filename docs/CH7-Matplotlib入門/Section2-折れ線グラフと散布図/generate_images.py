@@ -7,17 +7,26 @@ import matplotlib.pyplot as plt
 import matplotlib
 matplotlib.use('Agg')
 
+import numpy as np
 import os
-import random
+import sys
 
-output_dir = os.path.dirname(os.path.abspath(__file__)) + "/images"
-os.makedirs(output_dir, exist_ok=True)
+# CH7 共通の図レジストリ (figkit) を読み込めるようにする
+CHAPTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHAPTER_DIR not in sys.path:
+    sys.path.insert(0, CHAPTER_DIR)
+from figkit import datagen, decimate, density, registry
+
+# 画像保存先（images/）と保存パラメータは全図共通
+section = registry.Section(__file__, dpi=150)
+figure = section.figure
 
 # =============================================================================
 # 技術説明用の画像
 # =============================================================================
 
 # 1. 線のスタイル (tech_line_styles.png)
+@figure('tech_line_styles.png')
 def generate_tech_line_styles():
     x = [1, 2, 3, 4, 5]
     y = [10, 20, 15, 25, 20]
@@ -33,29 +42,23 @@ def generate_tech_line_styles():
         ax.set_xlabel('x')
         ax.set_ylabel('y')
         ax.grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_line_styles.png", dpi=150)
-    plt.close()
-    print("Generated: tech_line_styles.png")
 
 # 2. scatter() の基本 (tech_scatter_basic.png)
+@figure('tech_scatter_basic.png')
 def generate_tech_scatter_basic():
     ad_cost = [10, 20, 30, 40, 50, 60, 70, 80]
     sales = [15, 25, 40, 45, 60, 70, 75, 90]
     
     plt.figure(figsize=(8, 5))
-    plt.scatter(ad_cost, sales, s=80, alpha=0.7)
+    # 点が非常に多いときは density が密度の画像にまとめる（この 8 点はそのまま描かれる）
+    density.scatter(plt.gca(), ad_cost, sales, s=80, alpha=0.7)
     plt.xlabel("Ad Cost", fontsize=12)
     plt.ylabel("Sales", fontsize=12)
     plt.title("Ad Cost vs Sales", fontsize=14)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_scatter_basic.png", dpi=150)
-    plt.close()
-    print("Generated: tech_scatter_basic.png")
 
 # 3. 点のサイズや色を変える (tech_scatter_size_color.png)
+@figure('tech_scatter_size_color.png')
 def generate_tech_scatter_size_color():
     x = [10, 20, 30, 40, 50]
     y = [15, 30, 40, 55, 70]
@@ -69,48 +72,39 @@ def generate_tech_scatter_size_color():
     plt.ylabel("Y", fontsize=12)
     plt.title("Scatter with Variable Size and Color", fontsize=14)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_scatter_size_color.png", dpi=150)
-    plt.close()
-    print("Generated: tech_scatter_size_color.png")
 
 # 4. 正の相関・負の相関 (tech_correlation.png)
+@figure('tech_correlation.png')
 def generate_tech_correlation():
-    random.seed(42)
-    
     fig, axes = plt.subplots(1, 3, figsize=(14, 4))
     
     # 正の相関
-    x = list(range(1, 21))
-    y_pos = [i * 2 + random.randint(-5, 5) for i in x]
-    axes[0].scatter(x, y_pos, s=60, alpha=0.7, color='blue')
+    x = np.linspace(1, 20, datagen.count(20))
+    y_pos = x * 2 + datagen.integers(-5, 5, len(x), scale=False)
+    density.scatter(axes[0], x, y_pos, s=60, alpha=0.7, color='blue')
     axes[0].set_title("Positive Correlation", fontsize=12)
     axes[0].set_xlabel("x")
     axes[0].set_ylabel("y")
     axes[0].grid(True, alpha=0.3)
     
     # 負の相関
-    y_neg = [40 - i * 1.5 + random.randint(-5, 5) for i in x]
-    axes[1].scatter(x, y_neg, s=60, alpha=0.7, color='red')
+    y_neg = 40 - x * 1.5 + datagen.integers(-5, 5, len(x), scale=False)
+    density.scatter(axes[1], x, y_neg, s=60, alpha=0.7, color='red')
     axes[1].set_title("Negative Correlation", fontsize=12)
     axes[1].set_xlabel("x")
     axes[1].set_ylabel("y")
     axes[1].grid(True, alpha=0.3)
     
     # 相関なし
-    y_none = [random.randint(10, 40) for _ in x]
-    axes[2].scatter(x, y_none, s=60, alpha=0.7, color='green')
+    y_none = datagen.integers(10, 40, len(x), scale=False)
+    density.scatter(axes[2], x, y_none, s=60, alpha=0.7, color='green')
     axes[2].set_title("No Correlation", fontsize=12)
     axes[2].set_xlabel("x")
     axes[2].set_ylabel("y")
     axes[2].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_correlation.png", dpi=150)
-    plt.close()
-    print("Generated: tech_correlation.png")
 
 # 5. 実践：売上分析グラフ (tech_sales_analysis.png)
+@figure('tech_sales_analysis.png')
 def generate_tech_sales_analysis():
     months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
     sales_2023 = [100, 120, 90, 130, 150, 140]
@@ -134,17 +128,13 @@ def generate_tech_sales_analysis():
     axes[1].set_xlabel("Ad Cost", fontsize=12)
     axes[1].set_ylabel("Sales", fontsize=12)
     axes[1].grid(True, alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_sales_analysis.png", dpi=150)
-    plt.close()
-    print("Generated: tech_sales_analysis.png")
 
 # =============================================================================
 # 演習用の画像
 # =============================================================================
 
 # 6. 演習1: 線のスタイル (exercise_1_dashed.png)
+@figure('exercise_1_dashed.png')
 def generate_exercise_1_dashed():
     x = [1, 2, 3, 4, 5]
     y = [10, 25, 20, 35, 30]
@@ -155,12 +145,9 @@ def generate_exercise_1_dashed():
     plt.xlabel("X", fontsize=12)
     plt.ylabel("Y", fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_1_dashed.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_1_dashed.png")
 
 # 7. 演習2: マーカーを追加 (exercise_2_marker.png)
+@figure('exercise_2_marker.png')
 def generate_exercise_2_marker():
     x = [1, 2, 3, 4, 5]
     y = [5, 15, 10, 20, 18]
@@ -169,12 +156,9 @@ def generate_exercise_2_marker():
     plt.plot(x, y, marker='o', linewidth=2, markersize=8)
     plt.title("Line with Markers", fontsize=14)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_2_marker.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_2_marker.png")
 
 # 8. 演習5: 基本の散布図 (exercise_5_scatter.png)
+@figure('exercise_5_scatter.png')
 def generate_exercise_5_scatter():
     study_hours = [1, 2, 3, 4, 5, 6, 7, 8]
     test_score = [40, 50, 55, 60, 70, 75, 85, 90]
@@ -185,16 +169,13 @@ def generate_exercise_5_scatter():
     plt.xlabel("Study Hours", fontsize=12)
     plt.ylabel("Test Score", fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_5_scatter.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_5_scatter.png")
 
 # =============================================================================
 # 応用問題用の画像
 # =============================================================================
 
 # 9. 応用問題1: 株価チャート (app_stock_chart.png)
+@figure('app_stock_chart.png')
 def generate_app_stock_chart():
     days = ["Mon", "Tue", "Wed", "Thu", "Fri"]
     stock_a = [1000, 1050, 980, 1100, 1080]
@@ -209,29 +190,23 @@ def generate_app_stock_chart():
     plt.ylabel("Price (Yen)", fontsize=12)
     plt.legend(loc='upper left')
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_stock_chart.png", dpi=150)
-    plt.close()
-    print("Generated: app_stock_chart.png")
 
 # 10. 応用問題2: 相関分析散布図 (app_height_weight.png)
+@figure('app_height_weight.png')
 def generate_app_height_weight():
     height = [155, 160, 162, 168, 170, 172, 175, 178, 180, 185]
     weight = [50, 52, 55, 60, 63, 65, 70, 72, 75, 80]
     
     plt.figure(figsize=(10, 6))
-    plt.scatter(height, weight, s=100, c='green', alpha=0.7, edgecolor='black')
+    density.scatter(plt.gca(), height, weight, s=100, c='green', alpha=0.7, edgecolor='black')
     
     plt.title("Height vs Weight", fontsize=14)
     plt.xlabel("Height (cm)", fontsize=12)
     plt.ylabel("Weight (kg)", fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_height_weight.png", dpi=150)
-    plt.close()
-    print("Generated: app_height_weight.png")
 
 # 11. 応用問題3: 年度別売上トレンド (app_sales_trend.png)
+@figure('app_sales_trend.png')
 def generate_app_sales_trend():
     months = ["Apr", "May", "Jun", "Jul", "Aug", "Sep"]
     sales_2022 = [80, 90, 85, 100, 110, 95]
@@ -239,9 +214,10 @@ def generate_app_sales_trend():
     sales_2024 = [100, 120, 110, 130, 145, 125]
     
     plt.figure(figsize=(12, 6))
-    plt.plot(months, sales_2022, 'g:^', label='2022', linewidth=2, markersize=8)
-    plt.plot(months, sales_2023, 'b--s', label='2023', linewidth=2, markersize=8)
-    plt.plot(months, sales_2024, 'r-o', label='2024', linewidth=2, markersize=8)
+    # 系列が画素より長いときは decimate が間引く（この 6 点はそのまま描かれる）
+    decimate.plot(plt.gca(), months, sales_2022, 'g:^', label='2022', linewidth=2, markersize=8)
+    decimate.plot(plt.gca(), months, sales_2023, 'b--s', label='2023', linewidth=2, markersize=8)
+    decimate.plot(plt.gca(), months, sales_2024, 'r-o', label='2024', linewidth=2, markersize=8)
     
     plt.title("Monthly Sales Trend", fontsize=14)
     plt.xlabel("Month", fontsize=12)
@@ -249,12 +225,9 @@ def generate_app_sales_trend():
     plt.ylim(70, 160)
     plt.legend(loc='lower right')
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_sales_trend.png", dpi=150)
-    plt.close()
-    print("Generated: app_sales_trend.png")
 
 # 12. 応用問題4: バブルチャート (app_bubble_chart.png)
+@figure('app_bubble_chart.png')
 def generate_app_bubble_chart():
     stores = ["A", "B", "C", "D", "E", "F"]
     ad_cost = [10, 25, 15, 40, 30, 50]
@@ -264,18 +237,15 @@ def generate_app_bubble_chart():
     sizes = [s * 5 for s in sales]
     
     plt.figure(figsize=(10, 6))
-    scatter = plt.scatter(ad_cost, visitors, s=sizes, c=sales, 
-                          cmap='YlOrRd', alpha=0.6, edgecolor='black')
+    # 点が非常に多いときは、バブルの面積を濃さ、売上をセルの平均の色として密度の画像にまとめる
+    scatter = density.scatter(plt.gca(), ad_cost, visitors, s=sizes, c=sales,
+                              cmap='YlOrRd', alpha=0.6, edgecolor='black')
     plt.colorbar(scatter, label='Sales')
     
     plt.title("Ad Cost vs Visitors (Bubble = Sales)", fontsize=14)
     plt.xlabel("Ad Cost", fontsize=12)
     plt.ylabel("Visitors", fontsize=12)
     plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_bubble_chart.png", dpi=150)
-    plt.close()
-    print("Generated: app_bubble_chart.png")
 
 # =============================================================================
 # すべての画像を生成
@@ -285,24 +255,10 @@ if __name__ == "__main__":
     print("Generating images for CH7-Section2...")
     print("=" * 50)
     
-    # 技術説明
-    generate_tech_line_styles()
-    generate_tech_scatter_basic()
-    generate_tech_scatter_size_color()
-    generate_tech_correlation()
-    generate_tech_sales_analysis()
-    
-    # 演習
-    generate_exercise_1_dashed()
-    generate_exercise_2_marker()
-    generate_exercise_5_scatter()
-    
-    # 応用問題
-    generate_app_stock_chart()
-    generate_app_height_weight()
-    generate_app_sales_trend()
-    generate_app_bubble_chart()
+    # 技術説明・演習・応用問題の順に登録された図を生成する
+    # 引数でパターンを渡すとその図だけを生成する（例: python generate_images.py 'app_*'）
+    section.generate(sys.argv[1:])
     
     print("=" * 50)
     print("All images generated successfully!")
-    print(f"Output directory: {output_dir}")
+    print(f"Output directory: {section.output_dir}")
@@ -8,17 +8,25 @@ import matplotlib
 matplotlib.use('Agg')
 
 import numpy as np
-import random
 import os
+import sys
 
-output_dir = os.path.dirname(os.path.abspath(__file__)) + "/images"
-os.makedirs(output_dir, exist_ok=True)
+# CH7 共通の図レジストリ (figkit) を読み込めるようにする
+CHAPTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHAPTER_DIR not in sys.path:
+    sys.path.insert(0, CHAPTER_DIR)
+from figkit import datagen, histogram, registry, sketch
+
+# 画像保存先（images/）と保存パラメータは全図共通
+section = registry.Section(__file__, dpi=150)
+figure = section.figure
 
 # =============================================================================
 # 技術説明用の画像
 # =============================================================================
 
 # 1. 縦棒グラフ (tech_bar_vertical.png)
+@figure('tech_bar_vertical.png')
 def generate_tech_bar_vertical():
     categories = ["Tokyo", "Osaka", "Nagoya"]
     values = [100, 120, 80]
@@ -29,12 +37,9 @@ def generate_tech_bar_vertical():
     plt.xlabel("City", fontsize=12)
     plt.ylabel("Sales", fontsize=12)
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_bar_vertical.png", dpi=150)
-    plt.close()
-    print("Generated: tech_bar_vertical.png")
 
 # 2. 横棒グラフ (tech_bar_horizontal.png)
+@figure('tech_bar_horizontal.png')
 def generate_tech_bar_horizontal():
     categories = ["Tokyo", "Osaka", "Nagoya"]
     values = [100, 120, 80]
@@ -45,12 +50,9 @@ def generate_tech_bar_horizontal():
     plt.xlabel("Sales", fontsize=12)
     plt.ylabel("City", fontsize=12)
     plt.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_bar_horizontal.png", dpi=150)
-    plt.close()
-    print("Generated: tech_bar_horizontal.png")
 
 # 3. グループ化棒グラフ (tech_bar_grouped.png)
+@figure('tech_bar_grouped.png')
 def generate_tech_bar_grouped():
     categories = ["Tokyo", "Osaka", "Nagoya"]
     values_2023 = [100, 110, 70]
@@ -69,12 +71,9 @@ def generate_tech_bar_grouped():
     plt.xticks(x, categories)
     plt.legend()
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_bar_grouped.png", dpi=150)
-    plt.close()
-    print("Generated: tech_bar_grouped.png")
 
 # 4. 積み上げ棒グラフ (tech_bar_stacked.png)
+@figure('tech_bar_stacked.png')
 def generate_tech_bar_stacked():
     categories = ["Tokyo", "Osaka", "Nagoya"]
     q1_sales = [100, 110, 70]
@@ -89,12 +88,9 @@ def generate_tech_bar_stacked():
     plt.title("Quarterly Sales (Stacked)", fontsize=14)
     plt.legend()
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_bar_stacked.png", dpi=150)
-    plt.close()
-    print("Generated: tech_bar_stacked.png")
 
 # 5. 棒グラフとヒストグラムの違い (tech_bar_vs_hist.png)
+@figure('tech_bar_vs_hist.png')
 def generate_tech_bar_vs_hist():
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
     
@@ -108,20 +104,15 @@ def generate_tech_bar_vs_hist():
     ax1.grid(axis='y', alpha=0.3)
     
     # ヒストグラム（分布）
-    random.seed(42)
-    scores = [random.gauss(75, 10) for _ in range(100)]
+    scores = datagen.normal(75, 10, 100)
     ax2.hist(scores, bins=10, color='coral', edgecolor='black', alpha=0.7)
     ax2.set_title("Histogram (Distribution)", fontsize=14)
     ax2.set_xlabel("Value Range", fontsize=12)
     ax2.set_ylabel("Frequency", fontsize=12)
     ax2.grid(axis='y', alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_bar_vs_hist.png", dpi=150)
-    plt.close()
-    print("Generated: tech_bar_vs_hist.png")
 
 # 6. 円グラフの基本 (tech_pie_basic.png)
+@figure('tech_pie_basic.png')
 def generate_tech_pie_basic():
     labels = ["Tokyo", "Osaka", "Nagoya"]
     values = [40, 35, 25]
@@ -131,12 +122,9 @@ def generate_tech_pie_basic():
     plt.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors,
             wedgeprops={'edgecolor': 'black', 'linewidth': 1})
     plt.title("Sales Share", fontsize=14)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_pie_basic.png", dpi=150)
-    plt.close()
-    print("Generated: tech_pie_basic.png")
 
 # 7. 円グラフのイメージ (tech_pie_examples.png)
+@figure('tech_pie_examples.png')
 def generate_tech_pie_examples():
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
     colors = ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
@@ -155,22 +143,15 @@ def generate_tech_pie_examples():
     axes[2].pie([25, 25, 25, 25], labels=['A 25%', 'B 25%', 'C 25%', 'D 25%'], startangle=90,
                 colors=colors, wedgeprops={'edgecolor': 'black', 'linewidth': 1})
     axes[2].set_title("4 Parts", fontsize=12)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_pie_examples.png", dpi=150)
-    plt.close()
-    print("Generated: tech_pie_examples.png")
 
 # 8. 売上分析ダッシュボード (tech_dashboard.png)
+@figure('tech_dashboard.png')
 def generate_tech_dashboard():
-    random.seed(42)
-    
     cities = ["Tokyo", "Osaka", "Nagoya", "Fukuoka"]
     sales_2023 = [100, 90, 70, 60]
     sales_2024 = [120, 95, 80, 75]
     
-    tokyo_monthly = [random.gauss(100, 15) for _ in range(12)]
-    osaka_monthly = [random.gauss(90, 12) for _ in range(12)]
+    tokyo_monthly, osaka_monthly = datagen.groups([100, 90], [15, 12], 12)
     
     categories = ["Product A", "Product B", "Product C", "Other"]
     shares = [45, 25, 20, 10]
@@ -193,8 +174,10 @@ def generate_tech_dashboard():
     
     # 2. ヒストグラム
     ax2 = axes[0, 1]
-    ax2.hist(tokyo_monthly, bins=8, alpha=0.7, label='Tokyo', color='blue')
-    ax2.hist(osaka_monthly, bins=8, alpha=0.7, label='Osaka', color='red')
+    # 重ねる 2 系列は共通のビンで数えて、棒の位置をそろえる
+    edges, (tokyo_counts, osaka_counts) = histogram.accumulate([tokyo_monthly, osaka_monthly], bins=8)
+    histogram.draw(ax2, edges, tokyo_counts, alpha=0.7, label='Tokyo', color='blue')
+    histogram.draw(ax2, edges, osaka_counts, alpha=0.7, label='Osaka', color='red')
     ax2.set_xlabel("Monthly Sales")
     ax2.set_ylabel("Frequency")
     ax2.set_title("Sales Distribution")
@@ -217,17 +200,13 @@ def generate_tech_dashboard():
     ax4.set_ylabel("Monthly Sales")
     ax4.set_title("Sales Variation by City")
     ax4.grid(axis='y', alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/tech_dashboard.png", dpi=150)
-    plt.close()
-    print("Generated: tech_dashboard.png")
 
 # =============================================================================
 # 演習用の画像
 # =============================================================================
 
 # 9. 演習1: 基本の棒グラフ (exercise_1_bar.png)
+@figure('exercise_1_bar.png')
 def generate_exercise_1_bar():
     products = ["Product A", "Product B", "Product C", "Product D"]
     sales = [150, 200, 120, 180]
@@ -238,12 +217,9 @@ def generate_exercise_1_bar():
     plt.xlabel("Product", fontsize=12)
     plt.ylabel("Sales", fontsize=12)
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_1_bar.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_1_bar.png")
 
 # 10. 演習3: 横棒グラフ (exercise_3_barh.png)
+@figure('exercise_3_barh.png')
 def generate_exercise_3_barh():
     stores = ["Shibuya", "Shinjuku", "Ikebukuro", "Tokyo", "Ueno"]
     visitors = [500, 450, 380, 420, 300]
@@ -254,12 +230,9 @@ def generate_exercise_3_barh():
     plt.xlabel("Visitors", fontsize=12)
     plt.ylabel("Store", fontsize=12)
     plt.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_3_barh.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_3_barh.png")
 
 # 11. 演習4: 基本のヒストグラム (exercise_4_hist.png)
+@figure('exercise_4_hist.png')
 def generate_exercise_4_hist():
     scores = [55, 62, 68, 70, 72, 75, 77, 78, 80, 82,
               83, 85, 86, 87, 88, 89, 90, 91, 92, 93,
@@ -271,12 +244,9 @@ def generate_exercise_4_hist():
     plt.xlabel("Score", fontsize=12)
     plt.ylabel("Frequency", fontsize=12)
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_4_hist.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_4_hist.png")
 
 # 12. 演習5: ヒストグラムのビン数を変える (exercise_5_hist_bins.png)
+@figure('exercise_5_hist_bins.png')
 def generate_exercise_5_hist_bins():
     scores = [55, 62, 68, 70, 72, 75, 77, 78, 80, 82,
               83, 85, 86, 87, 88, 89, 90, 91, 92, 93,
@@ -288,12 +258,9 @@ def generate_exercise_5_hist_bins():
     plt.xlabel("Score", fontsize=12)
     plt.ylabel("Frequency", fontsize=12)
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_5_hist_bins.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_5_hist_bins.png")
 
 # 13. 演習6: 基本の円グラフ (exercise_6_pie.png)
+@figure('exercise_6_pie.png')
 def generate_exercise_6_pie():
     categories = ["Food", "Drink", "Snack", "Other"]
     values = [45, 25, 20, 10]
@@ -303,12 +270,9 @@ def generate_exercise_6_pie():
     plt.pie(values, labels=categories, colors=colors,
             wedgeprops={'edgecolor': 'black', 'linewidth': 1})
     plt.title("Sales Share", fontsize=14)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_6_pie.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_6_pie.png")
 
 # 14. 演習7: 円グラフにパーセント (exercise_7_pie_pct.png)
+@figure('exercise_7_pie_pct.png')
 def generate_exercise_7_pie_pct():
     categories = ["Food", "Drink", "Snack", "Other"]
     values = [45, 25, 20, 10]
@@ -319,28 +283,23 @@ def generate_exercise_7_pie_pct():
             wedgeprops={'edgecolor': 'black', 'linewidth': 1})
     plt.title("Sales Share", fontsize=14)
     plt.axis('equal')
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_7_pie_pct.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_7_pie_pct.png")
 
 # 15. 演習8: 箱ひげ図 (exercise_8_boxplot.png)
+@figure('exercise_8_boxplot.png')
 def generate_exercise_8_boxplot():
     class_a = [65, 70, 72, 75, 78, 80, 82, 85, 88, 90]
     class_b = [60, 68, 75, 78, 80, 82, 85, 90, 95, 98]
     data = [class_a, class_b]
     
     plt.figure(figsize=(8, 5))
-    plt.boxplot(data, labels=['Class A', 'Class B'])
+    # グループが非常に大きいときは sketch が分位点スケッチで統計量を求める（この 10 件はそのまま描かれる）
+    sketch.boxplot(plt.gca(), data, labels=['Class A', 'Class B'])
     plt.title("Score Distribution by Class", fontsize=14)
     plt.ylabel("Score", fontsize=12)
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_8_boxplot.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_8_boxplot.png")
 
 # 16. 演習9: グループ化棒グラフ (exercise_9_grouped.png)
+@figure('exercise_9_grouped.png')
 def generate_exercise_9_grouped():
     cities = ["Tokyo", "Osaka", "Nagoya"]
     sales_2023 = [100, 85, 70]
@@ -357,12 +316,9 @@ def generate_exercise_9_grouped():
     plt.ylabel("Sales", fontsize=12)
     plt.legend()
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_9_grouped.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_9_grouped.png")
 
 # 17. 演習10: 積み上げ棒グラフ (exercise_10_stacked.png)
+@figure('exercise_10_stacked.png')
 def generate_exercise_10_stacked():
     cities = ["Tokyo", "Osaka", "Nagoya"]
     q1 = [50, 45, 35]
@@ -375,16 +331,13 @@ def generate_exercise_10_stacked():
     plt.ylabel("Sales", fontsize=12)
     plt.legend()
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/exercise_10_stacked.png", dpi=150)
-    plt.close()
-    print("Generated: exercise_10_stacked.png")
 
 # =============================================================================
 # 応用問題用の画像
 # =============================================================================
 
 # 18. 応用問題1: 月別売上比較 (app_monthly_sales.png)
+@figure('app_monthly_sales.png')
 def generate_app_monthly_sales():
     months = ["Jan", "Feb", "Mar"]
     tokyo = [100, 120, 110]
@@ -405,12 +358,9 @@ def generate_app_monthly_sales():
     plt.xticks(x, months)
     plt.legend(loc='upper right')
     plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_monthly_sales.png", dpi=150)
-    plt.close()
-    print("Generated: app_monthly_sales.png")
 
 # 19. 応用問題2: 売上構成の可視化 (app_sales_breakdown.png)
+@figure('app_sales_breakdown.png')
 def generate_app_sales_breakdown():
     categories = ["Food", "Drink", "Dessert", "Other"]
     tokyo = [50, 30, 15, 5]
@@ -438,26 +388,20 @@ def generate_app_sales_breakdown():
     ax2.pie(tokyo, labels=categories, autopct='%1.1f%%', startangle=90, colors=colors,
             wedgeprops={'edgecolor': 'black', 'linewidth': 1})
     ax2.set_title('Tokyo Sales Share', fontsize=14)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_sales_breakdown.png", dpi=150)
-    plt.close()
-    print("Generated: app_sales_breakdown.png")
 
 # 20. 応用問題3: 成績分布の分析 (app_score_analysis.png)
+@figure('app_score_analysis.png')
 def generate_app_score_analysis():
-    random.seed(42)
-    
-    class_a = [random.gauss(70, 12) for _ in range(40)]
-    class_b = [random.gauss(75, 10) for _ in range(40)]
-    class_c = [random.gauss(65, 15) for _ in range(40)]
+    class_a, class_b, class_c = datagen.groups([70, 75, 65], [12, 10, 15], 40)
     
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     
     # ヒストグラム
-    ax1.hist(class_a, bins=15, alpha=0.5, label='Class A', color='blue')
-    ax1.hist(class_b, bins=15, alpha=0.5, label='Class B', color='red')
-    ax1.hist(class_c, bins=15, alpha=0.5, label='Class C', color='green')
+    # 3 クラスは共通のビンで数えて、棒の位置をそろえる
+    edges, counts = histogram.accumulate([class_a, class_b, class_c], bins=15)
+    histogram.draw(ax1, edges, counts[0], alpha=0.5, label='Class A', color='blue')
+    histogram.draw(ax1, edges, counts[1], alpha=0.5, label='Class B', color='red')
+    histogram.draw(ax1, edges, counts[2], alpha=0.5, label='Class C', color='green')
     ax1.set_xlabel('Score', fontsize=12)
     ax1.set_ylabel('Frequency', fontsize=12)
     ax1.set_title('Score Distribution (Histogram)', fontsize=14)
@@ -471,13 +415,9 @@ def generate_app_score_analysis():
     ax2.set_ylabel('Score', fontsize=12)
     ax2.set_title('Score Distribution (Box Plot)', fontsize=14)
     ax2.grid(axis='y', alpha=0.3)
-    
-    plt.tight_layout()
-    plt.savefig(f"{output_dir}/app_score_analysis.png", dpi=150)
-    plt.close()
-    print("Generated: app_score_analysis.png")
 
 # 21. 応用問題4: 売上ダッシュボード (app_sales_dashboard.png)
+@figure('app_sales_dashboard.png', adjust={'top': 0.92})
 def generate_app_sales_dashboard():
     months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun"]
     sales = [80, 95, 110, 105, 120, 130]
@@ -522,11 +462,6 @@ def generate_app_sales_dashboard():
     ax4.grid(axis='y', alpha=0.3)
     
     fig.suptitle('Sales Dashboard', fontsize=16, fontweight='bold')
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.92)
-    plt.savefig(f"{output_dir}/app_sales_dashboard.png", dpi=150)
-    plt.close()
-    print("Generated: app_sales_dashboard.png")
 
 # =============================================================================
 # すべての画像を生成
@@ -536,33 +471,10 @@ if __name__ == "__main__":
     print("Generating images for CH7-Section3...")
     print("=" * 50)
     
-    # 技術説明
-    generate_tech_bar_vertical()
-    generate_tech_bar_horizontal()
-    generate_tech_bar_grouped()
-    generate_tech_bar_stacked()
-    generate_tech_bar_vs_hist()
-    generate_tech_pie_basic()
-    generate_tech_pie_examples()
-    generate_tech_dashboard()
-    
-    # 演習
-    generate_exercise_1_bar()
-    generate_exercise_3_barh()
-    generate_exercise_4_hist()
-    generate_exercise_5_hist_bins()
-    generate_exercise_6_pie()
-    generate_exercise_7_pie_pct()
-    generate_exercise_8_boxplot()
-    generate_exercise_9_grouped()
-    generate_exercise_10_stacked()
-    
-    # 応用問題
-    generate_app_monthly_sales()
-    generate_app_sales_breakdown()
-    generate_app_score_analysis()
-    generate_app_sales_dashboard()
+    # 技術説明・演習・応用問題の順に登録された図を生成する
+    # 引数でパターンを渡すとその図だけを生成する（例: python generate_images.py 'app_*'）
+    section.generate(sys.argv[1:])
     
     print("=" * 50)
     print("All images generated successfully!")
-    print(f"Output directory: {output_dir}")
+    print(f"Output directory: {section.output_dir}")
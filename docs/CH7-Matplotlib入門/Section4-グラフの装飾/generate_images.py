@@ -7,19 +7,26 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
-import random
 import os
+import sys
 
-# 出力ディレクトリ
-output_dir = os.path.join(os.path.dirname(__file__), 'images')
-os.makedirs(output_dir, exist_ok=True)
+# CH7 共通の図レジストリ (figkit) を読み込めるようにする
+CHAPTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHAPTER_DIR not in sys.path:
+    sys.path.insert(0, CHAPTER_DIR)
+from figkit import registry
 
-random.seed(42)
+# 出力ディレクトリ（images/）と保存パラメータは全図共通
+section = registry.Section(__file__, dpi=150, bbox_inches='tight', facecolor='white')
+figure = section.figure
+
+# 乱数の種は、図を描く前に registry が図の名前から設定する（どの順番で描いても同じ図になる）
 
 # ============================================
 # 技術説明用
 # ============================================
 
+@figure('tech_presentation.png')
 def tech_presentation():
     """8. プレゼンテーション品質のグラフ"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -55,16 +62,12 @@ def tech_presentation():
     for spine in ['top', 'right']:
         ax.spines[spine].set_visible(False)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_presentation.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_presentation.png")
-
 
 # ============================================
 # 演習用
 # ============================================
 
+@figure('exercise_1_title.png', layout=False)
 def exercise_1_title():
     """演習1: タイトルの装飾"""
     x = [1, 2, 3, 4, 5]
@@ -75,12 +78,9 @@ def exercise_1_title():
     plt.title('Sales Report', fontsize=16, fontweight='bold', color='darkblue')
     plt.xlabel('Month')
     plt.ylabel('Sales')
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_1_title.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_1_title.png")
 
 
+@figure('exercise_2_labels.png', layout=False)
 def exercise_2_labels():
     """演習2: 軸ラベルの装飾"""
     x = [1, 2, 3, 4, 5]
@@ -91,12 +91,9 @@ def exercise_2_labels():
     plt.title('Sales Report', fontsize=16)
     plt.xlabel('Month', fontsize=14, color='gray')
     plt.ylabel('Sales', fontsize=14, color='gray')
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_2_labels.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_2_labels.png")
 
 
+@figure('exercise_3_rotation.png')
 def exercise_3_rotation():
     """演習3: x軸の目盛りを回転"""
     categories = ['January', 'February', 'March', 'April', 'May']
@@ -107,13 +104,9 @@ def exercise_3_rotation():
     plt.xticks(rotation=45, ha='right')
     plt.title('Monthly Sales')
     plt.ylabel('Sales')
-    plt.tight_layout()
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_3_rotation.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_3_rotation.png")
 
 
+@figure('exercise_4_legend_pos.png', layout=False)
 def exercise_4_legend_pos():
     """演習4: 凡例の位置を変える"""
     x = [1, 2, 3, 4, 5]
@@ -125,12 +118,9 @@ def exercise_4_legend_pos():
     plt.plot(x, y2, 'b-s', label='Product B')
     plt.legend(loc='lower right')
     plt.title('Product Comparison')
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_4_legend_pos.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_4_legend_pos.png")
 
 
+@figure('exercise_5_legend_detail.png', layout=False)
 def exercise_5_legend_detail():
     """演習5: 凡例の詳細設定"""
     x = [1, 2, 3, 4, 5]
@@ -148,12 +138,9 @@ def exercise_5_legend_detail():
         facecolor='white'
     )
     plt.title('Product Comparison')
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_5_legend_detail.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_5_legend_detail.png")
 
 
+@figure('exercise_6_grid.png', layout=False)
 def exercise_6_grid():
     """演習6: グリッドの追加"""
     x = [1, 2, 3, 4, 5]
@@ -163,12 +150,9 @@ def exercise_6_grid():
     plt.bar(x, y)
     plt.grid(True, axis='y', linestyle='--', alpha=0.5)
     plt.title('Sales')
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_6_grid.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_6_grid.png")
 
 
+@figure('exercise_7_ylim.png', layout=False)
 def exercise_7_ylim():
     """演習7: 軸の範囲を設定"""
     x = [1, 2, 3, 4, 5]
@@ -178,12 +162,9 @@ def exercise_7_ylim():
     plt.plot(x, y, 'b-o')
     plt.ylim(0, 50)
     plt.title('Sales Trend')
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_7_ylim.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_7_ylim.png")
 
 
+@figure('exercise_8_text.png', layout=False)
 def exercise_8_text():
     """演習8: テキストを追加"""
     x = [1, 2, 3, 4, 5]
@@ -194,12 +175,9 @@ def exercise_8_text():
     plt.text(4, 35, 'Peak', fontsize=12, color='red', ha='center', va='bottom')
     plt.title('Sales Trend')
     plt.ylim(0, 45)
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_8_text.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_8_text.png")
 
 
+@figure('exercise_9_annotate.png', layout=False)
 def exercise_9_annotate():
     """演習9: 矢印付き注釈"""
     x = [1, 2, 3, 4, 5]
@@ -214,12 +192,9 @@ def exercise_9_annotate():
                  arrowprops=dict(arrowstyle='->', color='red', lw=2))
     plt.title('Sales Trend')
     plt.ylim(0, 50)
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_9_annotate.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_9_annotate.png")
 
 
+@figure('exercise_10_save.png', layout=False)
 def exercise_10_save():
     """演習10: 高解像度で保存"""
     x = [1, 2, 3, 4, 5]
@@ -231,16 +206,13 @@ def exercise_10_save():
     plt.xlabel('Month')
     plt.ylabel('Sales')
     plt.grid(True, alpha=0.3)
-    
-    plt.savefig(os.path.join(output_dir, 'exercise_10_save.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_10_save.png")
 
 
 # ============================================
 # 応用問題用
 # ============================================
 
+@figure('app_business_report.png')
 def app_business_report():
     """応用問題1: ビジネスレポート用グラフ"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -263,12 +235,8 @@ def app_business_report():
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'app_business_report.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_business_report.png")
-
 
+@figure('app_annotations.png')
 def app_annotations():
     """応用問題2: 複数の注釈"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug']
@@ -302,12 +270,8 @@ def app_annotations():
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'app_annotations.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_annotations.png")
-
 
+@figure('app_custom_grid.png')
 def app_custom_grid():
     """応用問題3: カスタム目盛りとグリッド"""
     x = list(range(0, 101, 10))
@@ -328,12 +292,8 @@ def app_custom_grid():
     ax.set_xlim(0, 100)
     ax.set_ylim(0, 100)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'app_custom_grid.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_custom_grid.png")
-
 
+@figure('app_style_comparison.png')
 def app_style_comparison():
     """応用問題4: スタイルの比較"""
     x = [1, 2, 3, 4, 5]
@@ -364,12 +324,8 @@ def app_style_comparison():
     axes[2].set_ylabel('Y')
     axes[2].grid(True, color='white', linewidth=1.5)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'app_style_comparison.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_style_comparison.png")
-
 
+@figure('app_dashboard.png', adjust={'top': 0.92})
 def app_dashboard():
     """応用問題5: プロフェッショナルなダッシュボード"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -425,12 +381,6 @@ def app_dashboard():
 
     fig.suptitle('Sales Dashboard - Q2 2024', fontsize=18, fontweight='bold', y=0.98)
 
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.92)
-    plt.savefig(os.path.join(output_dir, 'app_dashboard.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_dashboard.png")
-
 
 # ============================================
 # メイン
@@ -439,26 +389,8 @@ def app_dashboard():
 if __name__ == '__main__':
     print("Generating Section4 images...")
     
-    # 技術説明
-    tech_presentation()
-    
-    # 演習
-    exercise_1_title()
-    exercise_2_labels()
-    exercise_3_rotation()
-    exercise_4_legend_pos()
-    exercise_5_legend_detail()
-    exercise_6_grid()
-    exercise_7_ylim()
-    exercise_8_text()
-    exercise_9_annotate()
-    exercise_10_save()
-    
-    # 応用問題
-    app_business_report()
-    app_annotations()
-    app_custom_grid()
-    app_style_comparison()
-    app_dashboard()
+    # 技術説明・演習・応用問題の順に登録された図を生成する
+    # 引数でパターンを渡すとその図だけを生成する（例: python generate_images.py 'app_*'）
+    section.generate(sys.argv[1:])
     
-    print(f"\nAll images saved to: {output_dir}")
+    print(f"\nAll images saved to: {section.output_dir}")
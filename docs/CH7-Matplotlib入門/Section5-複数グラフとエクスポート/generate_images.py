@@ -7,21 +7,32 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.gridspec as gridspec
-from mpl_toolkits.axes_grid1.inset_locator import inset_axes
 import numpy as np
-import random
 import os
+import sys
 
-# 出力ディレクトリ
-output_dir = os.path.join(os.path.dirname(__file__), 'images')
-os.makedirs(output_dir, exist_ok=True)
+# CH7 共通の図レジストリ (figkit) を読み込めるようにする
+CHAPTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHAPTER_DIR not in sys.path:
+    sys.path.insert(0, CHAPTER_DIR)
+from figkit import datagen, decimate, lazy, registry, sketch
 
-random.seed(42)
+# inset_axes（mpl_toolkits.axes_grid1）は tech_inset でしか使わないので、その図を描くときに読み込む
+inset_axes = lazy.attribute('mpl_toolkits.axes_grid1.inset_locator', 'inset_axes')
+
+# 出力ディレクトリ（images/）と保存パラメータは全図共通
+section = registry.Section(__file__, dpi=150, bbox_inches='tight', facecolor='white')
+figure = section.figure
+
+# サンプルデータは figkit.datagen で作る。乱数の種は、図を描く前に registry が図の名前から設定する
+# （どの順番で描いても同じ図になる）
+# 長くなりうる折れ線と fill_between は figkit.decimate を通して描く（画素より多い点だけを間引く）
 
 # ============================================
 # 技術説明用
 # ============================================
 
+@figure('tech_1row_3col.png')
 def tech_1row_3col():
     """1行3列のレイアウト"""
     fig, axes = plt.subplots(1, 3, figsize=(15, 5))
@@ -38,16 +49,12 @@ def tech_1row_3col():
     axes[2].scatter(x, y, s=100, c='green')
     axes[2].set_title('Chart 3')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_1row_3col.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_1row_3col.png")
-
 
+@figure('tech_gridspec.png')
 def tech_gridspec():
     """GridSpec による不均等レイアウト"""
     fig = plt.figure(figsize=(12, 8))
-    gs = gridspec.GridSpec(2, 2, height_ratios=[2, 1])
+    gs = gridspec.GridSpec(2, 2, figure=fig, height_ratios=[2, 1])
 
     ax1 = fig.add_subplot(gs[0, :])
     ax1.plot([1, 2, 3, 4, 5], [10, 25, 20, 35, 30], 'b-o', linewidth=2)
@@ -62,16 +69,12 @@ def tech_gridspec():
     ax3.scatter([1, 2, 3], [10, 20, 15], s=100, c='green')
     ax3.set_title('Chart 3')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_gridspec.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_gridspec.png")
-
 
+@figure('tech_size_ratio.png')
 def tech_size_ratio():
     """サイズ比の調整"""
     fig = plt.figure(figsize=(12, 8))
-    gs = gridspec.GridSpec(2, 3, width_ratios=[2, 1, 1], height_ratios=[1, 2])
+    gs = gridspec.GridSpec(2, 3, figure=fig, width_ratios=[2, 1, 1], height_ratios=[1, 2])
 
     ax1 = fig.add_subplot(gs[0, 0])
     ax1.plot([1, 2, 3], [1, 2, 3], 'b-o')
@@ -89,12 +92,8 @@ def tech_size_ratio():
     ax4.bar(['A', 'B', 'C', 'D', 'E'], [5, 4, 3, 2, 1], color='steelblue')
     ax4.set_title('Full Width (Tall)')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_size_ratio.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_size_ratio.png")
-
 
+@figure('tech_sharex.png')
 def tech_sharex():
     """x軸を共有"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May']
@@ -103,22 +102,18 @@ def tech_sharex():
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
 
-    ax1.plot(months, sales, 'b-o', linewidth=2)
+    decimate.plot(ax1, months, sales, 'b-o', linewidth=2)
     ax1.set_ylabel('Sales', fontsize=12)
     ax1.set_title('Sales and Profit Trend', fontsize=14)
     ax1.grid(True, alpha=0.3)
 
-    ax2.plot(months, profit, 'g-s', linewidth=2)
+    decimate.plot(ax2, months, profit, 'g-s', linewidth=2)
     ax2.set_ylabel('Profit', fontsize=12)
     ax2.set_xlabel('Month', fontsize=12)
     ax2.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_sharex.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_sharex.png")
-
 
+@figure('tech_sharey.png')
 def tech_sharey():
     """y軸を共有"""
     categories = ['A', 'B', 'C', 'D']
@@ -134,12 +129,8 @@ def tech_sharey():
     ax2.bar(categories, values_2024, color='coral')
     ax2.set_title('2024', fontsize=14)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_sharey.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_sharey.png")
-
 
+@figure('tech_inset.png')
 def tech_inset():
     """図の中に図を挿入"""
     x = list(range(1, 13))
@@ -160,12 +151,8 @@ def tech_inset():
     axins.set_ylim(20, 32)
     axins.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_inset.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_inset.png")
-
 
+@figure('tech_twinx.png')
 def tech_twinx():
     """双軸グラフ"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May']
@@ -191,12 +178,8 @@ def tech_twinx():
     lines2, labels2 = ax2.get_legend_handles_labels()
     ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'tech_twinx.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_twinx.png")
-
 
+@figure('tech_analysis_report.png', adjust={'top': 0.93})
 def tech_analysis_report():
     """実践：分析レポート"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -208,15 +191,10 @@ def tech_analysis_report():
     product_sales = [40, 28, 20, 12]
 
     regions = ['Tokyo', 'Osaka', 'Nagoya', 'Fukuoka']
-    region_sales = [
-        [random.gauss(100, 15) for _ in range(20)],
-        [random.gauss(80, 12) for _ in range(20)],
-        [random.gauss(70, 10) for _ in range(20)],
-        [random.gauss(60, 8) for _ in range(20)]
-    ]
+    region_sales = datagen.groups([100, 80, 70, 60], [15, 12, 10, 8], 20)
 
     fig = plt.figure(figsize=(16, 12))
-    gs = gridspec.GridSpec(3, 2, height_ratios=[1.5, 1, 1])
+    gs = gridspec.GridSpec(3, 2, figure=fig, height_ratios=[1.5, 1, 1])
 
     # 上段
     ax1 = fig.add_subplot(gs[0, :])
@@ -268,7 +246,7 @@ def tech_analysis_report():
 
     # 下段右
     ax5 = fig.add_subplot(gs[2, 1])
-    region_totals = [sum(r) for r in region_sales]
+    region_totals = [r.sum() for r in region_sales]
     bars = ax5.barh(regions, region_totals, color=colors, edgecolor='white')
     ax5.set_title('Total Sales by Region', fontsize=14, fontweight='bold')
     ax5.set_xlabel('Total Sales', fontsize=12)
@@ -277,17 +255,13 @@ def tech_analysis_report():
         ax5.text(val + 20, bar.get_y() + bar.get_height()/2, f'{val:.0f}', va='center', fontsize=10)
 
     fig.suptitle('Sales Analysis Report - Q2 2024', fontsize=20, fontweight='bold', y=0.98)
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.93)
-    plt.savefig(os.path.join(output_dir, 'tech_analysis_report.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: tech_analysis_report.png")
 
 
 # ============================================
 # 演習用
 # ============================================
 
+@figure('exercise_1_2x2.png')
 def exercise_1_2x2():
     """演習1: 2x2グリッド"""
     x = [1, 2, 3, 4, 5]
@@ -307,12 +281,8 @@ def exercise_1_2x2():
     axes[1, 1].hist(y, bins=5, color='purple', edgecolor='black')
     axes[1, 1].set_title('Histogram')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'exercise_1_2x2.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_1_2x2.png")
-
 
+@figure('exercise_2_1x3.png')
 def exercise_2_1x3():
     """演習2: 1行3列"""
     categories = ['A', 'B', 'C', 'D']
@@ -332,12 +302,8 @@ def exercise_2_1x3():
     axes[2].bar(categories, values3, color='seagreen')
     axes[2].set_title('2024')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'exercise_2_1x3.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_2_1x3.png")
-
 
+@figure('exercise_3_sharex.png')
 def exercise_3_sharex():
     """演習3: x軸を共有"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -356,12 +322,8 @@ def exercise_3_sharex():
     ax2.set_xlabel('Month', fontsize=12)
     ax2.grid(True, alpha=0.3)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'exercise_3_sharex.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_3_sharex.png")
-
 
+@figure('exercise_4_sharey.png', adjust={'top': 0.88})
 def exercise_4_sharey():
     """演習4: y軸を共有"""
     categories = ['A', 'B', 'C', 'D']
@@ -379,13 +341,8 @@ def exercise_4_sharey():
 
     fig.suptitle('Year-over-Year Comparison', fontsize=16, fontweight='bold')
 
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.88)
-    plt.savefig(os.path.join(output_dir, 'exercise_4_sharey.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_4_sharey.png")
-
 
+@figure('exercise_5_twinx.png')
 def exercise_5_twinx():
     """演習5: 双軸グラフ"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May']
@@ -411,12 +368,8 @@ def exercise_5_twinx():
     lines2, labels2 = ax2.get_legend_handles_labels()
     ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'exercise_5_twinx.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_5_twinx.png")
-
 
+@figure('exercise_6_png.png', layout=False)
 def exercise_6_png():
     """演習6: PNG保存"""
     x = [1, 2, 3, 4, 5]
@@ -429,11 +382,9 @@ def exercise_6_png():
     plt.ylabel('Y')
     plt.grid(True, alpha=0.3)
 
-    plt.savefig(os.path.join(output_dir, 'exercise_6_png.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_6_png.png")
-
 
+# PNG に加えて、同じ描画から SVG と PDF も images/ に書き出す
+@figure('exercise_7_multi.png', layout=False, formats=('svg', 'pdf'))
 def exercise_7_multi_format():
     """演習7: 複数形式"""
     x = [1, 2, 3, 4, 5]
@@ -443,18 +394,15 @@ def exercise_7_multi_format():
     ax.plot(x, y, 'b-o', linewidth=2)
     ax.set_title('Multi-Format Export')
 
-    plt.savefig(os.path.join(output_dir, 'exercise_7_multi.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_7_multi.png")
-
 
+@figure('exercise_8_gridspec.png')
 def exercise_8_gridspec():
     """演習8: GridSpec"""
     x = [1, 2, 3, 4, 5]
     y = [10, 20, 15, 25, 20]
 
     fig = plt.figure(figsize=(12, 8))
-    gs = gridspec.GridSpec(2, 2, height_ratios=[2, 1])
+    gs = gridspec.GridSpec(2, 2, figure=fig, height_ratios=[2, 1])
 
     ax1 = fig.add_subplot(gs[0, :])
     ax1.plot(x, y, 'b-o', linewidth=2)
@@ -468,16 +416,12 @@ def exercise_8_gridspec():
     ax3.scatter(x, y, s=100, c='green')
     ax3.set_title('Sub Chart 2')
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'exercise_8_gridspec.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: exercise_8_gridspec.png")
-
 
 # ============================================
 # 応用問題用
 # ============================================
 
+@figure('app_dashboard.png', adjust={'top': 0.92})
 def app_dashboard():
     """応用問題1: 売上分析ダッシュボード"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -531,19 +475,15 @@ def app_dashboard():
     ax4.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
 
     fig.suptitle('Sales Dashboard - H1 2024', fontsize=16, fontweight='bold', y=0.98)
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.92)
-    plt.savefig(os.path.join(output_dir, 'app_dashboard.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_dashboard.png")
 
 
+@figure('app_timeseries.png')
 def app_timeseries():
     """応用問題2: 時系列比較ダッシュボード"""
     dates = [f'Day {i}' for i in range(1, 15)]
-    visitors = [random.randint(80, 150) for _ in range(14)]
-    sales = [v * random.uniform(0.5, 0.8) for v in visitors]
-    conversion = [s / v * 100 for s, v in zip(sales, visitors)]
+    visitors = datagen.integers(80, 150, 14, scale=False)
+    sales = visitors * datagen.uniform(0.5, 0.8, 14, scale=False)
+    conversion = sales / visitors * 100
 
     fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(14, 10), sharex=True)
 
@@ -552,23 +492,20 @@ def app_timeseries():
     ax1.set_title('Daily Performance Metrics', fontsize=14, fontweight='bold')
     ax1.grid(True, axis='y', alpha=0.3)
 
-    ax2.plot(dates, sales, 'o-', color='#27ae60', linewidth=2, markersize=6)
+    decimate.plot(ax2, dates, sales, 'o-', color='#27ae60', linewidth=2, markersize=6)
     ax2.set_ylabel('Sales', fontsize=11)
     ax2.grid(True, axis='y', alpha=0.3)
-    ax2.fill_between(dates, sales, alpha=0.2, color='#27ae60')
+    decimate.fill_between(ax2, dates, sales, alpha=0.2, color='#27ae60')
 
-    ax3.plot(dates, conversion, 's-', color='#e74c3c', linewidth=2, markersize=6)
+    decimate.plot(ax3, dates, conversion, 's-', color='#e74c3c', linewidth=2, markersize=6)
     ax3.set_ylabel('Conversion Rate (%)', fontsize=11)
     ax3.set_xlabel('Date', fontsize=11)
     ax3.grid(True, axis='y', alpha=0.3)
 
     plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'app_timeseries.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_timeseries.png")
 
 
+@figure('app_uneven_layout.png', adjust={'top': 0.92})
 def app_uneven_layout():
     """応用問題3: 不均等レイアウト"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -578,7 +515,7 @@ def app_uneven_layout():
     q2 = [35, 28, 22]
 
     fig = plt.figure(figsize=(14, 10))
-    gs = gridspec.GridSpec(2, 3, height_ratios=[2, 1])
+    gs = gridspec.GridSpec(2, 3, figure=fig, height_ratios=[2, 1])
 
     ax_main = fig.add_subplot(gs[0, :])
     ax_main.plot(months, sales, 'o-', color='#3498db', linewidth=3, markersize=12)
@@ -604,13 +541,9 @@ def app_uneven_layout():
     ax3.set_title('Total Share', fontsize=12)
 
     fig.suptitle('Sales Analysis Dashboard', fontsize=16, fontweight='bold', y=0.98)
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.92)
-    plt.savefig(os.path.join(output_dir, 'app_uneven_layout.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_uneven_layout.png")
 
 
+@figure('app_batch_export.png')
 def app_batch_export():
     """応用問題4: バッチエクスポート"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -626,12 +559,8 @@ def app_batch_export():
     ax.spines['top'].set_visible(False)
     ax.spines['right'].set_visible(False)
 
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, 'app_batch_export.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_batch_export.png")
-
 
+@figure('app_full_report.png', adjust={'top': 0.94, 'hspace': 0.3, 'wspace': 0.25})
 def app_full_report():
     """応用問題5: 総合レポート"""
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
@@ -644,12 +573,12 @@ def app_full_report():
     product_revenue = [500, 350, 250, 100]
 
     regions = ['Tokyo', 'Osaka', 'Nagoya', 'Fukuoka']
-    region_data = [[random.gauss(m, 10) for _ in range(12)] for m in [100, 80, 70, 60]]
+    region_data = datagen.groups([100, 80, 70, 60], 10, 12)
 
     colors = ['#3498db', '#e74c3c', '#2ecc71', '#f39c12']
 
     fig = plt.figure(figsize=(16, 14))
-    gs = gridspec.GridSpec(3, 2, height_ratios=[1.5, 1, 1])
+    gs = gridspec.GridSpec(3, 2, figure=fig, height_ratios=[1.5, 1, 1])
 
     # 上段
     ax1 = fig.add_subplot(gs[0, :])
@@ -687,8 +616,8 @@ def app_full_report():
 
     # 左下段
     ax4 = fig.add_subplot(gs[2, 0])
-    ax4.fill_between(months, profit_margin, alpha=0.5, color=colors[2])
-    ax4.plot(months, profit_margin, 'o-', color=colors[2], linewidth=2)
+    decimate.fill_between(ax4, months, profit_margin, alpha=0.5, color=colors[2])
+    decimate.plot(ax4, months, profit_margin, 'o-', color=colors[2], linewidth=2)
     ax4.set_xlabel('Month', fontsize=11)
     ax4.set_ylabel('Profit Margin (%)', fontsize=11)
     ax4.set_title('Profit Margin Trend', fontsize=12, fontweight='bold')
@@ -697,7 +626,7 @@ def app_full_report():
 
     # 右下段
     ax5 = fig.add_subplot(gs[2, 1])
-    bp = ax5.boxplot(region_data, labels=regions, patch_artist=True)
+    bp = sketch.boxplot(ax5, region_data, labels=regions, patch_artist=True)
     for patch, color in zip(bp['boxes'], colors):
         patch.set_facecolor(color)
         patch.set_alpha(0.7)
@@ -707,11 +636,6 @@ def app_full_report():
     ax5.grid(True, axis='y', alpha=0.3)
 
     fig.suptitle('Business Analysis Report - H1 2024', fontsize=18, fontweight='bold', y=0.99)
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.94, hspace=0.3, wspace=0.25)
-    plt.savefig(os.path.join(output_dir, 'app_full_report.png'), dpi=150, bbox_inches='tight', facecolor='white')
-    plt.close()
-    print("Generated: app_full_report.png")
 
 
 # ============================================
@@ -721,31 +645,8 @@ def app_full_report():
 if __name__ == '__main__':
     print("Generating Section5 images...")
     
-    # 技術説明
-    tech_1row_3col()
-    tech_gridspec()
-    tech_size_ratio()
-    tech_sharex()
-    tech_sharey()
-    tech_inset()
-    tech_twinx()
-    tech_analysis_report()
-    
-    # 演習
-    exercise_1_2x2()
-    exercise_2_1x3()
-    exercise_3_sharex()
-    exercise_4_sharey()
-    exercise_5_twinx()
-    exercise_6_png()
-    exercise_7_multi_format()
-    exercise_8_gridspec()
-    
-    # 応用問題
-    app_dashboard()
-    app_timeseries()
-    app_uneven_layout()
-    app_batch_export()
-    app_full_report()
+    # 技術説明・演習・応用問題の順に登録された図を生成する
+    # 引数でパターンを渡すとその図だけを生成する（例: python generate_images.py 'app_*'）
+    section.generate(sys.argv[1:])
     
-    print(f"\nAll images saved to: {output_dir}")
+    print(f"\nAll images saved to: {section.output_dir}")
@@ -0,0 +1,6 @@
+"""
+CH7 の画像生成スクリプト (Section*/generate_images.py) を共通で扱うためのツール群
+
+使い方（CH7-Matplotlib入門 ディレクトリで実行）:
+    python -m figkit.build --jobs 8
+"""
@@ -0,0 +1,303 @@
+"""
+登録されている図の生成時間をフェーズごとに測り、保存したベースラインと比べるベンチマーク
+
+    python -m figkit.bench                  # 全図を測ってベースラインと比較
+    python -m figkit.bench --save           # 測った結果を新しいベースラインにする
+    python -m figkit.bench 'Section5/app_*' --repeat 5
+    python -m figkit.bench --layout constrained  # constrained layout で測る
+    python -m figkit.bench --size 10000 'Section3/app_score_analysis'  # サンプルを 1 万倍にして測る
+
+1 つの図の生成時間を次のフェーズに分けて測る:
+  data    : 関数の開始から最初の Figure を作るまで（データの準備）
+  artists : Figure を作ってから関数を抜けるまで（layout を除く、Axes や線などの作成）
+  layout  : tight_layout() / subplots_adjust() / constrained layout の計算
+  draw    : savefig() のうち、キャンバスへの描画（bbox_inches='tight' の計算を含む。layout は除く）
+  encode  : savefig() のうち、PNG へのエンコード
+  write   : ファイルへの書き込み
+
+各図は --repeat 回測って中央値を使う。ベースライン（既定では .figkit/bench.json）より
+合計時間が --threshold 倍を超えて遅くなった図があれば、終了コード 1 で知らせる。
+画像は一時ディレクトリに書き出すので、images/ とキャッシュには影響しない。
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from . import cache, datagen, discover, registry
+
+BASELINE_PATH = os.path.join(cache.STATE_DIR, 'bench.json')
+
+PHASES = ('data', 'artists', 'layout', 'draw', 'encode', 'write')
+
+# 描画が重く、必ず推移を追いたい図
+HEAVY_FIGURES = (
+    'Section5/app_full_report',
+    'Section5/app_dashboard',
+    'Section5/tech_analysis_report',
+    'Section3/app_sales_dashboard',
+)
+
+# これより差が小さい図は、倍率が大きくても計測の揺れとみなす（秒）
+MIN_DELTA = 0.02
+
+
+class PhaseTimer:
+    """matplotlib の関数に差し込んで、フェーズごとの経過時間を集計する"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.first_figure = None
+        self.totals = collections.defaultdict(float)
+        self._depth = collections.Counter()
+
+    def timed(self, phase, func):
+        """func の実行時間を phase に加算する（tight_layout 内の subplots_adjust のような入れ子は数えない）"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self._depth[phase]:
+                return func(*args, **kwargs)
+            self._depth[phase] += 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[phase] += time.perf_counter() - start
+                self._depth[phase] -= 1
+        return wrapper
+
+    def marks_figure(self, init):
+        """Figure.__init__ を包み、最初に Figure が作られた時刻を記録する"""
+        @functools.wraps(init)
+        def wrapper(*args, **kwargs):
+            if self.first_figure is None:
+                self.first_figure = time.perf_counter()
+            return init(*args, **kwargs)
+        return wrapper
+
+
+@contextlib.contextmanager
+def _replaced(owner, attr, replacement):
+    original = getattr(owner, attr)
+    setattr(owner, attr, replacement)
+    try:
+        yield
+    finally:
+        setattr(owner, attr, original)
+
+
+@contextlib.contextmanager
+def instrumented(timer):
+    """計測用に matplotlib の関数を差し替える"""
+    import matplotlib.figure
+    import matplotlib.image
+    import matplotlib.layout_engine
+
+    Figure = matplotlib.figure.Figure
+    Engine = matplotlib.layout_engine.ConstrainedLayoutEngine
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(_replaced(Figure, '__init__', timer.marks_figure(Figure.__init__)))
+        for name in ('tight_layout', 'subplots_adjust'):
+            stack.enter_context(_replaced(Figure, name, timer.timed('layout', getattr(Figure, name))))
+        # 固定していない constrained layout は savefig() の描画の中でも計算される
+        stack.enter_context(_replaced(Engine, 'execute', timer.timed('layout', Engine.execute)))
+        # backend_agg は mpl.image.imsave を呼び出し時に参照するので、モジュール属性を差し替えればよい
+        stack.enter_context(_replaced(matplotlib.image, 'imsave',
+                                      timer.timed('encode', matplotlib.image.imsave)))
+        yield
+
+
+def measure(fig, timer, out_dir):
+    """図を 1 回生成し、{フェーズ: 秒} を返す"""
+    import matplotlib.pyplot as plt
+
+    section = registry.SECTIONS[fig.section]
+    registry.seed_figure(fig.id)
+    timer.reset()
+    start = time.perf_counter()
+    try:
+        with registry.drawing(section, fig.layout):
+            fig.draw()
+        registry.apply_layout(fig.layout, fig.adjust)
+        built = time.perf_counter()
+        first = timer.first_figure or built
+        layout = timer.totals['layout']
+
+        png = section.render(plt.gcf())
+        saved = time.perf_counter()
+        encode = timer.totals['encode']
+        render_layout = timer.totals['layout'] - layout
+    finally:
+        plt.close('all')
+
+    with open(os.path.join(out_dir, fig.output), 'wb') as f:
+        f.write(png)
+    written = time.perf_counter()
+
+    phases = {
+        'data': first - start,
+        'artists': built - first - layout,
+        'layout': layout + render_layout,
+        'draw': saved - built - encode - render_layout,
+        'encode': encode,
+        'write': written - saved,
+    }
+    phases['total'] = written - start
+    return phases
+
+
+def run(patterns=(), repeat=3, layout='tight', size=1):
+    """パターンに一致する図を repeat 回ずつ測り、{図の id: {フェーズ: 中央値の秒}} を返す"""
+    registry.configure(registry.SCALES, registry.FORMATS, layout)
+    datagen.configure(size)
+    timer = PhaseTimer()
+    samples = collections.defaultdict(list)
+    with tempfile.TemporaryDirectory() as out_dir, instrumented(timer):
+        for _ in range(repeat):
+            for script in discover.find_scripts():
+                if not any(discover.matches(func.id, patterns) for func in discover.scan_script(script)):
+                    continue
+                discover.load_module(script)
+                section = registry.SECTIONS[discover.section_name(script)]
+                for fig in section.figures(patterns):
+                    samples[fig.id].append(measure(fig, timer, out_dir))
+
+    results = {}
+    for fig_id, runs in samples.items():
+        results[fig_id] = {phase: statistics.median(run[phase] for run in runs)
+                           for phase in PHASES + ('total',)}
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_baseline(results, repeat, layout='tight', size=1, path=BASELINE_PATH):
+    baseline = {
+        'versions': cache.package_versions(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': repeat,
+        'layout': layout,
+        'size': size,
+        'figures': results,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def compare(results, baseline, threshold):
+    """ベースラインより threshold 倍を超えて遅くなった図を (id, 前, 今, 倍率, 一番伸びたフェーズ) で返す"""
+    regressions = []
+    for fig_id, phases in results.items():
+        base = baseline['figures'].get(fig_id)
+        if base is None:
+            continue
+        ratio = phases['total'] / base['total'] if base['total'] else float('inf')
+        if ratio > threshold and phases['total'] - base['total'] > MIN_DELTA:
+            worst = max(PHASES, key=lambda phase: phases[phase] - base.get(phase, 0.0))
+            regressions.append((fig_id, base['total'], phases['total'], ratio, worst))
+    return regressions
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:8.1f}"
+
+
+def report(results, baseline):
+    """図ごとのフェーズ別の時間（ミリ秒）を表にして表示する"""
+    header = f"{'figure':<40}" + ''.join(f"{phase:>9}" for phase in PHASES + ('total',))
+    if baseline:
+        header += f"{'base':>9}{'ratio':>7}"
+    print(header)
+    print("-" * len(header))
+    for fig_id, phases in results.items():
+        mark = '*' if fig_id in HEAVY_FIGURES else ' '
+        line = f"{mark}{fig_id:<39}" + ''.join(f" {_ms(phases[p])}" for p in PHASES + ('total',))
+        base = baseline['figures'].get(fig_id) if baseline else None
+        if base:
+            line += f" {_ms(base['total'])} {phases['total'] / base['total']:5.2f}x"
+        print(line)
+    print("(ms, median; * = heavy figure)")
+
+    totals = {phase: sum(p[phase] for p in results.values()) for phase in PHASES + ('total',)}
+    print(f"{'TOTAL':<40}" + ''.join(f" {_ms(totals[p])}" for p in PHASES + ('total',)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CH7 の図の生成時間をフェーズごとに測る')
+    parser.add_argument('patterns', nargs='*',
+                        help="測る図のパターン（例: 'Section5/app_*'）。省略すると全図")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='1 つの図を測る回数（中央値を使う。既定: 3）')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='ベースラインの JSON（既定: .figkit/bench.json）')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='合計時間がベースラインの何倍を超えたら退行とみなすか（既定: 1.5）')
+    parser.add_argument('--layout', choices=registry.LAYOUTS, default=registry.LAYOUT,
+                        help=f'レイアウトの計算方法（既定: {registry.LAYOUT}）')
+    parser.add_argument('--size', type=float, default=1,
+                        help='figkit.datagen のサンプル数に掛ける倍率（既定: 1）')
+    parser.add_argument('--save', action='store_true',
+                        help='測った結果をベースラインとして保存する')
+    args = parser.parse_args(argv)
+
+    try:
+        results = run(args.patterns, args.repeat, args.layout, args.size)
+    except ValueError as e:
+        parser.error(str(e))
+    if not results:
+        print("No figures matched.", file=sys.stderr)
+        return 1
+
+    baseline = None if args.save else load_baseline(args.baseline)
+    report(results, baseline)
+
+    missing = [fig_id for fig_id in HEAVY_FIGURES
+               if not args.patterns and fig_id not in results]
+    for fig_id in missing:
+        print(f"WARNING: heavy figure not found: {fig_id}", file=sys.stderr)
+
+    if args.save:
+        save_baseline(results, args.repeat, args.layout, args.size, args.baseline)
+        print(f"Baseline saved: {args.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {args.baseline} (run with --save to create one)")
+        return 0
+
+    if baseline.get('versions') != cache.package_versions():
+        print(f"Note: baseline was recorded with {baseline.get('versions')}")
+    if baseline.get('layout', 'tight') != args.layout:
+        print(f"Note: baseline was recorded with layout={baseline.get('layout', 'tight')}")
+    if baseline.get('size', 1) != args.size:
+        print(f"Note: baseline was recorded with size={baseline.get('size', 1):g}")
+    regressions = compare(results, baseline, args.threshold)
+    for fig_id, before, after, ratio, worst in regressions:
+        print(f"REGRESSION: {fig_id} {before * 1000:.1f}ms -> {after * 1000:.1f}ms "
+              f"({ratio:.2f}x, mostly {worst})", file=sys.stderr)
+    print(f"{len(regressions)} regression(s) over {args.threshold:.2f}x "
+          f"in {len(results)} figure(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""
+CH7 の全 Section の図をプロセスプールで並列に生成するビルドドライバ
+
+    python -m figkit.build                        # CPU コア数のワーカーで並列実行
+    python -m figkit.build --jobs 1               # 1 プロセスで順番に実行
+    python -m figkit.build 'Section3/app_*'       # パターンに一致する図だけ
+    python -m figkit.build --page Section5-*/演習.md  # ページが参照している図だけ
+    python -m figkit.build --changed-pages        # 前回から内容が変わったページが参照している図だけ（figkit.graph）
+    python -m figkit.build --optimize             # 生成した PNG を小さくする（figkit.optimize）
+    python -m figkit.build --scales 1 2 --formats png webp  # 2x と WebP も書き出す（srcset 用）
+    python -m figkit.build --formats png svg pdf  # ベクター形式も同じ描画から書き出す
+    python -m figkit.build --layout constrained  # tight_layout の代わりに constrained layout を使う
+
+図ごとの乱数は図の名前から決まり（registry.seed_figure）、PNG のメタデータも固定しているので、
+1 枚だけ・並列で生成しても、出力される PNG は全体を直列実行したときとバイト単位で一致する。
+各関数の標準出力はワーカー側で受け取り、最後に Section 順にまとめて表示する。
+
+入力が前回と変わっていない図は描き直さない（figkit.cache を参照）。
+すべて描き直すときは --force を付ける。
+
+図を絞り込んだときは、対象の図がある Section のスクリプトだけをワーカーで import し、
+対象の関数だけを呼ぶ。
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from . import cache, discover, graph, optimize, registry
+
+# 既定の出力（1x の PNG だけ）とレイアウトの計算方法
+DEFAULT_VARIANTS = ((1,), ('png',))
+DEFAULT_LAYOUT = 'tight'
+
+# 書き出す形式・レイアウトと保存後の処理の設定（figkit.build・figkit.worker・mkdocs フックで共通）
+#   variants : (倍率のタプル, 形式のタプル)。1x の PNG を含めた形にそろえたもの
+#   layout   : registry.LAYOUTS のどれか
+#   optimize : 生成した PNG を小さくするか（figkit.optimize）
+#   lossless : optimize で画素を変える減色を行わないか
+#   options  : キャッシュのキーに含める設定（build_options() の結果）
+Config = collections.namedtuple('Config', ['variants', 'layout', 'optimize', 'lossless', 'options'])
+
+
+def select(scanned, patterns=(), pages=()):
+    """パターンとページの参照画像で絞り込んだ図の id の集合を返す（指定なしなら全部）"""
+    referenced = set()
+    for page in pages:
+        referenced |= discover.page_images(page)
+
+    selected = set()
+    for script, funcs in scanned.items():
+        for func in funcs:
+            if pages and discover.output_path(script, func) not in referenced:
+                continue
+            if (patterns or not pages) and not discover.matches(func.id, patterns):
+                continue
+            selected.add(func.id)
+    return selected
+
+
+def plan(scanned, manifest, selected, force=False, options=None):
+    """
+    描き直しが必要な (スクリプト, [関数名]) の実行単位と、全関数のキーを返す
+
+    scanned は {スクリプト: discover.scan_script() の結果}、selected は対象の図の id の集合。
+    図どうしは独立しているので、古くなった図 1 枚ずつを実行単位にする
+    （スクリプトはワーカープロセスごとに 1 回だけ読み込む。load_script() を参照）。
+    options（最適化の設定など）が前回と違う図も描き直す。
+    """
+    versions = cache.package_versions()
+    units = []
+    keys = {}
+    for script, funcs in scanned.items():
+        module_code = discover.module_source(script)
+        library = cache.library_hashes(script)
+        for func in funcs:
+            key = cache.figure_key(func, module_code, versions, options, library)
+            keys[(script, func.name)] = key
+            if func.id not in selected:
+                continue
+            if force or not cache.is_fresh(manifest, script, func, key):
+                units.append((script, [func.name]))
+    return units, keys
+
+
+# このプロセスで読み込んだスクリプト: スクリプト -> (ソースのハッシュ, モジュール)
+_modules = {}
+
+
+def load_script(script):
+    """
+    スクリプトのモジュールを返す
+
+    同じプロセスで読み込み済みで、ファイルの内容が変わっていなければ読み込み直さない。
+    図 1 枚ずつの実行単位でも、モジュール直下のコード（import やデータの準備）はプロセスごとに 1 回で済む。
+    """
+    digest = cache.file_sha256(script)
+    entry = _modules.get(script)
+    if entry is None or entry[0] != digest:
+        entry = (digest, discover.load_module(script))
+        _modules[script] = entry
+    return entry[1]
+
+
+def run_unit(script, names, variants=DEFAULT_VARIANTS, layout=DEFAULT_LAYOUT):
+    """実行単位を 1 つ処理し、関数ごとに (名前, 標準出力, 秒数, エラー) を返す"""
+    registry.configure(*variants, layout=layout)
+    return call_functions(load_script(script), names)
+
+
+def call_functions(module, names):
+    """読み込み済みのモジュールの関数を順番に呼び、関数ごとに (名前, 標準出力, 秒数, エラー) を返す"""
+    results = []
+    for name in names:
+        out = io.StringIO()
+        error = None
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            try:
+                getattr(module, name)()
+            except Exception:
+                error = traceback.format_exc()
+                module.plt.close('all')
+        results.append((name, out.getvalue(), time.perf_counter() - start, error))
+    return results
+
+
+def run_units(units, jobs, variants=DEFAULT_VARIANTS, layout=DEFAULT_LAYOUT):
+    """実行単位をすべて処理し、units と同じ順番で結果を返す"""
+    if jobs <= 1:
+        return [run_unit(script, names, variants, layout) for script, names in units]
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_unit, script, names, variants, layout) for script, names in units]
+        return [future.result() for future in futures]
+
+
+def collect(units, outcomes):
+    """実行結果を {(スクリプト, 関数名): (標準出力, 秒数, エラー)} にまとめる"""
+    by_name = {}
+    for (script, _), results in zip(units, outcomes):
+        for name, output, seconds, error in results:
+            by_name[(script, name)] = (output, seconds, error)
+    return by_name
+
+
+def variant_outputs(func, variants=DEFAULT_VARIANTS):
+    """図から書き出す output 以外のファイル名（@figure の formats で足した形式も含む）"""
+    scales, formats = variants
+    return discover.variant_outputs(func.output, scales, discover.variant_formats(formats, func.formats))
+
+
+def generated_paths(scanned, by_name, variants=DEFAULT_VARIANTS):
+    """エラーなく生成できた図の PNG（2x なども含む）の保存先を Section 順に返す"""
+    paths = []
+    for script, funcs in scanned.items():
+        for func in funcs:
+            result = by_name.get((script, func.name))
+            if result is None or result[2] is not None:
+                continue
+            path = discover.output_path(script, func)
+            paths.append(path)
+            paths.extend(os.path.join(os.path.dirname(path), name)
+                         for name in variant_outputs(func, variants)
+                         if name.endswith('.png'))
+    return paths
+
+
+def build_options(args):
+    """キャッシュのキーに含める、書き出す形式・レイアウトと保存後の処理の設定"""
+    options = {}
+    if (tuple(args.scales), tuple(args.formats)) != DEFAULT_VARIANTS:
+        options['scales'] = args.scales
+        options['formats'] = args.formats
+    if args.layout != DEFAULT_LAYOUT:
+        options['layout'] = args.layout
+    if args.optimize:
+        options['optimize'] = 'lossless' if args.lossless else f"psnr>={optimize.MIN_PSNR:g}"
+    return options
+
+
+def output_arguments(parser):
+    """書き出す形式・レイアウトと保存後の処理のオプションをパーサに加える"""
+    parser.add_argument('--scales', type=float, nargs='+', default=[1],
+                        help='書き出す解像度の倍率（例: --scales 1 2。1x は常に書き出す）')
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=registry.ALL_FORMATS,
+                        help='書き出す形式（例: --formats png webp avif svg。PNG は常に書き出す）')
+    parser.add_argument('--layout', choices=registry.LAYOUTS, default=DEFAULT_LAYOUT,
+                        help='レイアウトの計算方法（既定: tight。constrained は描画時に 1 回だけ計算する）')
+    parser.add_argument('--optimize', action='store_true',
+                        help='生成した PNG を可逆圧縮・メタデータ削除・パレット化で小さくする')
+    parser.add_argument('--lossless', action='store_true',
+                        help='--optimize で画素を変える減色を行わない')
+
+
+def parse_output_args(argv):
+    """output_arguments() のオプションだけを解析する（例: ['--scales', '1', '2', '--optimize']）"""
+    parser = argparse.ArgumentParser(prog='figkit', add_help=False)
+    output_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def configure(args=None):
+    """
+    output_arguments() のオプション（None なら既定値）を registry に設定して Config を返す
+
+    この環境で書き出せない形式なら ValueError。args の scales / formats は 1x の PNG を含めた形に書き換える。
+    同じオプションなら、figkit.build でも常駐ワーカーや mkdocs フックでも同じキーになる。
+    """
+    if args is None:
+        args = parse_output_args([])
+    registry.configure(args.scales, args.formats, args.layout)
+    args.scales = list(registry.SCALES)
+    args.formats = list(registry.FORMATS)
+    return Config((registry.SCALES, registry.FORMATS), args.layout, args.optimize, args.lossless,
+                  build_options(args))
+
+
+def finish(manifest, scanned, keys, by_name, config, jobs=1):
+    """生成した図を（config.optimize なら）最適化してマニフェストに記録し、最適化の結果のリストを返す"""
+    optimized = []
+    if config.optimize:
+        optimized = optimize.optimize_files(generated_paths(scanned, by_name, config.variants), jobs,
+                                            lossless=config.lossless)
+    if by_name:
+        record(manifest, scanned, keys, by_name, config.variants)
+        cache.save_manifest(manifest)
+    return optimized
+
+
+def record(manifest, scanned, keys, by_name, variants=DEFAULT_VARIANTS):
+    """エラーなく生成できた図をマニフェストに記録する"""
+    for script, funcs in scanned.items():
+        for func in funcs:
+            result = by_name.get((script, func.name))
+            if result is not None and result[2] is None:
+                cache.record(manifest, script, func, keys[(script, func.name)],
+                             variant_outputs(func, variants))
+
+
+def report(scanned, selected, by_name, elapsed, jobs):
+    """直列実行と同じ順番で標準出力をまとめて表示し、失敗した関数の数を返す"""
+    failures = 0
+    generated = 0
+    cached = 0
+    for script, funcs in scanned.items():
+        funcs = [func for func in funcs if func.id in selected or (script, func.name) in by_name]
+        if not any((script, func.name) in by_name for func in funcs):
+            cached += len(funcs)
+            continue
+        print(f"Generating images for CH7-{discover.section_name(script)}...")
+        print("=" * 50)
+        for func in funcs:
+            if (script, func.name) not in by_name:
+                cached += 1
+                continue
+            output, seconds, error = by_name[(script, func.name)]
+            sys.stdout.write(output)
+            if error:
+                failures += 1
+                print(f"FAILED: {func.name}", file=sys.stderr)
+                sys.stderr.write(error)
+            else:
+                generated += 1
+        print("=" * 50)
+
+    print(f"{generated} generated, {cached} up to date, {failures} failed "
+          f"in {elapsed:.2f}s (jobs={jobs})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CH7 の画像をまとめて並列生成する')
+    parser.add_argument('patterns', nargs='*',
+                        help="生成する図のパターン（例: 'Section3/app_*', 'tech_dashboard'）")
+    parser.add_argument('--page', action='append', default=[],
+                        help='このページ（Markdown）が参照している図だけを生成する（複数指定可）')
+    parser.add_argument('--changed-pages', action='store_true',
+                        help='前回 --changed-pages で生成したときから内容が変わったページが参照している図だけを生成する')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='ワーカープロセス数（既定: CPU コア数）')
+    parser.add_argument('--force', action='store_true',
+                        help='キャッシュを無視してすべての図を描き直す')
+    output_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # 1x の PNG を必ず含めた形にそろえる（この環境で書き出せない形式ならここで止める）
+    try:
+        config = configure(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    scanned = {script: discover.scan_script(script) for script in discover.find_scripts()}
+    selected = select(scanned, args.patterns, args.page)
+    if args.changed_pages:
+        page_graph = graph.scan(scanned)
+        selected &= graph.changed_figures(graph.load_graph(), page_graph)
+    manifest = cache.load_manifest()
+    units, keys = plan(scanned, manifest, selected, force=args.force, options=config.options)
+
+    by_name = collect(units, run_units(units, args.jobs, config.variants, config.layout))
+    optimized = finish(manifest, scanned, keys, by_name, config, args.jobs)
+
+    failures = report(scanned, selected, by_name, time.perf_counter() - start, args.jobs)
+    if args.changed_pages and not failures:
+        # 失敗した図があれば、次回も同じページを変わったものとして扱う
+        graph.save_graph(page_graph)
+    if optimized:
+        optimize.report(optimized)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
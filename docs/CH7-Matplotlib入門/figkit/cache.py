@@ -0,0 +1,124 @@
+"""
+図ごとの入力から計算したキーで、生成済みの PNG を描き直すかどうか決めるキャッシュ
+
+キーには次のものを含める:
+  - 関数のソースコード
+  - モジュール直下のコード（import、保存パラメータの設定、@figure のない補助関数など）
+  - スクリプトが使う figkit のモジュール（datagen, registry, decimate, sketch など）のソースのハッシュ
+  - matplotlib / numpy / pandas のバージョン
+  - Pillow と pillow-avif-plugin のバージョン（WebP・AVIF の書き出しと PNG の最適化の結果が変わる）
+  - registry.Section(...) に渡した savefig の保存パラメータ（dpi, bbox_inches, facecolor など）
+  - 保存後の処理の設定（PNG の最適化など。figkit.build のオプション）
+
+結果は .figkit/manifest.json に「キー」と「出力ファイルの SHA-256」として記録する。
+キーが同じで、出力ファイルのハッシュも記録と一致する図は描き直さない。
+キーの計算は ast とファイルの読み込みだけで済み、matplotlib は import しない。
+"""
+
+import hashlib
+import json
+import os
+from importlib import metadata
+
+from . import discover
+
+# キーの作り方を変えたら上げる
+CACHE_VERSION = 6
+
+STATE_DIR = os.path.join(discover.CHAPTER_DIR, '.figkit')
+MANIFEST_PATH = os.path.join(STATE_DIR, 'manifest.json')
+
+VERSIONED_PACKAGES = ('matplotlib', 'numpy', 'pandas', 'pillow', 'pillow-avif-plugin')
+
+
+def package_versions():
+    """描画結果に影響するパッケージのバージョン（import せずに調べる）"""
+    versions = {}
+    for name in VERSIONED_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def library_hashes(script):
+    """スクリプトが使う figkit のモジュールのソースのハッシュ（{ファイル名: SHA-256}）"""
+    return {os.path.basename(path): file_sha256(path) for path in discover.figkit_modules(script)}
+
+
+def figure_key(func, module_code, versions, options=None, library=None):
+    """
+    図 1 つ分のキー
+
+    library は library_hashes() の結果。figkit の描画処理を直したら、それを使う図だけ描き直す。
+
+    乱数は図ごとに名前から決まる種で初期化される（registry.seed_figure）ので、
+    ほかの図のコードや実行順はキーに含めなくてよい。
+    """
+    payload = {
+        'cache_version': CACHE_VERSION,
+        'figure': func.id,
+        'source': func.source,
+        'module': module_code,
+        'library': library or {},
+        'versions': versions,
+        'save_params': func.save_params,
+        'options': options or {},
+    }
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def manifest_id(script, func):
+    """マニフェストでの図の名前（例: 'Section1/tech_plot_basic.png'）"""
+    return f"{discover.section_name(script)}/{func.output}"
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def _unchanged(path, sha256):
+    return os.path.exists(path) and file_sha256(path) == sha256
+
+
+def is_fresh(manifest, script, func, key):
+    """キーが記録と同じで、出力ファイル（解像度・形式違いも含む）も記録したハッシュのままなら True"""
+    entry = manifest.get(manifest_id(script, func))
+    if entry is None or entry['key'] != key:
+        return False
+    path = discover.output_path(script, func)
+    images_dir = os.path.dirname(path)
+    return _unchanged(path, entry['sha256']) and all(
+        _unchanged(os.path.join(images_dir, name), sha256)
+        for name, sha256 in entry.get('variants', {}).items())
+
+
+def record(manifest, script, func, key, variants=()):
+    """生成し終えた図を、解像度・形式違いのファイル名 variants と一緒にマニフェストに記録する"""
+    path = discover.output_path(script, func)
+    if not os.path.exists(path):
+        return
+    entry = {'key': key, 'sha256': file_sha256(path)}
+    if variants:
+        images_dir = os.path.dirname(path)
+        entry['variants'] = {name: file_sha256(os.path.join(images_dir, name)) for name in variants}
+    manifest[manifest_id(script, func)] = entry
@@ -0,0 +1,145 @@
+"""
+図のサンプルデータを numpy.random.Generator でまとめて作る
+
+    from figkit import datagen
+
+    scores = datagen.normal(75, 10, 100)                          # 正規分布の 100 件（× SIZE）
+    class_a, class_b, class_c = datagen.groups([70, 75, 65], [12, 10, 15], 40)
+    visitors = datagen.integers(80, 150, 14, scale=False)        # 14 日分など、件数が決まっている系列
+
+戻り値は numpy の配列（groups は配列のリスト）で、そのまま plot / hist / boxplot に渡せる。
+件数は configure(size=...) の倍率を掛けた数になる（既定は 1 で、ドキュメントの図と同じ件数）。
+日付や月のように x 軸と対応している系列は scale=False にして、倍率を掛けない。
+
+乱数の種は registry.seed_figure() が図の名前から設定するので、図ごとに同じデータになる。
+figkit.stress は recording() で図が倍率を掛けて作る件数を調べ、n 件になる倍率でその図を描く。
+倍率を上げたときの生成時間は python -m figkit.datagen で測れる:
+
+    python -m figkit.datagen --sizes 1e4 1e6 1e7
+"""
+
+import argparse
+import contextlib
+import random
+import sys
+import time
+
+# サンプルの件数に掛ける倍率（大量データでの動作確認用）
+SIZE = 1
+
+_generator = None
+
+# recording() の中で、倍率を掛ける前の件数を記録するリスト
+_recorded = None
+
+
+def configure(size=1):
+    """サンプルの件数に掛ける倍率を設定する（正の数でなければ ValueError）"""
+    global SIZE
+
+    if size <= 0:
+        raise ValueError(f"倍率は正の数です: {size}")
+    SIZE = size
+
+
+def seed(value):
+    """乱数の種を設定する（registry.seed_figure() から呼ばれる）"""
+    global _generator
+
+    import numpy as np
+
+    _generator = np.random.default_rng(value)
+
+
+def generator():
+    """現在の numpy.random.Generator（種が未設定なら 0 で作る）"""
+    if _generator is None:
+        seed(0)
+    return _generator
+
+
+def count(n, scale=True):
+    """n 件に倍率を掛けた件数（最低 1 件）"""
+    if not scale:
+        return n
+    if _recorded is not None:
+        _recorded.append(n)
+    return max(1, int(round(n * SIZE)))
+
+
+@contextlib.contextmanager
+def recording():
+    """この中で倍率を掛けて作った系列の、倍率を掛ける前の件数のリストを返す"""
+    global _recorded
+
+    previous, _recorded = _recorded, []
+    try:
+        yield _recorded
+    finally:
+        _recorded = previous
+
+
+def normal(mean, std, n, scale=True):
+    """平均 mean、標準偏差 std の正規分布から n 件（random.gauss の代わり）"""
+    return generator().normal(mean, std, count(n, scale))
+
+
+def integers(low, high, n, scale=True):
+    """low 以上 high 以下の整数を n 件（random.randint と同じく high を含む）"""
+    return generator().integers(low, high, count(n, scale), endpoint=True)
+
+
+def uniform(low, high, n, scale=True):
+    """low 以上 high 未満の一様分布から n 件（random.uniform の代わり）"""
+    return generator().uniform(low, high, count(n, scale))
+
+
+def groups(means, stds, n, scale=True):
+    """
+    グループごとに正規分布から n 件ずつ作り、配列のリストで返す（箱ひげ図・重ねたヒストグラム用）
+
+    stds は数 1 つ（全グループ共通）かグループごとのリスト。1 回の呼び出しでまとめて生成する。
+    """
+    import numpy as np
+
+    means = np.asarray(means, dtype=float)[:, None]
+    stds = np.broadcast_to(np.asarray(stds, dtype=float), means.shape[:1])[:, None]
+    return list(generator().normal(means, stds, (len(means), count(n, scale))))
+
+
+def _python_groups(means, stds, n):
+    """比較用：リスト内包表記と random.gauss で同じ形のデータを作る"""
+    return [[random.gauss(mean, std) for _ in range(n)] for mean, std in zip(means, stds)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='サンプルデータの生成時間を件数ごとに測る')
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e2, 1e4, 1e6],
+                        help='1 グループあたりの件数（既定: 1e2 1e4 1e6）')
+    parser.add_argument('--python-limit', type=float, default=1e6,
+                        help='random.gauss でも測る最大の件数（遅いので既定: 1e6）')
+    args = parser.parse_args(argv)
+
+    means, stds = [100, 80, 70, 60], [15, 12, 10, 8]
+    seed(0)
+    random.seed(0)
+    print(f"{'samples/group':>14}{'numpy':>12}{'random.gauss':>15}{'speedup':>9}")
+    for size in args.sizes:
+        n = int(size)
+        start = time.perf_counter()
+        groups(means, stds, n, scale=False)
+        vectorized = time.perf_counter() - start
+
+        line = f"{n:>14,}{vectorized * 1000:>10.2f}ms"
+        if n <= args.python_limit:
+            start = time.perf_counter()
+            _python_groups(means, stds, n)
+            looped = time.perf_counter() - start
+            line += f"{looped * 1000:>13.2f}ms{looped / vectorized:>8.1f}x"
+        print(line)
+    print(f"({len(means)} groups per call)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+折れ線と fill_between に渡す点を、描画される画素の幅に合わせて間引く
+
+    from figkit import decimate
+
+    decimate.plot(ax, x, y, 'b-o', linewidth=2)          # ax.plot(x, y, 'b-o', linewidth=2) の代わり
+    decimate.fill_between(ax, x, y, alpha=0.2)           # ax.fill_between(x, y, alpha=0.2) の代わり
+
+全点で描いた線・塗りつぶしを描画の直前に差し替える。tight_layout / constrained layout の計算後の
+Axes の幅（保存する dpi での画素数）から列数を求め、点が列数の 2 倍より多いときだけ間引く。
+解像度違い（2x など）は描画するたびにその dpi で間引き直す。ドキュメントの図のように点が少ないときは
+何もしないので、出力される画像は ax.plot / ax.fill_between を直接呼んだときと同じになる。
+
+間引き方は configure(method=...) で選ぶ:
+  'minmax' : 画素の列ごとに最小値と最大値の点を残す（既定。山と谷は 1 画素も欠けない）
+  'lttb'   : Largest-Triangle-Three-Buckets。列ごとに、前後の点と作る三角形が最大の点を 1 つ残す
+             （点の数は半分で済むが、列の中の 2 番目の山は落ちることがある）
+  None     : 間引かない（比較用）
+
+x が数値・日時でない（月名などのカテゴリ）ときは間引かない（間引くとカテゴリの目盛りが消えるため）。
+x が昇順に並んでいない、または y に NaN があるときも間引かない（線の途切れを保つため）。
+fill_between の差し替えには FillBetweenPolyCollection.set_data を使うので、matplotlib 3.10 より前では間引かない。
+間引くのは描く時点のデータ全体の範囲なので、あとで set_xlim で拡大すると粗く見える。
+"""
+
+METHODS = ('minmax', 'lttb')
+
+# 間引き方（'minmax' / 'lttb' / None）
+METHOD = 'minmax'
+
+# 1 列あたりに残す点の数の目安（minmax は最小と最大で 2 点）
+POINTS_PER_COLUMN = 2
+
+
+def configure(method='minmax'):
+    """間引き方を設定する（使えない値なら ValueError）"""
+    global METHOD
+
+    if method is not None and method not in METHODS:
+        raise ValueError(f"間引き方は {', '.join(METHODS)} か None です: {method}")
+    METHOD = method
+
+
+def pixel_columns(ax, renderer=None):
+    """Axes が描画される横方向の画素数（描画中に呼ぶと、レイアウトの計算後の大きさになる）"""
+    return max(1, int(ax.get_window_extent(renderer).width))
+
+
+def _positions(x):
+    """間引きに使う x の数値。数値・日時でないか、昇順でなければ None"""
+    import numpy as np
+
+    values = np.asarray(x)
+    if values.dtype.kind in 'Mm':
+        values = values.view('int64')
+    elif values.dtype.kind not in 'iuf':
+        return None
+    values = values.astype(float)
+    if not np.isfinite(values).all() or (np.diff(values) < 0).any():
+        return None
+    return values
+
+
+def _bucket_starts(positions, columns):
+    """x の範囲を columns 等分した各列の、最初の点の番号（空の列は除く）"""
+    import numpy as np
+
+    edges = np.linspace(positions[0], positions[-1], columns + 1)
+    starts = np.searchsorted(positions, edges[:-1], side='left')
+    return np.unique(starts)
+
+
+def _first_in_segment(mask, segment, count):
+    """segment ごとに、mask が True の最初の点の番号"""
+    import numpy as np
+
+    hits = np.flatnonzero(mask)
+    _, first = np.unique(segment[hits], return_index=True)
+    return hits[first][:count]
+
+
+def minmax_indices(positions, y, columns):
+    """列ごとの最小値・最大値の点と、両端の点の番号を昇順で返す"""
+    import numpy as np
+
+    starts = _bucket_starts(positions, columns)
+    lengths = np.diff(np.append(starts, len(y)))
+    segment = np.repeat(np.arange(len(starts)), lengths)
+    lows = np.repeat(np.minimum.reduceat(y, starts), lengths)
+    highs = np.repeat(np.maximum.reduceat(y, starts), lengths)
+    keep = np.concatenate([
+        [0, len(y) - 1],
+        _first_in_segment(y == lows, segment, len(starts)),
+        _first_in_segment(y == highs, segment, len(starts)),
+    ])
+    return np.unique(keep)
+
+
+def lttb_indices(positions, y, threshold):
+    """Largest-Triangle-Three-Buckets で threshold 点を選び、番号を昇順で返す"""
+    import numpy as np
+
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # 両端を除いた点を threshold - 2 個のバケットに分ける
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    # 次のバケットの平均は、バケットごとの合計をまとめて計算しておく
+    sums_x = np.add.reduceat(positions[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    mean_x = np.append(sums_x / sizes, positions[-1])
+    mean_y = np.append(sums_y / sizes, y[-1])
+
+    chosen = np.empty(threshold, dtype=int)
+    chosen[0], chosen[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        cx, cy = mean_x[bucket + 1], mean_y[bucket + 1]
+        ax, ay = positions[a], y[a]
+        # 三角形の面積の 2 倍（符号を除く）
+        area = np.abs((ax - cx) * (y[lo:hi] - ay) - (ax - positions[lo:hi]) * (cy - ay))
+        a = lo + int(area.argmax())
+        chosen[bucket + 1] = a
+    return chosen
+
+
+def indices(x, y, columns, method=None):
+    """x, y を columns 列に描くときに残す点の番号（間引かないときは None）"""
+    import numpy as np
+
+    method = method or METHOD
+    if method is None or len(y) <= columns * POINTS_PER_COLUMN:
+        return None
+    positions = _positions(x)
+    values = np.asarray(y, dtype=float)
+    if positions is None or not np.isfinite(values).all():
+        return None
+    if method == 'lttb':
+        return lttb_indices(positions, values, columns * POINTS_PER_COLUMN)
+    return minmax_indices(positions, values, columns)
+
+
+def _take(values, keep):
+    import numpy as np
+
+    if keep is None or np.ndim(values) == 0:
+        return values
+    return np.asarray(values)[keep]
+
+
+def on_draw(artist, update):
+    """
+    artist を描く直前に update(columns) を呼ぶ（columns はその時点の Axes の画素の列数）
+
+    bbox_inches='tight' の savefig は同じ大きさで 2 回描画するので、列数が前回と同じなら呼ばない。
+    """
+    draw = artist.draw
+    drawn = [None]
+
+    def wrapper(renderer, *args, **kwargs):
+        columns = pixel_columns(artist.axes, renderer)
+        if columns != drawn[0]:
+            update(columns)
+            drawn[0] = columns
+        return draw(renderer, *args, **kwargs)
+
+    artist.draw = wrapper
+
+
+def plot(ax, x, y, *args, **kwargs):
+    """ax.plot(x, y, ...) と同じ。描くときに点が画素より多ければ間引く"""
+    import numpy as np
+
+    lines = ax.plot(x, y, *args, **kwargs)
+    # 描画のたびに range やリストを配列にし直さない
+    x, y = np.asarray(x), np.asarray(y)
+    for line in lines:
+        def update(columns, line=line):
+            keep = indices(x, y, columns)
+            line.set_data(_take(x, keep), _take(y, keep))
+
+        on_draw(line, update)
+    return lines
+
+
+def fill_between(ax, x, y1, y2=0, **kwargs):
+    """ax.fill_between(x, y1, y2, ...) と同じ。描くときに点が画素より多ければ間引く"""
+    import numpy as np
+
+    collection = ax.fill_between(x, y1, y2, **kwargs)
+    if not hasattr(collection, 'set_data'):
+        return collection
+    x, y1 = np.asarray(x), np.asarray(y1)
+    where = kwargs.get('where')
+
+    def update(columns):
+        keep = indices(x, y1, columns)
+        if keep is not None and np.ndim(y2) != 0:
+            # 下側の線の山と谷も残す
+            other = indices(x, y2, columns)
+            keep = keep if other is None else np.union1d(keep, other)
+        collection.set_data(_take(x, keep), _take(y1, keep), _take(y2, keep), where=_take(where, keep))
+
+    on_draw(collection, update)
+    return collection
@@ -0,0 +1,215 @@
+"""
+点の多い散布図・バブルチャートを、点ごとのマーカーではなく密度の画像 1 枚として描く
+
+    from figkit import density
+
+    density.scatter(ax, x, y, s=80, alpha=0.7)                       # ax.scatter(x, y, ...) の代わり
+    bubbles = density.scatter(ax, x, y, s=sizes, c=sales, cmap='YlOrRd')
+    plt.colorbar(bubbles, label='Sales')
+
+点が THRESHOLD 以下（ドキュメントの図はすべてこちら）なら ax.scatter をそのまま呼ぶので、
+出力される画像は ax.scatter を直接呼んだときと同じになる。
+THRESHOLD を超えると、Axes の画素（figsize × Axes の位置 × 保存する dpi、registry.render_dpi()）を
+CELL_PIXELS 四方のセルに分けた格子に点を数え上げ（np.bincount）、imshow で描く。
+描画の時間は点の数によらず格子の大きさだけで決まる。
+
+散布図の見た目の情報は、セルごとに集計して残す:
+  点の数              : セルの不透明度（対数目盛り。点が 1 つでもあれば MIN_ALPHA 以上）
+  s（配列のとき）     : 点の数の代わりにマーカーの面積の合計を数える（大きなバブルほど濃くなる）
+  c（数値の配列のとき）: セル内の平均値（s があれば面積で重み付け）を cmap / norm / vmin / vmax で色にする。
+                        戻り値の AxesImage は colorbar() に渡せる
+  c / color（色のとき）: その色（点ごとの色ならセル内の平均色）で塗る
+
+x・y が NaN / inf の点は、ax.scatter と同じく描かない（s・c が数値の配列なら、NaN / inf の点も描かない）。
+画像にするときに使えるキーワードは RASTER_KWARGS だけで、マーカーの形（marker）・縁の色（edgecolor）など
+それ以外のキーワードは描けないので、無視したことを警告（UserWarning）で知らせる。
+configure(threshold=None) で常に ax.scatter を使う。
+"""
+
+import math
+import warnings
+
+from . import registry
+
+# これより多い点は密度の画像にする（None なら常に ax.scatter）
+THRESHOLD = 10000
+
+# 格子の 1 セルの大きさ（保存後の画素）
+CELL_PIXELS = 2
+
+# 点のあるセルの最小の不透明度（alpha に掛ける）
+MIN_ALPHA = 0.25
+
+# 密度の画像でも反映できる ax.scatter のキーワード
+RASTER_KWARGS = ('color', 'alpha', 'cmap', 'norm', 'vmin', 'vmax', 'zorder', 'label')
+
+
+def configure(threshold=10000, cell_pixels=2):
+    """密度の画像にする点の数と、セルの大きさを設定する（使えない値なら ValueError）"""
+    global THRESHOLD, CELL_PIXELS
+
+    if threshold is not None and threshold < 0:
+        raise ValueError(f"点の数は 0 以上か None です: {threshold}")
+    if cell_pixels < 1:
+        raise ValueError(f"セルの大きさは 1 画素以上です: {cell_pixels}")
+    THRESHOLD = threshold
+    CELL_PIXELS = cell_pixels
+
+
+def grid_shape(ax, dpi=None):
+    """Axes を CELL_PIXELS 四方のセルに分けたときの (行数, 列数)"""
+    fig = ax.figure
+    dpi = dpi or registry.render_dpi(fig)
+    box = ax.get_position()
+    rows = box.height * fig.get_figheight() * dpi / CELL_PIXELS
+    columns = box.width * fig.get_figwidth() * dpi / CELL_PIXELS
+    return max(1, int(rows)), max(1, int(columns))
+
+
+def _span(values):
+    """values の範囲（すべて同じ値なら前後に 0.5 ずつ広げる）"""
+    low, high = float(values.min()), float(values.max())
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return low, high
+
+
+def finite_points(x, y, *columns):
+    """
+    x・y とそれに並ぶ配列から、x・y が NaN / inf の点を除く
+
+    (x, y, *columns) を返す。None の列はそのまま返す。
+    """
+    import numpy as np
+
+    keep = np.isfinite(x) & np.isfinite(y)
+    if keep.all():
+        return (x, y) + columns
+    return (x[keep], y[keep]) + tuple(None if values is None else values[keep] for values in columns)
+
+
+def aggregate(x, y, shape, weights=None, channels=()):
+    """
+    点を shape（行数, 列数）の格子に数え上げる
+
+    (extent, totals, means) を返す。extent は imshow に渡す範囲、totals はセルごとの weights の合計
+    （weights がなければ点の数）、means は channels の各配列のセルごとの重み付き平均（点のないセルは 0）。
+    x・y が NaN / inf の点は数えない。
+    """
+    import numpy as np
+
+    x, y, weights, *channels = finite_points(x, y, weights, *channels)
+    rows, columns = shape
+    x0, x1 = _span(x)
+    y0, y1 = _span(y)
+    col = np.minimum(((x - x0) * (columns / (x1 - x0))).astype(np.intp), columns - 1)
+    row = np.minimum(((y - y0) * (rows / (y1 - y0))).astype(np.intp), rows - 1)
+    cell = row * columns + col
+
+    size = rows * columns
+    totals = np.bincount(cell, weights=weights, minlength=size)
+    occupied = totals > 0
+    means = []
+    for values in channels:
+        sums = np.bincount(cell, weights=values if weights is None else values * weights, minlength=size)
+        means.append(np.divide(sums, totals, out=np.zeros(size), where=occupied).reshape(shape))
+    return (x0, x1, y0, y1), totals.reshape(shape), means
+
+
+def opacity(totals, alpha=None):
+    """セルごとの合計を不透明度にする（対数目盛り、点のないセルは 0）"""
+    import numpy as np
+
+    peak = totals.max()
+    scaled = np.log1p(totals) / math.log1p(peak) if peak > 0 else totals
+    level = np.where(totals > 0, MIN_ALPHA + (1 - MIN_ALPHA) * scaled, 0.0)
+    return level * (1.0 if alpha is None else alpha)
+
+
+def next_color(ax):
+    """
+    rcParams['axes.prop_cycle'] の色から、ax.scatter が次に使う色を返す
+
+    Axes にある散布図（collections）と密度の画像（images）の数だけ色のサイクルを進める。
+    """
+    from matplotlib import rcParams
+
+    colors = rcParams['axes.prop_cycle'].by_key().get('color') or ['C0']
+    return colors[(len(ax.collections) + len(ax.images)) % len(colors)]
+
+
+def scatter(ax, x, y, s=None, c=None, **kwargs):
+    """
+    ax.scatter(x, y, s, c, ...) と同じ。点が THRESHOLD より多ければ密度の画像にして描く
+
+    画像にしたときは AxesImage を返す（ax.scatter と同じく colorbar() に渡せる）。
+    """
+    import numpy as np
+    from matplotlib import colors as mcolors
+
+    if THRESHOLD is None or np.size(x) <= THRESHOLD:
+        return ax.scatter(x, y, s=s, c=c, **kwargs)
+
+    ignored = sorted(key for key in kwargs if key not in RASTER_KWARGS)
+    if ignored:
+        warnings.warn(f"density.scatter draws more than {THRESHOLD} points as an image and ignores: "
+                      f"{', '.join(ignored)}", stacklevel=2)
+
+    x = np.asarray(x, dtype=float).ravel()
+    y = np.asarray(y, dtype=float).ravel()
+    n = len(x)
+    sizes = None
+    if np.ndim(s) != 0:
+        sizes = np.asarray(s, dtype=float).ravel()
+    values = None
+    if c is not None and np.ndim(c) == 1 and len(c) == n and np.asarray(c).dtype.kind in 'iuf':
+        values = np.asarray(c, dtype=float)
+    rgba = None
+    if values is None:
+        color = c if c is not None else kwargs.get('color')
+        rgba = mcolors.to_rgba_array(color if color is not None else next_color(ax))
+        if len(rgba) != n or n == 1:
+            rgba = rgba[:1]
+
+    # ax.scatter と同じく、位置・大きさ・値のどれかが NaN / inf の点は描かない
+    keep = np.isfinite(x) & np.isfinite(y)
+    for column in (sizes, values):
+        if column is not None:
+            keep &= np.isfinite(column)
+    if not keep.any():
+        return ax.scatter(x, y, s=s, c=c, **kwargs)
+    if not keep.all():
+        x, y = x[keep], y[keep]
+        sizes = None if sizes is None else sizes[keep]
+        values = None if values is None else values[keep]
+        if rgba is not None and len(rgba) > 1:
+            rgba = rgba[keep]
+
+    weights = None
+    if sizes is not None:
+        # 面積の合計を、平均的なマーカー何個分かに直す（点の数と同じ目盛りで不透明度にする）
+        weights = sizes / sizes.mean()
+
+    shape = grid_shape(ax)
+    alpha = kwargs.get('alpha')
+    common = dict(origin='lower', aspect='auto', interpolation='nearest',
+                  zorder=kwargs.get('zorder', 1), label=kwargs.get('label'))
+
+    if values is not None:
+        extent, totals, (means,) = aggregate(x, y, shape, weights, [values])
+        norm = kwargs.get('norm') or mcolors.Normalize(kwargs.get('vmin', values.min()),
+                                                       kwargs.get('vmax', values.max()))
+        image = ax.imshow(np.ma.masked_where(totals == 0, means), extent=extent,
+                          cmap=kwargs.get('cmap'), norm=norm, **common)
+        image.set_alpha(opacity(totals, alpha))
+        return image
+
+    if len(rgba) > 1:
+        extent, totals, means = aggregate(x, y, shape, weights, [rgba[:, i] for i in range(3)])
+        image = np.dstack(means + [opacity(totals, alpha)])
+    else:
+        extent, totals, _ = aggregate(x, y, shape, weights)
+        image = np.empty(shape + (4,))
+        image[..., :3] = rgba[0, :3]
+        image[..., 3] = opacity(totals, alpha)
+    return ax.imshow(image, extent=extent, **common)
@@ -0,0 +1,245 @@
+"""
+Section*/generate_images.py を探し、登録されている図を静的に洗い出す
+
+スクリプトを import せずに ast で @figure('...') デコレータを読むので、
+matplotlib を読み込む前に「どの関数が何を描くか」を決められる。
+"""
+
+import ast
+import collections
+import fnmatch
+import glob
+import importlib.util
+import os
+import re
+
+# figkit パッケージと CH7-Matplotlib入門 ディレクトリ
+FIGKIT_DIR = os.path.dirname(os.path.abspath(__file__))
+CHAPTER_DIR = os.path.dirname(FIGKIT_DIR)
+SCRIPT_NAME = 'generate_images.py'
+
+CATEGORIES = ('tech', 'exercise', 'app')
+
+# 解像度によらないベクター形式（2x などの解像度違いは書き出さない）
+VECTOR_FORMATS = ('svg', 'pdf')
+
+# 図を生成する関数 1 つ分の情報
+#   id          : 'Section3/app_sales_dashboard' のような図の名前
+#   output      : images/ 内の保存ファイル名
+#   category    : 'tech'（技術説明）/ 'exercise'（演習）/ 'app'（応用問題）
+#   save_params : registry.Section(...) に渡した savefig のキーワード引数（ソース表記の文字列）
+#   source      : 関数のソースコード（デコレータを含む）
+#   formats     : @figure(..., formats=(...)) で、この図だけ常に書き出す形式
+FigureFunc = collections.namedtuple(
+    'FigureFunc', ['id', 'name', 'lineno', 'output', 'category', 'save_params', 'source', 'formats'])
+
+
+def section_name(script_path):
+    """'.../Section3-棒グラフとヒストグラム/generate_images.py' -> 'Section3'"""
+    dirname = os.path.basename(os.path.dirname(os.path.abspath(script_path)))
+    return dirname.split('-', 1)[0]
+
+
+def _section_number(script_path):
+    return int(section_name(script_path)[len('Section'):])
+
+
+def find_scripts(chapter_dir=CHAPTER_DIR):
+    """Section 番号順に生成スクリプトのパスを返す"""
+    paths = glob.glob(os.path.join(chapter_dir, 'Section*', SCRIPT_NAME))
+    return sorted(paths, key=_section_number)
+
+
+def figure_id(section, output):
+    """'Section3', 'app_sales_dashboard.png' -> 'Section3/app_sales_dashboard'"""
+    return f"{section}/{os.path.splitext(output)[0]}"
+
+
+def category_of(output):
+    """ファイル名の接頭辞（tech_ / exercise_ / app_）からカテゴリを決める"""
+    prefix = output.split('_', 1)[0]
+    if prefix not in CATEGORIES:
+        raise ValueError(f"カテゴリを決められないファイル名です: {output}")
+    return prefix
+
+
+def matches(fig_id, patterns):
+    """
+    図の名前がパターンのどれかに一致するか（パターンなしなら常に True）
+
+    パターンは fnmatch 形式で、'Section3/app_*' のように Section 付きでも、
+    'app_dashboard' のようにファイル名だけでも指定できる。拡張子はあってもなくてもよい。
+    """
+    if not patterns:
+        return True
+    stem = fig_id.split('/', 1)[1]
+    for pattern in patterns:
+        if pattern.endswith('.png'):
+            pattern = pattern[:-len('.png')]
+        target = fig_id if '/' in pattern else stem
+        if fnmatch.fnmatchcase(target, pattern):
+            return True
+    return False
+
+
+def _call_name(call):
+    func = call.func
+    return func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+
+
+def _parse(script_path):
+    with open(script_path, encoding='utf-8') as f:
+        source = f.read()
+    return source, ast.parse(source, filename=script_path)
+
+
+def _segment(lines, node):
+    # ast.get_source_segment は呼ぶたびにファイル全体を行分割するので、トップレベル文は行単位で切り出す
+    start = min([node.lineno] + [d.lineno for d in getattr(node, 'decorator_list', [])])
+    return ''.join(lines[start - 1:node.end_lineno])
+
+
+def _figure_decorator(node):
+    """@figure('xxx.png') / @section.figure('xxx.png') の呼び出しを返す"""
+    for deco in node.decorator_list:
+        if (isinstance(deco, ast.Call) and _call_name(deco) == 'figure'
+                and deco.args and isinstance(deco.args[0], ast.Constant)):
+            return deco
+    return None
+
+
+def _section_params(tree):
+    """モジュール直下の registry.Section(__file__, ...) に渡された保存パラメータ"""
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and isinstance(node.value, ast.Call)
+                and _call_name(node.value) == 'Section'):
+            return {kw.arg: ast.unparse(kw.value) for kw in node.value.keywords}
+    return {}
+
+
+def scan_script(script_path):
+    """@figure で登録されているトップレベル関数を定義順に返す"""
+    source, tree = _parse(script_path)
+    lines = source.splitlines(keepends=True)
+    section = section_name(script_path)
+    save_params = _section_params(tree)
+
+    funcs = []
+    for node in tree.body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        deco = _figure_decorator(node)
+        if deco is None:
+            continue
+        output = deco.args[0].value
+        category = next((kw.value.value for kw in deco.keywords if kw.arg == 'category'), None)
+        formats = next((ast.literal_eval(kw.value) for kw in deco.keywords if kw.arg == 'formats'), ())
+        funcs.append(FigureFunc(figure_id(section, output), node.name, node.lineno, output,
+                                category or category_of(output), save_params,
+                                _segment(lines, node), tuple(formats)))
+    return funcs
+
+
+def _is_main_guard(node):
+    return (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+            and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__')
+
+
+def module_source(script_path):
+    """
+    @figure の関数と __main__ ブロックを除いたモジュール直下のコード
+
+    import や random.seed などの設定に加えて、図から呼ばれる補助関数（@figure のない関数）も含む。
+    """
+    source, tree = _parse(script_path)
+    lines = source.splitlines(keepends=True)
+    return ''.join(_segment(lines, node) for node in tree.body
+                   if not (isinstance(node, ast.FunctionDef) and _figure_decorator(node) is not None)
+                   and not _is_main_guard(node))
+
+
+def _figkit_imports(tree, package=False):
+    """import している figkit のモジュール名（package なら figkit 内の相対 import も数える）"""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            if node.module == 'figkit' or (package and node.level == 1 and node.module is None):
+                names.update(alias.name for alias in node.names)
+            elif node.module and node.module.startswith('figkit.'):
+                names.add(node.module.split('.')[1])
+            elif package and node.level == 1:
+                names.add(node.module.split('.')[0])
+        elif isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[1] for alias in node.names if alias.name.startswith('figkit.'))
+    return names
+
+
+def figkit_modules(script_path):
+    """
+    スクリプトが使う figkit のモジュールのパスを名前順に返す
+
+    registry が datagen を読み込むように、figkit のモジュールから間接的に読み込むものも含める
+    （関数の中の import も数える）。
+    """
+    _, tree = _parse(script_path)
+    pending = _figkit_imports(tree)
+    found = {}
+    while pending:
+        name = pending.pop()
+        path = os.path.join(FIGKIT_DIR, name + '.py')
+        if name in found or not os.path.exists(path):
+            continue
+        found[name] = path
+        pending |= _figkit_imports(_parse(path)[1], package=True) - set(found)
+    return [found[name] for name in sorted(found)]
+
+
+def output_path(script_path, func):
+    """図の保存先（各スクリプトの images/ ディレクトリ）"""
+    return os.path.join(os.path.dirname(os.path.abspath(script_path)), 'images', func.output)
+
+
+def variant_name(output, scale=1, fmt='png'):
+    """解像度・形式違いのファイル名（'x.png', 2, 'webp' -> 'x@2x.webp'。1x の PNG は output のまま）"""
+    stem = os.path.splitext(output)[0]
+    suffix = '' if scale == 1 else f"@{scale:g}x"
+    return f"{stem}{suffix}.{fmt}"
+
+
+def variant_formats(formats, extra=()):
+    """全図共通の形式に、図ごとの形式（@figure の formats）を重複なく足したもの"""
+    return tuple(formats) + tuple(fmt for fmt in extra if fmt not in formats)
+
+
+def variant_outputs(output, scales=(1,), formats=('png',)):
+    """1 つの図から書き出すファイル名を、output 自身を除いて返す（ベクター形式は 1x だけ）"""
+    names = [variant_name(output, scale, fmt) for scale in scales for fmt in formats
+             if scale == 1 or fmt not in VECTOR_FORMATS]
+    return [name for name in names if name != output]
+
+
+# ![代替テキスト](images/xxx.png) と <img src="images/xxx.png">
+IMAGE_REF = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+"[^"]*")?\s*\)|<img\s[^>]*src="([^"]+)"')
+
+
+def page_images(page_path):
+    """Markdown ページが参照している画像の絶対パスの集合"""
+    with open(page_path, encoding='utf-8') as f:
+        text = f.read()
+    page_dir = os.path.dirname(os.path.abspath(page_path))
+    refs = set()
+    for match in IMAGE_REF.finditer(text):
+        ref = match.group(1) or match.group(2)
+        if '://' in ref:
+            continue
+        refs.add(os.path.normpath(os.path.join(page_dir, ref)))
+    return refs
+
+
+def load_module(script_path):
+    """スクリプトを毎回新しいモジュールとして読み込む"""
+    name = 'ch7_' + section_name(script_path).lower()
+    spec = importlib.util.spec_from_file_location(name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
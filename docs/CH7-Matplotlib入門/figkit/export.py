@@ -0,0 +1,241 @@
+"""
+登録されている図を 1 回だけ描いて、任意の形式の組み合わせで書き出す
+
+    python -m figkit.export 'Section5/exercise_7_*' --formats png svg pdf
+    python -m figkit.export tech_dashboard --formats png webp svg pdf --scales 1 2 --out /tmp/figures
+    python -m figkit.export 'Section5/app_*' --formats png svg pdf --bench   # 形式ごとに描き直す場合と比べる
+
+Python からは export() を使う。ファイルに書かずにバイト列が欲しいときは render() を使う:
+
+    from figkit import export
+    paths = export.export(['Section5/app_full_report'], formats=('png', 'svg', 'pdf'), out_dir='out')
+
+    rendered = export.render('Section5/app_full_report', fmt='webp', scale=2)
+    rendered.data, rendered.width, rendered.height, rendered.seconds, rendered.sha256
+
+    buffer = io.BytesIO()
+    export.render('Section3/tech_dashboard', out=buffer)         # 書き込み先を渡すこともできる
+
+図の関数（データの準備・Axes の作成・レイアウト）は 1 回だけ実行し、registry.Section.export() で
+各形式に書き出す。PNG からの変換と書き込みはスレッドで並行して行い、ベクター形式では点の多い線や
+コレクションをラスター画像として埋め込む（registry.RASTERIZE_POINTS）。
+書き出し先の既定は .figkit/export/ で、images/ とビルドのキャッシュには触れない。
+
+--bench は同じ図について次の 2 つの時間を --repeat 回の中央値で比べる:
+  single : 関数を 1 回実行して全形式を書き出す（export()）
+  rerun  : 形式（と解像度）ごとに関数を実行し直して描画し、順に書き出す（従来の方法）
+"""
+
+import argparse
+import collections
+import hashlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from . import cache, discover, registry
+
+EXPORT_DIR = os.path.join(cache.STATE_DIR, 'export')
+
+# render() の結果
+#   id      : 図の名前
+#   format  : 'png' / 'webp' / 'avif' / 'svg' / 'pdf'
+#   data    : エンコード済みのバイト列
+#   width   : 画像の幅（ラスター形式は画素、ベクター形式は pt）
+#   height  : 画像の高さ（同上）
+#   size    : data のバイト数
+#   seconds : 関数の実行からエンコードまでにかかった秒数
+#   sha256  : data の SHA-256（16 進）
+Rendered = collections.namedtuple('Rendered', ['id', 'format', 'data', 'width', 'height', 'size',
+                                               'seconds', 'sha256'])
+
+
+def load(patterns=()):
+    """パターンに一致する図がある Section のスクリプトを読み込み、一致する図を登録順に返す"""
+    figures = []
+    for script in discover.find_scripts():
+        if not any(discover.matches(func.id, patterns) for func in discover.scan_script(script)):
+            continue
+        name = discover.section_name(script)
+        if name not in registry.SECTIONS:
+            discover.load_module(script)
+        figures.extend(registry.SECTIONS[name].figures(patterns))
+    return figures
+
+
+def build(fig):
+    """図の関数を 1 回実行してレイアウトまで済ませ、Figure を返す（保存はしない）"""
+    import matplotlib.pyplot as plt
+
+    registry.seed_figure(fig.id)
+    with registry.drawing(registry.SECTIONS[fig.section], fig.layout):
+        fig.draw()
+    registry.apply_layout(fig.layout, fig.adjust)
+    return plt.gcf()
+
+
+def export_figure(fig, formats, scales=(1,), out_dir=EXPORT_DIR):
+    """1 つの図を 1 回だけ描いて全形式を書き出し、書き出したパスを返す"""
+    import matplotlib.pyplot as plt
+
+    try:
+        return registry.SECTIONS[fig.section].export(build(fig), fig.output, scales, formats, out_dir)
+    finally:
+        plt.close('all')
+
+
+def _dimensions(data, fmt):
+    """エンコード済みの画像の (幅, 高さ)。ラスター形式は画素、SVG / PDF は pt"""
+    if fmt == 'svg':
+        import xml.etree.ElementTree as ET
+
+        root = ET.fromstring(data)
+        return tuple(float(root.get(name).rstrip('pt')) for name in ('width', 'height'))
+    if fmt == 'pdf':
+        import re
+
+        box = re.search(rb'/MediaBox\s*\[\s*([\d.\s-]+)\]', data).group(1).split()
+        x0, y0, x1, y1 = (float(value) for value in box)
+        return x1 - x0, y1 - y0
+    from PIL import Image
+
+    # ヘッダだけを読む（画素はデコードしない）
+    return Image.open(io.BytesIO(data)).size
+
+
+def _write_into(out, data):
+    """out（write() を持つファイル風のオブジェクト、または書き込み可能なバッファ）に data を書く"""
+    if hasattr(out, 'write'):
+        out.write(data)
+        return
+    view = memoryview(out).cast('B')
+    if view.readonly:
+        raise ValueError("書き込みできないバッファです")
+    if len(view) < len(data):
+        raise ValueError(f"バッファが小さすぎます: {len(view)} < {len(data)} バイト")
+    view[:len(data)] = data
+
+
+def render(pattern, fmt='png', scale=1, out=None):
+    """
+    パターンに一致する 1 つの図を描いて fmt にエンコードし、Rendered を返す（ファイルには書かない）
+
+    out を渡すと data を書き込む。BytesIO などのファイル風のオブジェクトには write() し、
+    bytearray や memoryview などのバッファには先頭から data の長さだけ書く（足りなければ ValueError）。
+    一致する図が 1 つでないとき、書き出せない形式のときも ValueError。
+    """
+    import matplotlib.pyplot as plt
+
+    registry.check_formats([fmt])
+    figures = load([pattern])
+    if len(figures) != 1:
+        raise ValueError(f"{pattern} に一致する図が {len(figures)} 個あります（1 つに絞ってください）")
+    fig = figures[0]
+    start = time.perf_counter()
+    try:
+        data = registry.SECTIONS[fig.section].encode(build(fig), fmt, scale)
+    finally:
+        plt.close('all')
+    seconds = time.perf_counter() - start
+    if out is not None:
+        _write_into(out, data)
+    width, height = _dimensions(data, fmt)
+    return Rendered(fig.id, fmt, data, width, height, len(data), seconds,
+                    hashlib.sha256(data).hexdigest())
+
+
+def rerun_figure(fig, formats, scales=(1,), out_dir=EXPORT_DIR):
+    """比較用：形式（と解像度）ごとに関数を実行し直して、1 つずつ順に書き出す"""
+    import matplotlib.pyplot as plt
+
+    section = registry.SECTIONS[fig.section]
+    paths = []
+    for scale in scales:
+        for fmt in formats:
+            if scale != 1 and fmt in discover.VECTOR_FORMATS:
+                continue
+            path = os.path.join(out_dir, discover.variant_name(fig.output, scale, fmt))
+            try:
+                figure = build(fig)
+                registry.write_bytes(path, section.encode(figure, fmt, scale))
+            finally:
+                plt.close('all')
+            paths.append(path)
+    return paths
+
+
+def export(patterns=(), formats=('png', 'svg', 'pdf'), scales=(1,), out_dir=EXPORT_DIR):
+    """パターンに一致する図を書き出し、{図の id: [パス]} を返す（書き出せない形式なら ValueError）"""
+    registry.check_formats(formats)
+    os.makedirs(out_dir, exist_ok=True)
+    return {fig.id: export_figure(fig, formats, scales, out_dir) for fig in load(patterns)}
+
+
+def bench(patterns=(), formats=('png', 'svg', 'pdf'), scales=(1,), repeat=3):
+    """{図の id: {'single': 秒, 'rerun': 秒}}（それぞれ repeat 回の中央値）を返す"""
+    registry.check_formats(formats)
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for fig in load(patterns):
+            times = {'single': [], 'rerun': []}
+            for _ in range(repeat):
+                for mode, func in (('single', export_figure), ('rerun', rerun_figure)):
+                    start = time.perf_counter()
+                    func(fig, formats, scales, out_dir)
+                    times[mode].append(time.perf_counter() - start)
+            results[fig.id] = {mode: statistics.median(values) for mode, values in times.items()}
+    return results
+
+
+def report_bench(results):
+    print(f"{'figure':<40}{'single':>10}{'rerun':>10}{'speedup':>9}")
+    for fig_id, row in results.items():
+        print(f"{fig_id:<40}{row['single'] * 1000:>8.1f}ms{row['rerun'] * 1000:>8.1f}ms"
+              f"{row['rerun'] / row['single']:>8.2f}x")
+    single = sum(row['single'] for row in results.values())
+    rerun = sum(row['rerun'] for row in results.values())
+    print(f"{'TOTAL':<40}{single * 1000:>8.1f}ms{rerun * 1000:>8.1f}ms{rerun / single:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CH7 の図を 1 回だけ描いて複数の形式で書き出す')
+    parser.add_argument('patterns', nargs='*',
+                        help="書き出す図のパターン（例: 'Section5/app_*'）。省略すると全図")
+    parser.add_argument('--formats', nargs='+', default=['png', 'svg', 'pdf'], choices=registry.ALL_FORMATS,
+                        help='書き出す形式（既定: png svg pdf）')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1],
+                        help='ラスター形式の解像度の倍率（既定: 1。ベクター形式は 1x だけ）')
+    parser.add_argument('--out', default=EXPORT_DIR,
+                        help='書き出し先のディレクトリ（既定: .figkit/export）')
+    parser.add_argument('--bench', action='store_true',
+                        help='書き出さずに、形式ごとに描き直す場合との時間を比べる')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='--bench で 1 つの図を測る回数（中央値を使う。既定: 3）')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.bench:
+            results = bench(args.patterns, args.formats, args.scales, args.repeat)
+        else:
+            results = export(args.patterns, args.formats, args.scales, args.out)
+    except ValueError as e:
+        parser.error(str(e))
+    if not results:
+        print("No figures matched.", file=sys.stderr)
+        return 1
+
+    if args.bench:
+        report_bench(results)
+        return 0
+    for fig_id, paths in results.items():
+        sizes = ', '.join(f"{os.path.basename(path)} {os.path.getsize(path) / 1024:.0f}KB" for path in paths)
+        print(f"Exported: {fig_id} ({sizes})")
+    print(f"{len(results)} figure(s) -> {args.out}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+docs/ の Markdown ページと画像、画像を生成する図の関数（@figure）の依存関係を調べる
+
+    python -m figkit.graph                            # 孤立した画像・存在しない画像への参照などを表示
+    python -m figkit.graph --page 'CH7-*/Section5-*/*.md'  # ページが依存する図
+    python -m figkit.graph --json                     # 依存関係と検査結果を JSON で出力
+    python -m figkit.build --changed-pages            # 前回から内容が変わったページの図だけを生成
+
+依存関係は次の形をしている:
+
+    ページ（.md） --参照--> 画像ファイル <--生成-- 図の関数（generate_images.py の @figure）
+
+ページの参照は discover.page_images() と同じ規則（![...](...) と <img src="...">）で読み、
+画像のパスから、その画像（解像度・形式違いも含む）を書き出す図の関数を引く。
+ページは内容の SHA-256 と参照している画像の一覧を .figkit/graph.json に保存しておき、
+--changed-pages では内容が変わったページ（増えたページ・消えたページも含む）が、変更の前と後に
+参照していた図だけを生成の対象にする。保存したグラフがないときはすべてのページを変わったものとみなす。
+
+検査する内容:
+  orphaned   : どのページからも参照されていない画像ファイル（参照されている図の解像度・形式違いは除く）
+  missing    : ページが参照しているのに存在しない画像（登録されている図が書き出すものなら、その図の id も出す）
+  unused     : どのページからも参照されていない図の関数
+missing があると終了コード 1 を返すので、CI でリンク切れを止められる。
+"""
+
+import argparse
+import collections
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+
+from . import cache, discover
+
+DOCS_DIR = os.path.dirname(discover.CHAPTER_DIR)
+GRAPH_PATH = os.path.join(cache.STATE_DIR, 'graph.json')
+
+# 孤立した画像として扱う拡張子
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.avif', '.pdf')
+
+# グラフの形式を変えたら上げる
+GRAPH_VERSION = 1
+
+# scan() の結果（パスはすべて docs/ からの相対パスで、区切りは '/'）
+#   pages   : {ページ: {'sha256': 内容のハッシュ, 'images': [参照している画像]}}
+#   images  : ディスク上の画像ファイルのリスト
+#   figures : {画像: 図の id}（図の output と、その解像度・形式違いのファイル名）
+Graph = collections.namedtuple('Graph', ['pages', 'images', 'figures'])
+
+# check() の結果
+#   orphaned : [画像]
+#   missing  : [(ページ, 画像, 図の id または None)]
+#   unused   : [図の id]
+Report = collections.namedtuple('Report', ['orphaned', 'missing', 'unused'])
+
+
+def _relative(path, docs_dir=DOCS_DIR):
+    return os.path.relpath(path, docs_dir).replace(os.sep, '/')
+
+
+def _walk(docs_dir, extensions):
+    """docs_dir 以下（隠しディレクトリは除く）で拡張子が一致するファイルの絶対パス"""
+    paths = []
+    for root, dirs, names in os.walk(docs_dir):
+        dirs[:] = sorted(name for name in dirs if not name.startswith('.'))
+        paths.extend(os.path.join(root, name) for name in sorted(names)
+                     if os.path.splitext(name)[1].lower() in extensions)
+    return paths
+
+
+def _sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _variant_stem(name):
+    """'x@2x.webp' -> 'x'（解像度・形式違いのファイル名から図の名前の部分を取り出す）"""
+    stem = os.path.splitext(name)[0]
+    head, sep, scale = stem.rpartition('@')
+    if sep and scale.endswith('x'):
+        try:
+            float(scale[:-1])
+            return head
+        except ValueError:
+            pass
+    return stem
+
+
+def figure_images(scanned, docs_dir=DOCS_DIR):
+    """{画像: 図の id}（全形式・1x の output と、@figure の formats で足した形式）"""
+    from . import registry
+
+    figures = {}
+    for script, funcs in scanned.items():
+        for func in funcs:
+            path = discover.output_path(script, func)
+            names = discover.variant_outputs(func.output, (1,),
+                                             discover.variant_formats(registry.ALL_FORMATS, func.formats))
+            for name in [func.output] + names:
+                figures[_relative(os.path.join(os.path.dirname(path), name), docs_dir)] = func.id
+    return figures
+
+
+def scan(scanned=None, docs_dir=DOCS_DIR):
+    """docs_dir 以下のページ・画像と登録されている図から Graph を作る（図は import しない）"""
+    if scanned is None:
+        scanned = {script: discover.scan_script(script) for script in discover.find_scripts()}
+    pages = {}
+    for page in _walk(docs_dir, ('.md',)):
+        images = sorted(_relative(path, docs_dir) for path in discover.page_images(page))
+        pages[_relative(page, docs_dir)] = {'sha256': _sha256(page), 'images': images}
+    images = [_relative(path, docs_dir) for path in _walk(docs_dir, IMAGE_EXTENSIONS)]
+    return Graph(pages, images, figure_images(scanned, docs_dir))
+
+
+def check(graph):
+    """孤立した画像・存在しない画像への参照・参照されていない図を調べて Report を返す"""
+    referenced = {image for page in graph.pages.values() for image in page['images']}
+    used = {graph.figures[image] for image in referenced if image in graph.figures}
+    on_disk = set(graph.images)
+
+    # 参照されている画像と同じ名前の解像度・形式違い（x@2x.png, x.webp など）は使われているものとみなす
+    referenced_stems = {(os.path.dirname(image), _variant_stem(os.path.basename(image)))
+                        for image in referenced}
+    orphaned = [image for image in graph.images
+                if image not in referenced
+                and graph.figures.get(image) not in used
+                and (os.path.dirname(image), _variant_stem(os.path.basename(image))) not in referenced_stems]
+    missing = [(page, image, graph.figures.get(image))
+               for page, entry in graph.pages.items() for image in entry['images']
+               if image not in on_disk]
+    unused = sorted(set(graph.figures.values()) - used)
+    return Report(orphaned, missing, unused)
+
+
+def figures_of(graph, pages):
+    """ページ（docs/ からの相対パス）が参照している図の id の集合"""
+    return {graph.figures[image] for page in pages if page in graph.pages
+            for image in graph.pages[page]['images'] if image in graph.figures}
+
+
+def changed_pages(old, new):
+    """old（保存したグラフの pages。なければ None）から内容が変わった・増えた・消えたページ"""
+    if old is None:
+        return sorted(new)
+    return sorted(page for page in set(old) | set(new)
+                  if page not in old or page not in new or old[page]['sha256'] != new[page]['sha256'])
+
+
+def changed_figures(old, graph):
+    """変わったページが変更の前と後に参照していた図の id の集合"""
+    pages = changed_pages(old, graph.pages)
+    selected = figures_of(graph, pages)
+    if old is not None:
+        selected |= {graph.figures[image] for page in pages if page in old
+                     for image in old[page]['images'] if image in graph.figures}
+    return selected
+
+
+def load_graph(path=GRAPH_PATH):
+    """保存したページの {ページ: {'sha256', 'images'}}。ない・形式が違うときは None"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != GRAPH_VERSION:
+        return None
+    return data.get('pages')
+
+
+def save_graph(graph, path=GRAPH_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': GRAPH_VERSION, 'pages': graph.pages}, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def report(graph, result, pages=()):
+    if pages:
+        for page in pages:
+            print(f"{page}")
+            for image in graph.pages[page]['images']:
+                print(f"  {image:<70}{graph.figures.get(image, '-')}")
+        return
+
+    print(f"{len(graph.pages)} page(s), {len(graph.images)} image file(s), "
+          f"{len(set(graph.figures.values()))} registered figure(s)")
+    print(f"\nOrphaned images ({len(result.orphaned)}):")
+    for image in result.orphaned:
+        print(f"  {image}")
+    print(f"\nMissing images ({len(result.missing)}):")
+    for page, image, fig_id in result.missing:
+        hint = f"  (built by {fig_id})" if fig_id else ''
+        print(f"  {page} -> {image}{hint}")
+    print(f"\nUnreferenced figures ({len(result.unused)}):")
+    for fig_id in result.unused:
+        print(f"  {fig_id}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='docs/ のページと画像・図の依存関係を調べる')
+    parser.add_argument('--page', action='append', default=[],
+                        help="このページ（docs/ からの相対パス。fnmatch 形式）が参照している画像と図を表示する")
+    parser.add_argument('--json', action='store_true',
+                        help='依存関係と検査結果を JSON で出力する')
+    parser.add_argument('--save', action='store_true',
+                        help='現在のページの状態を .figkit/graph.json に保存する（--changed-pages の基準）')
+    args = parser.parse_args(argv)
+
+    graph = scan()
+    result = check(graph)
+    pages = sorted(page for page in graph.pages
+                   if any(fnmatch.fnmatchcase(page, pattern) for pattern in args.page))
+    if args.page and not pages:
+        print("No pages matched.", file=sys.stderr)
+        return 1
+
+    if args.json:
+        data = {
+            'pages': {page: graph.pages[page]['images'] for page in (pages or graph.pages)},
+            'figures': graph.figures,
+            'orphaned': result.orphaned,
+            'missing': [{'page': page, 'image': image, 'figure': fig_id}
+                        for page, image, fig_id in result.missing],
+            'unused': result.unused,
+        }
+        json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        report(graph, result, pages)
+    if args.save:
+        save_graph(graph)
+    return 1 if result.missing and not pages else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
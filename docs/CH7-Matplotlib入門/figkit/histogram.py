@@ -0,0 +1,80 @@
+"""
+重ねて描くヒストグラムを、共通のビンで数えてから描く
+
+    from figkit import histogram
+
+    edges, (a, b) = histogram.accumulate([class_a, class_b], bins=15)
+    histogram.draw(ax, edges, a, alpha=0.5, label='Class A', color='blue')   # ax.hist(class_a, ...) の代わり
+    histogram.draw(ax, edges, b, alpha=0.5, label='Class B', color='red')
+
+ax.hist を系列ごとに呼ぶと、ビンの境界は系列ごとの最小値・最大値から決まるので、重ねた棒の位置がずれる。
+accumulate() は全系列の範囲から境界を 1 回だけ決め、各系列を CHUNK 件ずつ np.histogram で数えて足し合わせる。
+draw() は数えた結果を ax.hist(..., weights=counts) で描くので、棒の見た目（色・alpha・label など）は ax.hist と同じ。
+
+系列には配列のほか、配列を順に返すイテレータ（ジェネレータ）を渡せる。全体をメモリに載せずに数えられるが、
+イテレータは 1 回しか読めないので、span=(最小, 最大) で範囲を指定するか、呼ぶたびに最初から
+イテレータを返す関数を渡す（範囲を求めるときと数えるときの 2 回読む）。
+"""
+
+import math
+
+# 1 回の np.histogram に渡す件数（配列を分けて数えるときの大きさ）
+CHUNK = 1000000
+
+
+def chunks(source):
+    """系列を配列の塊に分けて順に返す（関数なら呼んだ結果、イテレータならそのまま）"""
+    import numpy as np
+
+    if callable(source):
+        source = source()
+    if hasattr(source, '__next__'):
+        for chunk in source:
+            yield np.asarray(chunk, dtype=float).ravel()
+        return
+    values = np.asarray(source, dtype=float).ravel()
+    for start in range(0, len(values), CHUNK):
+        yield values[start:start + CHUNK]
+
+
+def span_of(sources):
+    """全系列を合わせた (最小値, 最大値)。np.histogram と同じく、幅が 0 なら前後に 0.5 ずつ広げる"""
+    low, high = math.inf, -math.inf
+    for source in sources:
+        for chunk in chunks(source):
+            if len(chunk):
+                low, high = min(low, float(chunk.min())), max(high, float(chunk.max()))
+    if low > high:
+        low, high = 0.0, 1.0
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return low, high
+
+
+def accumulate(sources, bins=10, span=None):
+    """
+    全系列に共通のビンで度数を数える
+
+    (edges, counts) を返す。edges は bins + 1 個の境界、counts は系列ごとの度数の配列のリスト。
+    span を省略すると全系列の最小値・最大値を範囲にする（範囲の外の値は数えない）。
+    範囲を求めるとイテレータを読み切ってしまうので、イテレータの系列があるときは span が必要（なければ ValueError）。
+    """
+    import numpy as np
+
+    if span is None and any(hasattr(source, '__next__') for source in sources):
+        raise ValueError("イテレータの系列は 1 回しか読めないので、span=(最小, 最大) を指定するか、"
+                         "イテレータを返す関数を渡してください")
+    span = span or span_of(sources)
+    counts = []
+    for source in sources:
+        total = np.zeros(bins, dtype=np.int64)
+        for chunk in chunks(source):
+            # 整数の bins と range を渡すと、np.histogram は等幅のビンを並べ替えずに数える
+            total += np.histogram(chunk, bins=bins, range=span)[0]
+        counts.append(total)
+    return np.linspace(span[0], span[1], bins + 1), counts
+
+
+def draw(ax, edges, counts, **kwargs):
+    """数えた度数を ax.hist と同じ棒で描く（ax.hist と同じ値を返す）"""
+    return ax.hist(edges[:-1], bins=edges, weights=counts, **kwargs)
@@ -0,0 +1,132 @@
+"""
+各スクリプトの import 時間を測り、モジュール読み込み時と図ごとに振り分けて表示する
+
+    python -m figkit.importprof                   # 全 Section
+    python -m figkit.importprof 'Section5/*'      # 一致する図だけ
+    python -m figkit.importprof --first           # Section ごとに最初の 1 枚だけ
+
+Section ごとに新しいプロセスを `python -X importtime` で起動し、
+スクリプトの読み込みと図の生成の合間に目印を出力させて、出力された import を
+  startup : インタプリタと figkit の起動
+  module  : スクリプトの読み込み（先頭の import 文）
+  図の id : その図を描いている間に初めて読み込まれたもの（関数内の import、lazy.module など）
+に振り分ける。最初の図を描き終えるまでの時間（time to first figure）も表示する。
+画像は一時ディレクトリに書き出すので、images/ には影響しない。
+"""
+
+import argparse
+import collections
+import contextlib
+import io
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from . import discover, registry
+
+MARK = 'figkit-importprof:'
+
+# import time:       self [us] |  cumulative | imported package
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+# 1 つの区間で表示する重い import の数
+TOP_IMPORTS = 3
+
+
+def _mark(label):
+    sys.stderr.write(f"{MARK} {label} {time.time():.6f}\n")
+    sys.stderr.flush()
+
+
+def child(script, patterns):
+    """-X importtime で起動された子プロセス側：読み込みと生成の合間に目印を出す"""
+    _mark('module')
+    discover.load_module(script)
+    section = registry.SECTIONS[discover.section_name(script)]
+    with tempfile.TemporaryDirectory() as out_dir:
+        section.output_dir = out_dir
+        for fig in section.figures(patterns):
+            _mark(fig.id)
+            with contextlib.redirect_stdout(io.StringIO()):
+                fig.func()
+        _mark('end')
+
+
+def profile(script, patterns):
+    """
+    子プロセスを 1 つ起動して、区間ごとの import 時間を返す
+
+    戻り値は (time to first figure の秒, [(区間, import の合計秒, [(モジュール, 秒), ...]), ...])
+    """
+    command = [sys.executable, '-X', 'importtime', '-m', 'figkit.importprof', '--child', script]
+    start = time.time()
+    proc = subprocess.run(command + list(patterns), cwd=discover.CHAPTER_DIR,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          text=True, encoding='utf-8')
+    if proc.returncode != 0:
+        raise RuntimeError(f"profiling {script} failed:\n{proc.stderr[-2000:]}")
+
+    sections = collections.OrderedDict([('startup', [])])
+    times = []
+    label = 'startup'
+    for line in proc.stderr.splitlines():
+        if line.startswith(MARK):
+            label, stamp = line[len(MARK):].split()
+            times.append(float(stamp))
+            sections.setdefault(label, [])
+            continue
+        match = IMPORT_LINE.match(line)
+        # 入れ子の import は親の cumulative に含まれるので、いちばん外側だけを数える
+        if match and not match.group(3):
+            sections[label].append((match.group(4), int(match.group(2)) / 1e6))
+    sections.pop('end', None)
+
+    # 目印は module, 図1, 図2, ..., end の順なので、3 つ目が最初の図を描き終えた時刻
+    first_figure = times[2] - start if len(times) > 2 else None
+    result = []
+    for label, imports in sections.items():
+        imports.sort(key=lambda item: -item[1])
+        result.append((label, sum(seconds for _, seconds in imports), imports))
+    return first_figure, result
+
+
+def report(script, first_figure, result):
+    name = discover.section_name(script)
+    if first_figure is not None:
+        print(f"{name}: time to first figure {first_figure * 1000:.1f} ms")
+    for label, total, imports in result:
+        # 何も読み込まなかった図は省く
+        if not imports and label not in ('startup', 'module'):
+            continue
+        heavy = ', '.join(f"{module} {seconds * 1000:.1f}" for module, seconds in imports[:TOP_IMPORTS])
+        print(f"  {label:<36}{total * 1000:9.1f} ms  {heavy}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CH7 のスクリプトの import 時間を図ごとに集計する')
+    parser.add_argument('patterns', nargs='*', help="対象の図のパターン（例: 'Section5/*'）")
+    parser.add_argument('--first', action='store_true',
+                        help='Section ごとに、一致した最初の図 1 枚だけを生成して測る')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child, args.patterns)
+        return 0
+
+    for script in discover.find_scripts():
+        funcs = [func for func in discover.scan_script(script)
+                 if discover.matches(func.id, args.patterns)]
+        if not funcs:
+            continue
+        patterns = [funcs[0].id] if args.first else [func.id for func in funcs]
+        first_figure, result = profile(script, patterns)
+        report(script, first_figure, result)
+    print("(ms; import times are cumulative per top-level import, from -X importtime)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+重いモジュールを、実際に使われるまで import しないための小さな仕組み
+
+    pd = lazy.module('pandas')
+    inset_axes = lazy.attribute('mpl_toolkits.axes_grid1.inset_locator', 'inset_axes')
+
+どちらもスクリプトの先頭に書いておけば、そのモジュールを使う図を描くときに初めて読み込まれる。
+1 枚だけ生成するときに、関係のない図のための import 時間を払わずに済む。
+
+matplotlib.pyplot はすべての図で使い、numpy と matplotlib.gridspec は pyplot が読み込むので、
+これらを遅延させても速くはならない（python -m figkit.importprof で確認できる）。
+"""
+
+import importlib
+
+
+class LazyModule:
+    """属性に初めてアクセスしたときにモジュールを import する代理オブジェクト"""
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def module(name):
+    """import name の代わりに使う（例: pd = lazy.module('pandas')）"""
+    return LazyModule(name)
+
+
+def attribute(module_name, attr):
+    """from module_name import attr の代わりに使う（関数・クラスを呼んだときに読み込む）"""
+    lazy = LazyModule(module_name)
+
+    def load(*args, **kwargs):
+        return getattr(lazy, attr)(*args, **kwargs)
+
+    load.__name__ = load.__qualname__ = attr
+    load.__doc__ = f"{module_name}.{attr} を初めて呼んだときに読み込む"
+    return load
@@ -0,0 +1,123 @@
+"""
+mkdocs build / mkdocs serve のときに、ページが参照している CH7 の図だけを生成する MkDocs フック
+
+mkdocs.yml で次のように読み込む（MkDocs 1.4 以降）:
+
+    hooks:
+      - docs/CH7-Matplotlib入門/figkit/mkdocs_hook.py
+
+ビルドに含まれる CH7 のページ（Markdown）が参照している画像のうち、@figure で登録されている図を集め、
+figkit.build と同じキャッシュ（.figkit/manifest.json）で古くなった図だけを描き直す。
+関数のソースが変わっていない図は何もしないので、2 回目以降のビルドではほとんど時間がかからない。
+mkdocs serve で generate_images.py を編集すると、再ビルドのたびにこの判定が行われ、編集した関数の図だけが
+描き直される（書き出した画像の変更で再ビルドがもう 1 回走るが、そのときは何も描き直さない）。
+参照されている図の生成に失敗したときは、古い画像のままサイトを作らないように PluginError でビルドを止める。
+
+環境変数:
+  FIGKIT_MKDOCS=0   : 図を生成しない（コミット済みの画像をそのまま使う）
+  FIGKIT_JOBS=N     : 描き直す図が複数あるときのワーカープロセス数（既定: CPU コア数）
+  FIGKIT_BUILD_ARGS : figkit.build の書き出し・最適化のオプション（例: '--scales 1 2 --formats png webp --optimize'）。
+                      python -m figkit.build と同じオプションにすると、同じキャッシュがそのまま使われる
+matplotlib が入っていない環境では警告を出して生成を飛ばす。
+"""
+
+import logging
+import os
+import shlex
+import sys
+import time
+
+# フックはファイルのパスで読み込まれるので、CH7 ディレクトリから figkit を import できるようにする
+CHAPTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CHAPTER_DIR not in sys.path:
+    sys.path.insert(0, CHAPTER_DIR)
+
+from figkit import build, cache, discover  # noqa: E402
+
+log = logging.getLogger('mkdocs.hooks.figkit')
+
+
+def _enabled():
+    return os.environ.get('FIGKIT_MKDOCS', '1') != '0'
+
+
+def chapter_pages(files):
+    """ビルドに含まれる CH7 の Markdown ページの絶対パス"""
+    chapter = os.path.normcase(os.path.abspath(CHAPTER_DIR)) + os.sep
+    return [file.abs_src_path for file in files.documentation_pages()
+            if os.path.normcase(os.path.abspath(file.abs_src_path)).startswith(chapter)]
+
+
+def referenced_figures(scanned, pages):
+    """ページが参照している画像のうち、@figure で登録されている図の id の集合"""
+    return build.select(scanned, pages=pages) if pages else set()
+
+
+def build_config():
+    """FIGKIT_BUILD_ARGS のオプションの build.Config"""
+    return build.configure(build.parse_output_args(shlex.split(os.environ.get('FIGKIT_BUILD_ARGS', ''))))
+
+
+def render_referenced(pages, jobs=None, config=None):
+    """
+    pages が参照している図のうち古くなったものを描き直し、描き直した図の画像のパス（解像度・形式違いも含む）を返す
+
+    config（build.Config）を省略すると FIGKIT_BUILD_ARGS のオプションを使う。
+    失敗した図があれば、すべての図のエラーをログに出したあと PluginError を送出する。
+    """
+    from mkdocs.exceptions import PluginError
+
+    start = time.perf_counter()
+    config = config or build_config()
+    scanned = {script: discover.scan_script(script) for script in discover.find_scripts()}
+    selected = referenced_figures(scanned, pages)
+    manifest = cache.load_manifest()
+    units, keys = build.plan(scanned, manifest, selected, options=config.options)
+    if not units:
+        log.info(f"figkit: {len(selected)} referenced figure(s) up to date")
+        return []
+
+    jobs = min(jobs or int(os.environ.get('FIGKIT_JOBS') or os.cpu_count() or 1), len(units))
+    by_name = build.collect(units, build.run_units(units, jobs, config.variants, config.layout))
+    build.finish(manifest, scanned, keys, by_name, config, jobs)
+
+    paths = []
+    failed = 0
+    for script, funcs in scanned.items():
+        for func in funcs:
+            result = by_name.get((script, func.name))
+            if result is None:
+                continue
+            if result[2]:
+                failed += 1
+                log.error(f"figkit: {func.id} failed:\n{result[2]}")
+                continue
+            path = discover.output_path(script, func)
+            paths.append(path)
+            paths.extend(os.path.join(os.path.dirname(path), name)
+                         for name in build.variant_outputs(func, config.variants))
+    if failed:
+        raise PluginError(f"figkit: {failed} referenced CH7 figure(s) failed to render")
+    log.info(f"figkit: {len(by_name)} figure(s) rendered, "
+             f"{len(selected) - len(by_name)} up to date in {time.perf_counter() - start:.2f}s")
+    return paths
+
+
+def on_files(files, config):
+    """ページの一覧が決まったところで図を生成し、新しく作られた画像をサイトのファイルに加える"""
+    if not _enabled():
+        return files
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        log.warning("figkit: matplotlib is not installed; using the committed CH7 images")
+        return files
+
+    from mkdocs.structure.files import File
+
+    docs_dir = config['docs_dir']
+    for path in render_referenced(chapter_pages(files)):
+        src_uri = os.path.relpath(path, docs_dir).replace(os.sep, '/')
+        if files.get_file_from_path(src_uri) is None:
+            files.append(File(src_uri, docs_dir, config['site_dir'], config['use_directory_urls']))
+    return files
@@ -0,0 +1,189 @@
+"""
+savefig の後に PNG を小さくする最適化ステージ
+
+    python -m figkit.optimize                     # 全 Section の images/ を最適化
+    python -m figkit.optimize site/               # mkdocs build の出力など、任意のファイル・ディレクトリ
+    python -m figkit.optimize --lossless          # 画素を 1 つも変えない変換だけにする
+
+ビルドと同時に行うときは python -m figkit.build --optimize を使う。
+
+1 枚ごとに次の候補を作り、いちばん小さいものを採用する（元より小さいときだけ書き換える）:
+  - 不透明なのに RGBA で保存されているものは RGB に、色がすべて灰色なら L（グレースケール）にする
+  - 使っている色が 256 色以下なら、その色だけのパレット（P）にする（画素は変わらない）
+  - 256 色を超えていても、256 色のパレットに減色したときの PSNR が MIN_PSNR 以上ならパレットにする
+    （アンチエイリアスの中間色が少し変わるだけで、見た目は変わらない。--lossless で無効）
+  - zlib の最大圧縮とフィルタの総当たり（Pillow の optimize=True）で圧縮し直す
+Software・dpi などのメタデータは書き出さない。
+結果の表示のモードは採用した形式で、P~ は減色したパレットを表す。
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from . import discover
+
+# 減色したパレットを採用する画質の下限（dB）。50 dB 以上なら画面上で違いは見えない
+MIN_PSNR = 50.0
+
+
+def _encode(image, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', optimize=True, **params)
+    return buffer.getvalue()
+
+
+def _normalize(image):
+    """画素を変えずに、不要なアルファチャンネルと色チャンネルを落とす"""
+    import numpy as np
+
+    if image.mode not in ('RGB', 'RGBA'):
+        return image
+    pixels = np.asarray(image)
+    if image.mode == 'RGBA' and (pixels[..., 3] == 255).all():
+        image = image.convert('RGB')
+        pixels = pixels[..., :3]
+    if image.mode == 'RGB' and (pixels[..., 0] == pixels[..., 1]).all() \
+            and (pixels[..., 1] == pixels[..., 2]).all():
+        image = image.convert('L')
+    return image
+
+
+def _exact_palette(image):
+    """256 色以下の画像を、画素を変えずにパレット画像にする（256 色を超えるときは None）"""
+    import numpy as np
+    from PIL import Image
+
+    if image.mode not in ('RGB', 'RGBA') or image.getcolors(256) is None:
+        return None, {}
+    pixels = np.asarray(image.convert('RGBA'))
+    packed = pixels.view(np.uint32).reshape(pixels.shape[:2])
+    colors, index = np.unique(packed, return_inverse=True)
+    rgba = colors.view(np.uint8).reshape(-1, 4)
+
+    palette_image = Image.fromarray(index.reshape(packed.shape).astype(np.uint8), 'P')
+    palette_image.putpalette(rgba[:, :3].tobytes())
+    params = {}
+    if image.mode == 'RGBA':
+        params['transparency'] = rgba[:, 3].tobytes()
+    return palette_image, params
+
+
+def _psnr(a, b):
+    import numpy as np
+
+    diff = np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)
+    mse = (diff ** 2).mean()
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def _quantized_palette(image, min_psnr):
+    """256 色に減色してもほとんど変わらない RGB 画像をパレット画像にする（変わるなら None）"""
+    from PIL import Image
+
+    if image.mode != 'RGB':
+        return None
+    quantized = image.quantize(256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    if _psnr(image, quantized.convert('RGB')) < min_psnr:
+        return None
+    return quantized
+
+
+def optimize_png(path, lossless=False, min_psnr=MIN_PSNR):
+    """
+    PNG を 1 枚最適化して上書きし、(パス, 元のバイト数, 最適化後のバイト数, モード) を返す
+
+    元より小さくならなかったときは書き換えず、最適化後のバイト数は元と同じになる。
+    """
+    from PIL import Image
+
+    before = os.path.getsize(path)
+    with Image.open(path) as original:
+        original.load()
+    image = _normalize(original)
+
+    candidates = [(_encode(image), image.mode)]
+    palette_image, params = _exact_palette(image)
+    if palette_image is not None:
+        candidates.append((_encode(palette_image, **params), 'P'))
+    elif not lossless:
+        quantized = _quantized_palette(image, min_psnr)
+        if quantized is not None:
+            candidates.append((_encode(quantized), 'P~'))
+
+    data, mode = min(candidates, key=lambda candidate: len(candidate[0]))
+    if len(data) >= before:
+        return path, before, before, original.mode
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path, before, len(data), mode
+
+
+def _optimize_args(args):
+    return optimize_png(*args)
+
+
+def optimize_files(paths, jobs=1, lossless=False, min_psnr=MIN_PSNR):
+    """複数の PNG を最適化し、パスと同じ順番で結果を返す"""
+    tasks = [(path, lossless, min_psnr) for path in paths]
+    if jobs <= 1 or len(tasks) <= 1:
+        return [optimize_png(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(_optimize_args, tasks))
+
+
+def _kb(size):
+    return f"{size / 1024:.1f} KB"
+
+
+def report(results, root=discover.CHAPTER_DIR):
+    """画像ごとと合計の削減量を表示する"""
+    for path, before, after, mode in results:
+        saving = (before - after) / before * 100 if before else 0.0
+        print(f"Optimized: {os.path.relpath(path, root)} {_kb(before)} -> {_kb(after)} "
+              f"(-{saving:.1f}%, {mode})")
+    total_before = sum(result[1] for result in results)
+    total_after = sum(result[2] for result in results)
+    if total_before:
+        print(f"PNG total: {_kb(total_before)} -> {_kb(total_after)} "
+              f"(-{(total_before - total_after) / total_before * 100:.1f}%) in {len(results)} image(s)")
+
+
+def find_pngs(targets):
+    """ファイルとディレクトリ（再帰的に探す）から PNG のパスを集める"""
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            paths.extend(sorted(glob.glob(os.path.join(target, '**', '*.png'), recursive=True)))
+        else:
+            paths.append(target)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='PNG を可逆圧縮・メタデータ削除・パレット化で小さくする')
+    parser.add_argument('targets', nargs='*',
+                        help='PNG ファイルかディレクトリ（既定: 全 Section の images/）')
+    parser.add_argument('--lossless', action='store_true',
+                        help='画素を変える減色を行わない')
+    parser.add_argument('--min-psnr', type=float, default=MIN_PSNR,
+                        help=f'減色を採用する PSNR の下限（既定: {MIN_PSNR:g} dB）')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='並列に処理するプロセス数（既定: CPU コア数）')
+    args = parser.parse_args(argv)
+
+    targets = args.targets or [os.path.join(os.path.dirname(script), 'images')
+                               for script in discover.find_scripts()]
+    paths = find_pngs(targets)
+    results = optimize_files(paths, args.jobs, args.lossless, args.min_psnr)
+    report(results, root=os.getcwd())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
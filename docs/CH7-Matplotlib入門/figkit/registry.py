@@ -0,0 +1,421 @@
+"""
+図を生成する関数を登録するデコレータと、全 Section 共通のレジストリ
+
+各 generate_images.py では次のように使う:
+
+    section = registry.Section(__file__, dpi=150)
+    figure = section.figure
+
+    @figure('tech_plot_basic.png')
+    def generate_tech_plot_basic():
+        plt.figure(figsize=(8, 5))
+        plt.plot(x, y)
+
+関数は図を描くところまでを担当し、レイアウトの調整・保存（savefig）・close・"Generated: ..." の表示は
+デコレータが行う。保存パラメータは Section(...) に渡したものが全図に使われる。
+
+レイアウトは configure(layout=...) で全図まとめて切り替える:
+  'tight'       : 関数の後で tight_layout() を呼び、adjust があれば続けて subplots_adjust(**adjust) を呼ぶ
+  'constrained' : 図を作るときから constrained layout を使い、保存の前に 1 回だけレイアウトを計算して固定する
+                  （suptitle の余白も自動で確保されるので adjust は使わず、suptitle の y も無視する）
+レイアウトを調整しない図は @figure('x.png', layout=False) とする。
+
+関数を呼ぶ前に、figkit.datagen と random・numpy.random を図の名前から決まる種で初期化する（seed_figure）。
+どの図が先に実行されたかに関係なく同じデータになるので、1 枚だけ・並列に生成しても
+全体を直列実行したときと同じ PNG になる。Software などの PNG のメタデータも固定している。
+
+configure() で解像度（1x / 2x など）と形式（PNG / WebP / AVIF / SVG / PDF）を増やすと、関数を 1 回だけ実行し、
+解像度ごとに 1 回描画したバッファから各形式を書き出す（srcset 用。名前は discover.variant_name を参照）。
+SVG / PDF は同じ Figure をベクター形式で描き直す（解像度違いは作らない）。図ごとに常に書き出す形式は
+@figure('x.png', formats=('svg', 'pdf')) のように指定する。書き出しの詳細は Section.export() を参照。
+
+登録内容（ファイル名・Section・カテゴリ）は figkit.discover が ast で静的に読めるので、
+ビルド側は matplotlib もスクリプトも import せずに対象の図を絞り込める。
+"""
+
+import collections
+import contextlib
+import functools
+import hashlib
+import io
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from . import datagen, discover
+
+# 登録された図 1 つ分の情報
+#   id       : 'Section3/app_sales_dashboard' のような図の名前
+#   category : 'tech'（技術説明）/ 'exercise'（演習）/ 'app'（応用問題）
+#   func     : 描画から保存までを行う関数（デコレータで包んだもの）
+#   draw     : 図を描くだけの元の関数（レイアウトの調整と保存はしない）
+#   layout   : レイアウトを調整するか（False なら調整しない）
+#   adjust   : 'tight' のときに tight_layout() の後で subplots_adjust() に渡す引数
+Figure = collections.namedtuple('Figure', ['id', 'section', 'name', 'output', 'category', 'func',
+                                           'script', 'draw', 'layout', 'adjust'])
+
+# 全 Section の図（登録順）
+FIGURES = {}
+
+# Section 名 -> Section
+SECTIONS = {}
+
+# 図を描いている最中の Section（render_dpi() が保存パラメータを参照するため）
+_active = None
+
+# 1 回の描画から書き出す解像度（保存パラメータの dpi に対する倍率）と形式
+SCALES = (1,)
+FORMATS = ('png',)
+
+# レイアウトの計算方法（'tight' または 'constrained'）
+LAYOUTS = ('tight', 'constrained')
+LAYOUT = 'tight'
+
+# PNG 以外の形式を Pillow で書き出すときの設定（グラフは文字が多いので WebP は可逆にする）
+ENCODE_PARAMS = {
+    'webp': {'lossless': True, 'method': 6},
+    'avif': {'quality': 75, 'speed': 8},
+}
+
+# 書き出せる形式（PNG、PNG から Pillow で変換する形式、savefig で描くベクター形式）
+ALL_FORMATS = ('png',) + tuple(ENCODE_PARAMS) + discover.VECTOR_FORMATS
+
+# ベクター形式では、これより点（頂点）の多い線・コレクションと、これより棒の多い Axes の棒を
+# ラスター画像として埋め込む（1 点ずつパスを書くとファイルもビューアの描画も重くなるため）
+RASTERIZE_POINTS = 5000
+
+# PNG からの変換とファイルへの書き込みを行うスレッドの数
+ENCODE_WORKERS = min(4, os.cpu_count() or 1)
+
+_encoder = None
+_encoder_pid = None
+
+
+# 実行環境で変わるメタデータは書き出さない（matplotlib のバージョン、日時など）
+PINNED_METADATA = {
+    'png': {'Software': None},
+    'svg': {'Creator': None, 'Date': None},
+    'pdf': {'Creator': None, 'Producer': None, 'CreationDate': None},
+}
+
+
+def figure_seed(fig_id):
+    """図の名前から決まる 32 ビットの乱数の種"""
+    digest = hashlib.sha256(fig_id.encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big')
+
+
+def seed_figure(fig_id):
+    """datagen の Generator と random・numpy.random（グローバルな乱数）を図ごとの種で初期化する"""
+    import numpy as np
+
+    seed = figure_seed(fig_id)
+    datagen.seed(seed)
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def load_avif_plugin():
+    """
+    pillow-avif-plugin が入っていれば読み込む（任意の依存）
+
+    Pillow 11.3 以降は AVIF を書き出せるので不要。それより古い Pillow では、このプラグインで AVIF を書き出す。
+    """
+    try:
+        import pillow_avif  # noqa: F401
+    except ImportError:
+        pass
+
+
+def check_formats(formats):
+    """この環境で書き出せない形式があれば ValueError"""
+    from PIL import Image, features
+
+    for fmt in formats:
+        if fmt == 'png' or fmt in discover.VECTOR_FORMATS:
+            continue
+        if fmt == 'avif':
+            load_avif_plugin()
+            Image.init()
+        if fmt not in ENCODE_PARAMS or not (features.check(fmt) or (fmt == 'avif' and 'AVIF' in Image.SAVE)):
+            raise ValueError(f"この環境では {fmt} 形式で書き出せません")
+
+
+def configure(scales=(1,), formats=('png',), layout='tight'):
+    """
+    書き出す解像度と形式、レイアウトの計算方法を設定する（使えない値なら ValueError）
+
+    ページが参照している 1x の PNG は常に書き出す。
+    """
+    global SCALES, FORMATS, LAYOUT
+
+    check_formats(formats)
+    if layout not in LAYOUTS:
+        raise ValueError(f"レイアウトは {', '.join(LAYOUTS)} のどれかです: {layout}")
+    SCALES = (1,) + tuple(scale for scale in scales if scale != 1)
+    FORMATS = ('png',) + tuple(fmt for fmt in formats if fmt != 'png')
+    LAYOUT = layout
+
+
+def settings():
+    """configure() に渡せる形の現在の設定（ワーカープロセスに引き継ぐときに使う）"""
+    return {'scales': SCALES, 'formats': FORMATS, 'layout': LAYOUT}
+
+
+@contextlib.contextmanager
+def layout_context(layout=True):
+    """'constrained' のとき、この中で作られる図に constrained layout を使わせる"""
+    import matplotlib
+
+    use = bool(layout) and LAYOUT == 'constrained'
+    with matplotlib.rc_context({'figure.constrained_layout.use': use}):
+        yield
+
+
+@contextlib.contextmanager
+def drawing(section, layout=True):
+    """section の図を描いている間（layout_context() を適用し、render_dpi() が保存パラメータを使う）"""
+    global _active
+
+    previous, _active = _active, section
+    try:
+        with layout_context(layout):
+            yield
+    finally:
+        _active = previous
+
+
+def render_dpi(fig=None):
+    """
+    描いている図が最終的に描画される最大の dpi（保存パラメータの dpi × 最大の解像度の倍率）
+
+    図を描く関数の中から呼ぶと、その図の Section の保存パラメータを使う。
+    それ以外では fig（省略時は現在の図）の dpi を使う。
+    """
+    import matplotlib.pyplot as plt
+
+    fig = fig or plt.gcf()
+    dpi = _active.savefig_kwargs.get('dpi', fig.dpi) if _active is not None else fig.dpi
+    if dpi == 'figure':
+        dpi = fig.dpi
+    return dpi * max(SCALES)
+
+
+def suptitle_text(fig):
+    """fig の suptitle の Text（なければ None。suptitle の Text は fig.texts にも入っている）"""
+    text = fig.get_suptitle()
+    if not text:
+        return None
+    return next((title for title in reversed(fig.texts) if title.get_text() == text), None)
+
+
+def apply_layout(layout=True, adjust=None):
+    """
+    描き終えた現在の図のレイアウトを仕上げる
+
+    'tight' では tight_layout()（と subplots_adjust()）を適用する。
+    'constrained' では、adjust に 'top' がある図の suptitle を自動配置に戻し（その図の suptitle は
+    'tight' で top と組み合わせる y を指定しているが、y を指定すると constrained layout が suptitle の
+    余白を確保しないため）、レイアウトをここで 1 回だけ計算して固定する。固定しないと、bbox_inches='tight' の savefig は 2 回描画し、
+    2x などの解像度違いも描画するたびに計算し直すので、tight_layout より遅くなる。
+    """
+    import matplotlib.pyplot as plt
+
+    if not layout:
+        return
+    if LAYOUT == 'constrained':
+        fig = plt.gcf()
+        title = suptitle_text(fig)
+        if title is not None and adjust and 'top' in adjust:
+            # y を渡さずに suptitle() を呼び直すと自動配置に戻る（大きさと太さは既定値に戻るので渡し直す）
+            fig.suptitle(title.get_text(), fontsize=title.get_fontsize(),
+                         fontweight=title.get_fontweight())
+        engine = fig.get_layout_engine()
+        if engine is not None:
+            engine.execute(fig)
+            fig.set_layout_engine('none')
+        return
+    plt.tight_layout()
+    if adjust:
+        plt.subplots_adjust(**adjust)
+
+
+def _point_count(artist):
+    """線・コレクションの点（頂点）の数（それ以外は 0）"""
+    from matplotlib import collections as mcollections
+    from matplotlib import lines
+
+    if isinstance(artist, lines.Line2D):
+        return len(artist.get_xydata())
+    if isinstance(artist, mcollections.Collection):
+        return max(len(artist.get_offsets()), sum(len(path.vertices) for path in artist.get_paths()))
+    return 0
+
+
+@contextlib.contextmanager
+def rasterized_dense(fig, threshold=None):
+    """この中だけ、点の多い線・コレクションと棒の多い Axes の棒をラスター画像として描かせる"""
+    threshold = threshold or RASTERIZE_POINTS
+    dense = []
+    for ax in fig.axes:
+        artists = [artist for artist in list(ax.lines) + list(ax.collections)
+                   if _point_count(artist) > threshold]
+        if len(ax.patches) > threshold:
+            artists.extend(ax.patches)
+        dense.extend(artist for artist in artists if not artist.get_rasterized())
+    for artist in dense:
+        artist.set_rasterized(True)
+    try:
+        yield dense
+    finally:
+        for artist in dense:
+            artist.set_rasterized(False)
+
+
+def encoder():
+    """PNG からの変換と書き込みに使うスレッドプール（fork した子プロセスでは作り直す）"""
+    global _encoder, _encoder_pid
+
+    if _encoder is None or _encoder_pid != os.getpid():
+        _encoder = ThreadPoolExecutor(max_workers=ENCODE_WORKERS, thread_name_prefix='figkit-encode')
+        _encoder_pid = os.getpid()
+    return _encoder
+
+
+def write_bytes(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def convert_png(png, fmt):
+    """PNG のバイト列を Pillow で fmt に変換したバイト列（Pillow はエンコード中に GIL を手放す）"""
+    from PIL import Image
+
+    if fmt == 'avif':
+        load_avif_plugin()
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(png)).save(buffer, format=fmt.upper(), **ENCODE_PARAMS[fmt])
+    return buffer.getvalue()
+
+
+def _write_converted(path, png, fmt):
+    return write_bytes(path, convert_png(png, fmt))
+
+
+class Section:
+    """1 つの generate_images.py に対応する登録窓口"""
+
+    def __init__(self, script_file, **savefig_kwargs):
+        self.script = os.path.abspath(script_file)
+        self.name = discover.section_name(self.script)
+        self.output_dir = os.path.join(os.path.dirname(self.script), 'images')
+        self.savefig_kwargs = savefig_kwargs
+        SECTIONS[self.name] = self
+
+    def render(self, fig, scale=1):
+        """図を保存パラメータどおりに描画し、PNG のバイト列を返す（scale 倍の解像度）"""
+        kwargs = dict(self.savefig_kwargs)
+        kwargs.setdefault('metadata', PINNED_METADATA['png'])
+        if scale != 1:
+            kwargs['dpi'] = kwargs.get('dpi', fig.dpi) * scale
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', **kwargs)
+        return buffer.getvalue()
+
+    def render_vector(self, fig, fmt):
+        """図を fmt（'svg' / 'pdf'）で描画し、バイト列を返す（点の多いアーティストはラスター画像にする）"""
+        import matplotlib
+
+        # dpi はラスター画像にした部分の解像度になる
+        kwargs = dict(self.savefig_kwargs)
+        kwargs.setdefault('metadata', PINNED_METADATA[fmt])
+        buffer = io.BytesIO()
+        # SVG の要素の id を実行ごとに変えない
+        with rasterized_dense(fig), matplotlib.rc_context({'svg.hashsalt': 'figkit'}):
+            fig.savefig(buffer, format=fmt, **kwargs)
+        return buffer.getvalue()
+
+    def encode(self, fig, fmt='png', scale=1):
+        """図を fmt の 1 ファイル分のバイト列にする（ベクター形式では scale を使わない）"""
+        if fmt in discover.VECTOR_FORMATS:
+            return self.render_vector(fig, fmt)
+        png = self.render(fig, scale)
+        return png if fmt == 'png' else convert_png(png, fmt)
+
+    def export(self, fig, output, scales=None, formats=None, out_dir=None):
+        """
+        描き終えた図を解像度 × 形式のファイルに書き出し、書き出したパスを返す
+
+        matplotlib の描画（解像度ごとの PNG とベクター形式）はスレッドセーフではないので、このスレッドで
+        順に行う。PNG からの WebP / AVIF への変換とファイルへの書き込みは encoder() のスレッドに渡し、
+        次の描画と並行して進める。
+        """
+        scales = scales or SCALES
+        formats = formats or FORMATS
+        out_dir = out_dir or self.output_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+        pool = encoder()
+        jobs = []
+        for scale in scales:
+            png = self.render(fig, scale)
+            for fmt in formats:
+                if fmt in discover.VECTOR_FORMATS:
+                    continue
+                path = os.path.join(out_dir, discover.variant_name(output, scale, fmt))
+                # 同じ解像度の形式違いは、描画し直さずに PNG のバッファから変換する
+                jobs.append(pool.submit(write_bytes, path, png) if fmt == 'png' else
+                            pool.submit(_write_converted, path, png, fmt))
+        for fmt in formats:
+            if fmt in discover.VECTOR_FORMATS:
+                path = os.path.join(out_dir, discover.variant_name(output, 1, fmt))
+                jobs.append(pool.submit(write_bytes, path, self.render_vector(fig, fmt)))
+        return [job.result() for job in jobs]
+
+    def save(self, output, formats=()):
+        """描き終えた現在の図を、設定された解像度と形式（と図ごとの formats）で images/ に保存して閉じる（パスを返す）"""
+        import matplotlib.pyplot as plt
+
+        paths = self.export(plt.gcf(), output, SCALES, discover.variant_formats(FORMATS, formats))
+        plt.close()
+
+        extra = len(paths) - 1
+        print(f"Generated: {output}" + (f" (+{extra} variants)" if extra else ""))
+        return paths
+
+    def figure(self, output, category=None, layout=True, adjust=None, formats=()):
+        """
+        図を描く関数を output（images/ 内のファイル名）として登録するデコレータ
+
+        adjust は 'tight' レイアウトのときに subplots_adjust() に渡す引数（例: {'top': 0.92}）。
+        formats は configure() の設定によらず、この図だけ常に書き出す形式（例: ('svg', 'pdf')）。
+        discover が静的に読むので、リテラルのタプルで書く。
+        """
+        category = category or discover.category_of(output)
+        fig_id = discover.figure_id(self.name, output)
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper():
+                seed_figure(fig_id)
+                with drawing(self, layout):
+                    func()
+                apply_layout(layout, adjust)
+                return self.save(output, formats)
+
+            FIGURES[fig_id] = Figure(fig_id, self.name, func.__name__, output, category,
+                                     wrapper, self.script, func, layout, adjust)
+            return wrapper
+
+        return decorator
+
+    def figures(self, patterns=()):
+        """この Section に登録された図のうち、パターンに一致するものを登録順に返す"""
+        return [fig for fig in FIGURES.values()
+                if fig.section == self.name and discover.matches(fig.id, patterns)]
+
+    def generate(self, patterns=()):
+        """パターンに一致する図を登録順に生成する（パターンなしなら全部）"""
+        for fig in self.figures(patterns):
+            fig.func()
@@ -0,0 +1,202 @@
+"""
+箱ひげ図の統計量を、全サンプルをメモリに載せずに分位点スケッチで求めて描く
+
+    from figkit import sketch
+
+    bp = sketch.boxplot(ax, [tokyo, osaka], labels=['Tokyo', 'Osaka'], patch_artist=True)
+    # ax.boxplot(...) と同じ dict が返るので、bp['boxes'] の色付けなどはそのまま使える
+
+各グループが THRESHOLD 件以下の配列（ドキュメントの図はすべてこちら）なら ax.boxplot をそのまま呼ぶので、
+出力される画像は ax.boxplot を直接呼んだときと同じになる。
+それより多いグループや、配列を順に返すイテレータ（figkit.histogram.chunks() と同じ形）を渡したグループは、
+塊ごとに QuantileSketch に数え上げ、求めた統計量を ax.bxp に渡して描く。
+
+QuantileSketch は DDSketch と同じ対数目盛りのビンで件数を数える。分位点は相対誤差 ACCURACY
+（既定 1%）以内で、ビンの数は MAX_BINS 以下なので、1 グループのメモリは件数によらず一定になる。
+最小値・最大値・平均値は正確な値を保つ。ひげの端と外れ値は、ひげの範囲の内側・外側にあるビンの代表値
+（外れ値はビンごとに 1 点）で近似する。
+"""
+
+import inspect
+import math
+
+from . import histogram
+
+# 1 グループの件数がこれ以下の配列なら ax.boxplot をそのまま使う（None なら常にスケッチ）
+THRESHOLD = 100000
+
+# 分位点の相対誤差
+ACCURACY = 0.01
+
+# 正と負それぞれのビンの数の上限（超えたら小さい側のビンからまとめる）
+MAX_BINS = 2048
+
+
+def configure(threshold=100000, accuracy=0.01):
+    """スケッチを使う件数と分位点の相対誤差を設定する（使えない値なら ValueError）"""
+    global THRESHOLD, ACCURACY
+
+    if threshold is not None and threshold < 0:
+        raise ValueError(f"件数は 0 以上か None です: {threshold}")
+    if not 0 < accuracy < 1:
+        raise ValueError(f"相対誤差は 0 より大きく 1 より小さい値です: {accuracy}")
+    THRESHOLD = threshold
+    ACCURACY = accuracy
+
+
+class _Store:
+    """正の値の対数目盛りのビンごとの件数（ビン番号 offset から連続した配列で持つ）"""
+
+    def __init__(self):
+        import numpy as np
+
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, keys):
+        import numpy as np
+
+        if not len(keys):
+            return
+        low, high = int(keys.min()), int(keys.max())
+        if len(self.counts):
+            low, high = min(low, self.offset), max(high, self.offset + len(self.counts) - 1)
+        # 範囲が広がったら配列を作り直す
+        if not len(self.counts) or low < self.offset or high >= self.offset + len(self.counts):
+            grown = np.zeros(high - low + 1, dtype=np.int64)
+            grown[self.offset - low:self.offset - low + len(self.counts)] = self.counts
+            self.offset, self.counts = low, grown
+        self.counts += np.bincount(keys - self.offset, minlength=len(self.counts))
+        if len(self.counts) > MAX_BINS:
+            # 小さい側のビンを 1 つにまとめる（大きい側の分位点の精度を保つ）
+            extra = len(self.counts) - MAX_BINS
+            self.counts[extra] += self.counts[:extra].sum()
+            self.counts = self.counts[extra:]
+            self.offset += extra
+
+
+class QuantileSketch:
+    """相対誤差 accuracy 以内で分位点を返す、大きさ一定のスケッチ（DDSketch）"""
+
+    def __init__(self, accuracy=None):
+        accuracy = accuracy or ACCURACY
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = _Store()
+        self.negative = _Store()
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _keys(self, values):
+        import numpy as np
+
+        return np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+
+    def add(self, values):
+        """配列の値を数え上げる（NaN と無限大は無視する）"""
+        import numpy as np
+
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.positive.add(self._keys(values[values > 0]))
+        self.negative.add(self._keys(-values[values < 0]))
+        self.zeros += int((values == 0).sum())
+        return self
+
+    def buckets(self):
+        """(代表値, 件数) の配列を値の小さい順に返す（代表値は最小値と最大値の範囲に収める）"""
+        import numpy as np
+
+        def centers(store):
+            keys = store.offset + np.arange(len(store.counts))
+            return 2 * self.gamma ** keys / (self.gamma + 1)
+
+        values = np.concatenate([-centers(self.negative)[::-1], [0.0], centers(self.positive)])
+        counts = np.concatenate([self.negative.counts[::-1], [self.zeros], self.positive.counts])
+        occupied = counts > 0
+        return np.clip(values[occupied], self.min, self.max), counts[occupied]
+
+    def quantile(self, q):
+        """q 分位点（0 <= q <= 1）の近似値"""
+        import numpy as np
+
+        if not self.count:
+            return math.nan
+        values, counts = self.buckets()
+        rank = q * (self.count - 1)
+        return float(values[np.searchsorted(np.cumsum(counts), rank, side='right')])
+
+
+def stats(sketch, label=None, whis=1.5):
+    """
+    スケッチから ax.bxp に渡す統計量の dict を作る（matplotlib.cbook.boxplot_stats と同じキー）
+
+    空のグループは、boxplot_stats と同じく外れ値なし・ほかの統計量は NaN にする（箱は描かれない）。
+    """
+    import numpy as np
+
+    if not sketch.count:
+        result = {key: math.nan for key in ('med', 'q1', 'q3', 'iqr', 'whislo', 'whishi', 'mean', 'cilo', 'cihi')}
+        result['fliers'] = np.array([])
+        if label is not None:
+            result['label'] = label
+        return result
+
+    q1, med, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    low_fence, high_fence = q1 - whis * iqr, q3 + whis * iqr
+    values, _ = sketch.buckets()
+    inside = values[(values >= low_fence) & (values <= high_fence)]
+    fliers = values[(values < low_fence) | (values > high_fence)]
+    notch = 1.57 * iqr / math.sqrt(sketch.count)
+    result = {
+        'med': med, 'q1': q1, 'q3': q3, 'iqr': iqr,
+        # 最小値・最大値がひげの範囲内なら、ひげの端は正確な値にする
+        'whislo': sketch.min if sketch.min >= low_fence else float(inside.min()) if len(inside) else q1,
+        'whishi': sketch.max if sketch.max <= high_fence else float(inside.max()) if len(inside) else q3,
+        'fliers': fliers, 'mean': sketch.total / sketch.count,
+        'cilo': med - notch, 'cihi': med + notch,
+    }
+    if label is not None:
+        result['label'] = label
+    return result
+
+
+def _small(group):
+    """ax.boxplot にそのまま渡せる大きさの配列か"""
+    return (THRESHOLD is not None and not callable(group) and not hasattr(group, '__next__')
+            and len(group) <= THRESHOLD)
+
+
+def boxplot(ax, data, labels=None, whis=1.5, **kwargs):
+    """
+    ax.boxplot(data, labels=labels, ...) と同じ。大きなグループはスケッチで統計量を求めて ax.bxp で描く
+
+    notch は bxp の shownotches に読み替え、それ以外のキーワード（patch_artist など）は bxp にそのまま渡す。
+    """
+    if all(_small(group) for group in data):
+        if labels is not None:
+            # matplotlib 3.9 で labels は tick_labels に改名された（古い名前は警告が出る）
+            name = 'tick_labels' if 'tick_labels' in inspect.signature(ax.boxplot).parameters else 'labels'
+            kwargs[name] = labels
+        return ax.boxplot(data, whis=whis, **kwargs)
+
+    labels = labels if labels is not None else [None] * len(data)
+    boxes = []
+    for group, label in zip(data, labels):
+        sketch = QuantileSketch()
+        for chunk in histogram.chunks(group):
+            sketch.add(chunk)
+        boxes.append(stats(sketch, label, whis))
+    if 'notch' in kwargs:
+        kwargs['shownotches'] = kwargs.pop('notch')
+    return ax.bxp(boxes, **kwargs)
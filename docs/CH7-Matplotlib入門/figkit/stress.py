@@ -0,0 +1,496 @@
+"""
+グラフの種類ごとにデータ量を増やして描画時間とピークメモリを測るストレステスト
+
+    python -m figkit.stress                         # 全種類を 1e2〜1e6 件で測る
+    python -m figkit.stress line scatter --sizes 1e3 1e5 1e7
+    python -m figkit.stress --budget 5              # 5 秒を超えた種類はそれより大きい件数を測らない
+
+ドキュメントの図は 5〜40 件のデータしか描かないので、同じ図に大量のデータを渡したときに
+どこから重くなるかをここで確かめる。datagen で件数を作る図（CHARTS の draw が None のもの）は、
+登録された図の関数そのものを、datagen.SIZE を 1 系列が n 件になる倍率に上げて描く。
+件数が月や日付などに固定されていて倍率で増やせない図と、ジェネレータで塊ごとに渡す描き方だけは、
+元の図と同じスタイル（色・マーカー・線幅・figsize など）のテンプレートで n 件を描く。
+どちらも保存は元の図の Section の保存パラメータ（dpi など）で行う。
+
+件数 n の意味はグラフによって違う:
+  line / fill_between / inset / twinx : 点の数（twinx は棒の数も n）
+  *_decimated                         : 同じグラフを figkit.decimate で画素の幅に間引いて描いたもの
+  scatter                             : 3 つの Axes それぞれの点の数（figkit.density を使わずに ax.scatter で描く）
+  scatter_density                     : 同じ図を figkit.density で密度の画像にして描いたもの
+  hist                                : サンプルの数
+  hist_streamed                       : 同じヒストグラムを figkit.histogram で塊ごとに数えて描いたもの
+  bar / barh / stacked_bar / pie      : 棒・扇形の数
+  boxplot                             : 1 グループあたりのサンプル数（3 グループ）
+  boxplot_streamed                    : 同じ箱ひげ図を figkit.sketch の分位点スケッチで塊ごとに数えて描いたもの
+
+1 回の計測ごとにプロセスを fork し、そのプロセスの最大 RSS の増加をピークメモリとする。
+結果は .figkit/stress.json に保存し、件数に対する時間とメモリのグラフ（.figkit/stress.png）を描く。
+合計時間が INTERACTIVE 秒以下の最大の件数を「対話的に使える上限」として表示する。
+"""
+
+import argparse
+import collections
+import contextlib
+import functools
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import warnings
+
+from . import cache, datagen, decimate, density, discover, histogram, lazy, registry, sketch
+
+RESULTS_PATH = os.path.join(cache.STATE_DIR, 'stress.json')
+PLOT_PATH = os.path.join(cache.STATE_DIR, 'stress.png')
+
+DEFAULT_SIZES = (1e2, 1e3, 1e4, 1e5, 1e6)
+
+# これ以下の合計時間（秒）なら、対話的に描き直せるとみなす
+INTERACTIVE = 0.5
+
+# 1 つの件数でこれ（秒）を超えたら、その種類はより大きい件数を測らない
+BUDGET = 10.0
+
+inset_axes = lazy.attribute('mpl_toolkits.axes_grid1.inset_locator', 'inset_axes')
+
+
+def _line(plt, n, decimated=False):
+    y = 30 + datagen.normal(0, 1, n, scale=False).cumsum()
+    plt.figure(figsize=(8, 5))
+    plot = decimate.plot if decimated else lambda ax, *args, **kwargs: ax.plot(*args, **kwargs)
+    plot(plt.gca(), range(n), y, marker='o', linewidth=2, markersize=8)
+    plt.xlabel('x', fontsize=12)
+    plt.ylabel('y', fontsize=12)
+    plt.title('plt.plot(x, y)', fontsize=14)
+    plt.grid(True, alpha=0.3)
+
+
+def _bar(plt, n):
+    plt.figure(figsize=(8, 5))
+    plt.bar(range(n), datagen.integers(80, 120, n, scale=False),
+            color='steelblue', edgecolor='black', width=0.6, alpha=0.8)
+    plt.title("Sales by City", fontsize=14)
+    plt.xlabel("City", fontsize=12)
+    plt.ylabel("Sales", fontsize=12)
+    plt.grid(axis='y', alpha=0.3)
+
+
+def _barh(plt, n):
+    plt.figure(figsize=(8, 5))
+    plt.barh(range(n), datagen.integers(80, 120, n, scale=False), color='coral', edgecolor='black')
+    plt.title("Sales by City", fontsize=14)
+    plt.xlabel("Sales", fontsize=12)
+    plt.ylabel("City", fontsize=12)
+    plt.grid(axis='x', alpha=0.3)
+
+
+def _stacked_bar(plt, n):
+    q1, q2 = datagen.integers(70, 110, n, scale=False), datagen.integers(80, 90, n, scale=False)
+    plt.figure(figsize=(10, 6))
+    plt.bar(range(n), q1, label='Q1', color='steelblue')
+    plt.bar(range(n), q2, bottom=q1, label='Q2', color='coral')
+    plt.xlabel("City", fontsize=12)
+    plt.ylabel("Sales", fontsize=12)
+    plt.title("Quarterly Sales (Stacked)", fontsize=14)
+    plt.legend()
+    plt.grid(axis='y', alpha=0.3)
+
+
+def _hist_streamed(plt, n):
+    import numpy as np
+
+    plt.figure(figsize=(7, 5))
+    # 全件を配列にせず CHUNK 件ずつ作りながら数える（範囲を求めるときと数えるときで同じ種から作り直す）
+    seed = int(datagen.integers(0, 2 ** 31 - 1, 1, scale=False)[0])
+
+    def samples():
+        generator = np.random.default_rng(seed)
+        for start in range(0, n, histogram.CHUNK):
+            yield generator.normal(75, 10, min(histogram.CHUNK, n - start))
+
+    edges, (counts,) = histogram.accumulate([samples], bins=10)
+    histogram.draw(plt.gca(), edges, counts, color='coral', edgecolor='black', alpha=0.7)
+    plt.title("Histogram (Distribution)", fontsize=14)
+    plt.xlabel("Value Range", fontsize=12)
+    plt.ylabel("Frequency", fontsize=12)
+    plt.grid(axis='y', alpha=0.3)
+
+
+def _pie(plt, n):
+    plt.figure(figsize=(8, 8))
+    plt.pie(datagen.uniform(25, 40, n, scale=False), labels=[f"City {i}" for i in range(n)],
+            autopct='%1.1f%%', startangle=90, colors=['#ff9999', '#66b3ff', '#99ff99'],
+            wedgeprops={'edgecolor': 'black', 'linewidth': 1})
+    plt.title("Sales Share", fontsize=14)
+
+
+def _boxplot_streamed(plt, n):
+    import numpy as np
+
+    fig, ax = plt.subplots(figsize=(12, 5))
+    # グループごとに CHUNK 件ずつ作りながらスケッチに数え上げる（全件の配列は作らない）
+    seed = int(datagen.integers(0, 2 ** 31 - 1, 1, scale=False)[0])
+    generator = np.random.default_rng(seed)
+
+    def samples(mean, std):
+        for start in range(0, n, histogram.CHUNK):
+            yield generator.normal(mean, std, min(histogram.CHUNK, n - start))
+
+    sketch.boxplot(ax, [samples(70, 12), samples(75, 10), samples(65, 15)],
+                   labels=['Class A', 'Class B', 'Class C'])
+    ax.set_xlabel('Class', fontsize=12)
+    ax.set_ylabel('Score', fontsize=12)
+    ax.set_title('Score Distribution (Box Plot)', fontsize=14)
+    ax.grid(axis='y', alpha=0.3)
+
+
+def _fill_between(plt, n, decimated=False):
+    import numpy as np
+
+    x = np.arange(n)
+    sales = datagen.integers(80, 150, n, scale=False) * datagen.uniform(0.5, 0.8, n, scale=False)
+    fig, ax = plt.subplots(figsize=(14, 4))
+    if decimated:
+        decimate.plot(ax, x, sales, 'o-', color='#27ae60', linewidth=2, markersize=6)
+        decimate.fill_between(ax, x, sales, alpha=0.2, color='#27ae60')
+    else:
+        ax.plot(x, sales, 'o-', color='#27ae60', linewidth=2, markersize=6)
+        ax.fill_between(x, sales, alpha=0.2, color='#27ae60')
+    ax.set_ylabel('Sales', fontsize=11)
+    ax.set_xlabel('Date', fontsize=11)
+    ax.grid(True, axis='y', alpha=0.3)
+
+
+def _twinx(plt, n):
+    x = range(n)
+    fig, ax1 = plt.subplots(figsize=(10, 6))
+    ax1.bar(x, datagen.integers(100, 150, n, scale=False), color='steelblue', alpha=0.7, label='Sales')
+    ax1.set_xlabel('Month', fontsize=12)
+    ax1.set_ylabel('Sales (10,000 yen)', color='steelblue', fontsize=12)
+    ax1.tick_params(axis='y', labelcolor='steelblue')
+    ax2 = ax1.twinx()
+    ax2.plot(x, datagen.uniform(15, 25, n, scale=False), 'o-', color='coral', linewidth=2, markersize=8,
+             label='Profit Rate')
+    ax2.set_ylabel('Profit Rate (%)', color='coral', fontsize=12)
+    ax2.tick_params(axis='y', labelcolor='coral')
+    plt.title('Sales and Profit Rate', fontsize=14, fontweight='bold')
+    lines1, labels1 = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines1 + lines2, labels1 + labels2, loc='upper left')
+
+
+def _inset(plt, n):
+    import numpy as np
+
+    x = np.linspace(1, 12, n)
+    y = 20 - 10 * np.cos((x - 1) / 11 * 2 * np.pi) + datagen.normal(0, 0.5, n, scale=False)
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(x, y, 'b-o', linewidth=2, markersize=8)
+    ax.set_title('Annual Temperature Trend', fontsize=14)
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Temperature (C)', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    summer = (x >= 5) & (x <= 9)
+    axins = inset_axes(ax, width="40%", height="40%", loc='upper right')
+    axins.plot(x[summer], y[summer], 'r-o', linewidth=2, markersize=8)
+    axins.set_title('Summer Detail', fontsize=10)
+    axins.set_xlim(5, 9)
+    axins.grid(True, alpha=0.3)
+
+
+# ストレステストの 1 種類
+#   source    : 描く図の名前（draw がテンプレートなら、スタイルの元になった図）
+#   draw      : None なら source の図の関数を datagen.SIZE を上げて描く。
+#               件数を倍率で増やせない図は、同じスタイルで n 件を描くテンプレート draw(plt, n)
+#   configure : 描く前に configure() を呼ぶ figkit のモジュールと引数の組（描いた後で既定値に戻す）
+Chart = collections.namedtuple('Chart', ['source', 'draw', 'configure'])
+Chart.__new__.__defaults__ = (None, ())
+
+CHARTS = collections.OrderedDict([
+    ('line', Chart('Section1/tech_plot_basic', _line)),
+    ('line_decimated', Chart('Section1/tech_plot_basic', functools.partial(_line, decimated=True))),
+    ('scatter', Chart('Section2/tech_correlation', configure=((density, {'threshold': None}),))),
+    ('scatter_density', Chart('Section2/tech_correlation')),
+    ('bar', Chart('Section3/tech_bar_vertical', _bar)),
+    ('barh', Chart('Section3/tech_bar_horizontal', _barh)),
+    ('stacked_bar', Chart('Section3/tech_bar_stacked', _stacked_bar)),
+    ('hist', Chart('Section3/tech_bar_vs_hist')),
+    ('hist_streamed', Chart('Section3/tech_bar_vs_hist', _hist_streamed)),
+    ('pie', Chart('Section3/tech_pie_basic', _pie)),
+    ('boxplot', Chart('Section3/app_score_analysis')),
+    ('boxplot_streamed', Chart('Section3/app_score_analysis', _boxplot_streamed)),
+    ('fill_between', Chart('Section5/app_timeseries', _fill_between)),
+    ('fill_between_decimated', Chart('Section5/app_timeseries',
+                                     functools.partial(_fill_between, decimated=True))),
+    ('twinx', Chart('Section5/tech_twinx', _twinx)),
+    ('inset', Chart('Section5/tech_inset', _inset)),
+])
+
+
+def load_sections(charts):
+    """図とテンプレートの保存に使う Section のスクリプトを読み込み、図を登録する"""
+    needed = {CHARTS[chart].source.split('/')[0] for chart in charts}
+    for script in discover.find_scripts():
+        if discover.section_name(script) in needed and discover.section_name(script) not in registry.SECTIONS:
+            discover.load_module(script)
+
+
+@contextlib.contextmanager
+def configured(modules):
+    """この中だけ、figkit のモジュールを configure(**kwargs) で設定する"""
+    for module, kwargs in modules:
+        module.configure(**kwargs)
+    try:
+        yield
+    finally:
+        for module, _ in modules:
+            module.configure()
+
+
+@functools.lru_cache(maxsize=None)
+def base_count(fig_id):
+    """図を倍率 1 で描いたときに datagen が作る 1 系列の最大の件数（倍率で増やせない図なら ValueError）"""
+    import matplotlib.pyplot as plt
+
+    fig = registry.FIGURES[fig_id]
+    datagen.configure()
+    registry.seed_figure(fig_id)
+    try:
+        with datagen.recording() as counts, registry.drawing(registry.SECTIONS[fig.section], fig.layout):
+            fig.draw()
+    finally:
+        plt.close('all')
+    if not counts:
+        raise ValueError(f"datagen の倍率で件数が増えない図です: {fig_id}")
+    return max(counts)
+
+
+def draw(plt, chart, n):
+    """
+    chart を n 件で描いてレイアウトを仕上げ、描き終えた時刻を返す
+
+    登録された図は、datagen.SIZE を 1 系列が n 件になる倍率にし、図の名前の種で描く。
+    """
+    spec = CHARTS[chart]
+    section = registry.SECTIONS[spec.source.split('/')[0]]
+    if spec.draw is not None:
+        registry.seed_figure(f"stress/{chart}")
+        with configured(spec.configure), registry.drawing(section):
+            spec.draw(plt, n)
+            built = time.perf_counter()
+            registry.apply_layout()
+        return built
+
+    fig = registry.FIGURES[spec.source]
+    size = n / base_count(fig.id)
+    registry.seed_figure(fig.id)
+    datagen.configure(size)
+    try:
+        with configured(spec.configure):
+            with registry.drawing(section, fig.layout):
+                fig.draw()
+            built = time.perf_counter()
+            registry.apply_layout(fig.layout, fig.adjust)
+    finally:
+        datagen.configure()
+    return built
+
+
+def _peak_rss():
+    """このプロセスの最大 RSS（バイト）"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(chart, n):
+    """1 種類のグラフを n 件で描いて保存し、{フェーズ: 秒, 'peak_mb': MB} を返す"""
+    import matplotlib.pyplot as plt
+
+    section = registry.SECTIONS[CHARTS[chart].source.split('/')[0]]
+    baseline = _peak_rss()
+    start = time.perf_counter()
+    try:
+        built = draw(plt, chart, n)
+        laid_out = time.perf_counter()
+        png = section.render(plt.gcf())
+        saved = time.perf_counter()
+    finally:
+        plt.close('all')
+    return {
+        'artists': built - start,
+        'layout': laid_out - built,
+        'render': saved - laid_out,
+        'total': saved - start,
+        'bytes': len(png),
+        'peak_mb': max(0, _peak_rss() - baseline) / 2 ** 20,
+    }
+
+
+def _child(conn, chart, n):
+    # 「データが多いと loc='best' の凡例は遅い」などの警告は、ここでは分かっていることなので出さない
+    warnings.simplefilter('ignore', UserWarning)
+    try:
+        conn.send(('ok', measure(chart, n)))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def measure_isolated(chart, n):
+    """fork したプロセスで measure() を実行する（ピークメモリを計測ごとに分けるため）"""
+    context = multiprocessing.get_context('fork')
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(child, chart, n))
+    process.start()
+    child.close()
+    try:
+        status, result = parent.recv()
+    except EOFError:
+        process.join()
+        status, result = 'error', f"worker exited with code {process.exitcode}"
+    process.join()
+    if status != 'ok':
+        raise RuntimeError(result)
+    return result
+
+
+def warm_up(charts):
+    """フォントキャッシュや図の件数（base_count）を親プロセスで用意しておき、fork した子の計測に含めない"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    for chart in charts:
+        draw(plt, chart, 3)
+        plt.gcf().savefig(io.BytesIO(), format='png')
+        plt.close('all')
+
+
+def run(charts, sizes, budget=BUDGET, progress=None):
+    """{グラフの種類: [{'n': 件数, フェーズ: 秒, ...}, ...]} を返す（予算を超えたら打ち切る）"""
+    load_sections(charts)
+    warm_up(charts)
+    results = collections.OrderedDict()
+    for chart in charts:
+        rows = results[chart] = []
+        for n in sizes:
+            try:
+                row = dict(measure_isolated(chart, n), n=n)
+            except RuntimeError as e:
+                rows.append({'n': n, 'error': str(e)})
+                if progress:
+                    progress(chart, rows[-1])
+                break
+            rows.append(row)
+            if progress:
+                progress(chart, row)
+            if row['total'] > budget:
+                break
+    return results
+
+
+def interactive_limit(rows, threshold=INTERACTIVE):
+    """合計時間が threshold 秒以下だった最大の件数（なければ None）"""
+    ok = [row['n'] for row in rows if 'error' not in row and row['total'] <= threshold]
+    return max(ok) if ok else None
+
+
+HEADER = f"{'chart':<24}{'n':>12}{'artists':>11}{'layout':>10}{'render':>11}{'total':>11}{'peak MB':>10}"
+
+
+def _print_row(chart, row):
+    if 'error' in row:
+        print(f"{chart:<24}{row['n']:>12,}  ERROR {row['error']}")
+        return
+    print(f"{chart:<24}{row['n']:>12,}{row['artists'] * 1000:>11.1f}{row['layout'] * 1000:>10.1f}"
+          f"{row['render'] * 1000:>11.1f}{row['total'] * 1000:>11.1f}{row['peak_mb']:>10.1f}")
+
+
+def report(results, threshold=INTERACTIVE):
+    """種類ごとに、対話的に使える上限の件数を表示する"""
+    print(f"Interactive (total <= {threshold * 1000:.0f} ms) up to:")
+    for chart, rows in results.items():
+        limit = interactive_limit(rows, threshold)
+        measured = [row['n'] for row in rows if 'error' not in row]
+        note = '' if len(measured) == len(rows) else ' (errored above)'
+        print(f"  {chart:<24}{'-' if limit is None else f'{limit:,}':>12}  "
+              f"(source: {CHARTS[chart].source}){note}")
+
+
+def plot(results, path=PLOT_PATH, threshold=INTERACTIVE):
+    """件数に対する合計時間とピークメモリの両対数グラフを描く"""
+    import matplotlib.pyplot as plt
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for i, (chart, rows) in enumerate(results.items()):
+        rows = [row for row in rows if 'error' not in row]
+        if not rows:
+            continue
+        n = [row['n'] for row in rows]
+        # 色は 10 色で一周するので、2 周目は破線にして見分ける
+        style = {'linestyle': '-' if i < 10 else '--', 'marker': 'o', 'linewidth': 2, 'label': chart}
+        ax1.plot(n, [row['total'] for row in rows], **style)
+        ax2.plot(n, [max(row['peak_mb'], 0.1) for row in rows], **style)
+    ax1.axhline(threshold, color='gray', linestyle='--', linewidth=1)
+    ax1.text(0.01, threshold, 'interactive', va='bottom', color='gray',
+             transform=ax1.get_yaxis_transform())
+    for ax, ylabel in ((ax1, 'Render time (s)'), (ax2, 'Peak memory growth (MB)')):
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('Data size (n)', fontsize=12)
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.grid(True, which='both', alpha=0.3)
+    ax1.set_title('Render Time vs Data Size', fontsize=14)
+    ax2.set_title('Peak Memory vs Data Size', fontsize=14)
+    ax2.legend(loc='upper left', fontsize=9)
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+
+
+def save_results(results, path=RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'versions': cache.package_versions(), 'charts': results}, f, indent=2)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='グラフの種類ごとにデータ量を増やして描画時間とメモリを測る')
+    parser.add_argument('charts', nargs='*',
+                        help=f"測るグラフの種類（省略すると全部: {', '.join(CHARTS)}）")
+    parser.add_argument('--sizes', type=float, nargs='+', default=list(DEFAULT_SIZES),
+                        help='データの件数（既定: 1e2 1e3 1e4 1e5 1e6）')
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help=f'この秒数を超えた種類はより大きい件数を測らない（既定: {BUDGET:g}）')
+    parser.add_argument('--interactive', type=float, default=INTERACTIVE,
+                        help=f'対話的とみなす合計時間の上限（秒。既定: {INTERACTIVE:g}）')
+    parser.add_argument('--plot', default=PLOT_PATH,
+                        help='スケーリング曲線の保存先（既定: .figkit/stress.png）')
+    args = parser.parse_args(argv)
+
+    unknown = [chart for chart in args.charts if chart not in CHARTS]
+    if unknown:
+        parser.error(f"unknown chart type: {', '.join(unknown)}")
+    charts = args.charts or list(CHARTS)
+    sizes = sorted({int(size) for size in args.sizes})
+
+    print(HEADER)
+    results = run(charts, sizes, args.budget, progress=_print_row)
+    print("(ms; peak MB = growth of max RSS while drawing)")
+    print()
+    report(results, args.interactive)
+    save_results(results)
+    plot(results, args.plot, args.interactive)
+    print(f"Results saved: {os.path.relpath(RESULTS_PATH)}, {os.path.relpath(args.plot)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+figkit のテスト（CH7-Matplotlib入門 ディレクトリで実行）:
+    python -m pytest figkit/tests
+"""
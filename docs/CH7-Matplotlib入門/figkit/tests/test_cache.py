@@ -0,0 +1,100 @@
+import os
+
+import pytest
+
+from figkit import cache, discover
+
+VERSIONS = {'matplotlib': '3.10.0', 'numpy': '2.0.0', 'pandas': '2.2.0', 'pillow': '11.0.0',
+            'pillow-avif-plugin': None}
+
+
+def _func(source="@figure('tech_a.png')\ndef generate_tech_a():\n    pass\n", save_params=None):
+    return discover.FigureFunc('Section9/tech_a', 'generate_tech_a', 1, 'tech_a.png', 'tech',
+                               save_params or {'dpi': '150'}, source, ())
+
+
+def _key(func=None, module_code='import numpy as np\n', versions=VERSIONS, options=None, library=None):
+    return cache.figure_key(func or _func(), module_code, versions, options,
+                            {'registry.py': 'a'} if library is None else library)
+
+
+def test_figure_key_is_stable():
+    assert _key() == _key()
+
+
+@pytest.mark.parametrize('changed', [
+    {'func': _func(source="@figure('tech_a.png')\ndef generate_tech_a():\n    plot()\n")},
+    {'func': _func(save_params={'dpi': '300'})},
+    {'module_code': 'import numpy as np\n\ndef helper():\n    pass\n'},
+    {'versions': dict(VERSIONS, matplotlib='3.11.0')},
+    {'versions': dict(VERSIONS, pillow='11.1.0')},
+    {'versions': dict(VERSIONS, **{'pillow-avif-plugin': '1.5.0'})},
+    {'options': {'optimize': True}},
+    {'library': {'registry.py': 'b'}},
+    {'library': {'registry.py': 'a', 'decimate.py': 'c'}},
+])
+def test_figure_key_covers_every_input(changed):
+    assert _key(**changed) != _key()
+
+
+def test_library_hashes_follow_the_figkit_sources():
+    script = discover.find_scripts()[0]
+    hashes = cache.library_hashes(script)
+
+    assert {'registry.py', 'datagen.py', 'discover.py'} <= set(hashes)
+    assert hashes['registry.py'] == cache.file_sha256(os.path.join(discover.FIGKIT_DIR, 'registry.py'))
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / 'Section9-テスト' / 'generate_images.py'
+    (path.parent / 'images').mkdir(parents=True)
+    return str(path)
+
+
+def _write(script, name, data):
+    with open(os.path.join(os.path.dirname(script), 'images', name), 'wb') as f:
+        f.write(data)
+
+
+def test_is_fresh_after_record(script):
+    func = _func()
+    _write(script, 'tech_a.png', b'png')
+    _write(script, 'tech_a@2x.png', b'png2x')
+    manifest = {}
+    cache.record(manifest, script, func, 'key', variants=['tech_a@2x.png'])
+
+    assert cache.is_fresh(manifest, script, func, 'key')
+    assert not cache.is_fresh(manifest, script, func, 'other key')
+    assert not cache.is_fresh({}, script, func, 'key')
+
+
+@pytest.mark.parametrize('name', ['tech_a.png', 'tech_a@2x.png'])
+def test_is_fresh_detects_edited_outputs(script, name):
+    func = _func()
+    _write(script, 'tech_a.png', b'png')
+    _write(script, 'tech_a@2x.png', b'png2x')
+    manifest = {}
+    cache.record(manifest, script, func, 'key', variants=['tech_a@2x.png'])
+
+    _write(script, name, b'edited')
+    assert not cache.is_fresh(manifest, script, func, 'key')
+
+
+def test_is_fresh_detects_deleted_output(script):
+    func = _func()
+    _write(script, 'tech_a.png', b'png')
+    manifest = {}
+    cache.record(manifest, script, func, 'key')
+
+    os.remove(discover.output_path(script, func))
+    assert not cache.is_fresh(manifest, script, func, 'key')
+
+
+def test_manifest_round_trip(tmp_path):
+    path = str(tmp_path / 'manifest.json')
+    manifest = {'Section9/tech_a.png': {'key': 'k', 'sha256': 's'}}
+    cache.save_manifest(manifest, path)
+
+    assert cache.load_manifest(path) == manifest
+    assert cache.load_manifest(str(tmp_path / 'missing.json')) == {}
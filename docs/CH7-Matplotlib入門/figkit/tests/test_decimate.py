@@ -0,0 +1,89 @@
+import io
+
+import numpy as np
+import pytest
+
+from figkit import decimate
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_minmax_keeps_extremes_and_ends(rng):
+    y = rng.normal(0, 1, 10000).cumsum()
+    positions = np.arange(len(y), dtype=float)
+    keep = decimate.minmax_indices(positions, y, 100)
+
+    assert keep[0] == 0 and keep[-1] == len(y) - 1
+    assert (np.diff(keep) > 0).all()
+    assert y.argmax() in keep and y.argmin() in keep
+    assert len(keep) <= 2 * 100 + 2
+    # 列ごとの最大値・最小値も残る
+    for column in np.array_split(np.arange(len(y)), 100):
+        assert column[y[column].argmax()] in keep
+
+
+def test_lttb_picks_threshold_points(rng):
+    y = rng.normal(0, 1, 5000)
+    positions = np.arange(len(y), dtype=float)
+    keep = decimate.lttb_indices(positions, y, 200)
+
+    assert len(keep) == 200
+    assert keep[0] == 0 and keep[-1] == len(y) - 1
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_a_single_spike():
+    y = np.zeros(1000)
+    y[500] = 10
+    keep = decimate.lttb_indices(np.arange(1000, dtype=float), y, 50)
+    assert 500 in keep
+
+
+def test_indices_leaves_short_series_alone():
+    assert decimate.indices(np.arange(100), np.arange(100.0), columns=50) is None
+
+
+@pytest.mark.parametrize('x, y', [
+    ([f"label {i}" for i in range(1000)], np.arange(1000.0)),
+    (np.arange(1000)[::-1], np.arange(1000.0)),
+    (np.arange(1000), np.where(np.arange(1000) == 10, np.nan, 1.0)),
+])
+def test_indices_skips_categorical_unsorted_and_nan(x, y):
+    assert decimate.indices(x, y, columns=10) is None
+
+
+def test_indices_decimates_datetimes():
+    x = np.arange('2024-01-01', '2024-03-01', dtype='datetime64[h]')
+    y = np.sin(np.arange(len(x)) / 10)
+    keep = decimate.indices(x, y, columns=20)
+
+    assert keep is not None and len(keep) < len(x)
+
+
+def test_configure_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        decimate.configure('average')
+
+
+def test_plot_decimates_for_each_render_dpi(rng):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    y = rng.normal(0, 1, 100000).cumsum()
+    fig, ax = plt.subplots(figsize=(4, 3))
+    try:
+        (line,) = decimate.plot(ax, np.arange(len(y)), y)
+        fig.tight_layout()
+        fig.savefig(io.BytesIO(), format='png', dpi=50)
+        low = len(line.get_xdata())
+        fig.savefig(io.BytesIO(), format='png', dpi=100)
+        high = len(line.get_xdata())
+    finally:
+        plt.close(fig)
+
+    columns = int(ax.get_window_extent().width)
+    assert low < high <= 2 * columns + 2
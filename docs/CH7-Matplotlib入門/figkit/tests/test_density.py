@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from figkit import density
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def ax():
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(4, 3), dpi=50)
+    yield ax
+    plt.close(fig)
+
+
+def test_aggregate_counts_every_point(rng):
+    x, y = rng.normal(0, 1, 1000), rng.normal(0, 1, 1000)
+    extent, totals, _ = density.aggregate(x, y, (10, 20))
+
+    assert totals.shape == (10, 20)
+    assert totals.sum() == 1000
+    assert extent == (x.min(), x.max(), y.min(), y.max())
+
+
+def test_aggregate_skips_non_finite_points(rng):
+    x, y = rng.normal(0, 1, 1000), rng.normal(0, 1, 1000)
+    weights, values = rng.uniform(1, 2, 1000), rng.uniform(0, 1, 1000)
+    expected = density.aggregate(x, y, (10, 20), weights, [values])
+    x_bad = np.append(x, [np.nan, np.inf, 0.0])
+    y_bad = np.append(y, [0.0, 0.0, -np.inf])
+
+    extent, totals, (means,) = density.aggregate(
+        x_bad, y_bad, (10, 20), np.append(weights, [1, 1, 1]), [np.append(values, [5, 5, 5])])
+
+    assert extent == expected[0]
+    np.testing.assert_array_equal(totals, expected[1])
+    np.testing.assert_array_equal(means, expected[2][0])
+
+
+@pytest.mark.parametrize('column', ['x', 'y', 's', 'c'])
+def test_scatter_drops_non_finite_points_above_threshold(rng, ax, column):
+    n = density.THRESHOLD + 10000
+    data = {'x': rng.normal(0, 1, n), 'y': rng.normal(0, 1, n),
+            's': rng.uniform(10, 50, n), 'c': rng.uniform(0, 1, n)}
+    data[column][[0, 1]] = [np.nan, np.inf]
+
+    image = density.scatter(ax, data['x'], data['y'], s=data['s'], c=data['c'])
+
+    assert np.isfinite(image.get_extent()).all()
+    assert np.isfinite(image.norm.vmin) and np.isfinite(image.norm.vmax)
+
+
+def test_scatter_with_only_non_finite_points(ax):
+    n = density.THRESHOLD + 1
+    collection = density.scatter(ax, np.full(n, np.nan), np.zeros(n))
+    # ax.scatter に任せる（点は描かない）
+    assert np.ma.getmaskarray(collection.get_offsets()).all()
+
+
+def test_scatter_drops_non_finite_points_with_per_point_colors(rng, ax):
+    n = density.THRESHOLD + 10000
+    x, y = rng.normal(0, 1, n), rng.normal(0, 1, n)
+    x[0] = np.nan
+    colors = np.tile([1.0, 0.0, 0.0, 1.0], (n, 1))
+
+    image = density.scatter(ax, x, y, c=colors)
+
+    assert np.isfinite(image.get_extent()).all()
+    np.testing.assert_array_equal(image.get_array()[..., 0][image.get_array()[..., 3] > 0], 1.0)
@@ -0,0 +1,93 @@
+import os
+import textwrap
+
+import pytest
+
+from figkit import discover
+
+SCRIPT = textwrap.dedent('''
+    from figkit import datagen, registry
+
+    section = registry.Section(__file__, dpi=150, bbox_inches='tight')
+    figure = section.figure
+
+
+    def helper():
+        return datagen.normal(0, 1, 10)
+
+
+    @figure('tech_first.png')
+    def generate_tech_first():
+        helper()
+
+
+    @figure('app_second.png', category='exercise', formats=('svg',))
+    def generate_app_second():
+        pass
+
+
+    def not_a_figure():
+        pass
+
+
+    if __name__ == '__main__':
+        section.generate()
+''')
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / 'Section9-テスト' / 'generate_images.py'
+    path.parent.mkdir()
+    path.write_text(SCRIPT, encoding='utf-8')
+    return str(path)
+
+
+def test_scan_script_reads_figures_in_order(script):
+    funcs = discover.scan_script(script)
+
+    assert [func.id for func in funcs] == ['Section9/tech_first', 'Section9/app_second']
+    assert [func.name for func in funcs] == ['generate_tech_first', 'generate_app_second']
+    assert [func.category for func in funcs] == ['tech', 'exercise']
+    assert [func.formats for func in funcs] == [(), ('svg',)]
+    assert funcs[0].save_params == {'dpi': '150', 'bbox_inches': "'tight'"}
+    assert funcs[0].source.startswith("@figure('tech_first.png')")
+    assert 'helper()' in funcs[0].source
+
+
+def test_module_source_keeps_helpers_but_not_figures(script):
+    source = discover.module_source(script)
+
+    assert 'def helper():' in source
+    assert 'def not_a_figure():' in source
+    assert 'generate_tech_first' not in source
+    assert "__name__ == '__main__'" not in source
+
+
+def test_figkit_modules_follows_package_imports(script):
+    names = [os.path.basename(path) for path in discover.figkit_modules(script)]
+
+    # registry は discover と datagen を読み込む
+    assert names == ['datagen.py', 'discover.py', 'registry.py']
+
+
+def test_category_of_rejects_unknown_prefix():
+    assert discover.category_of('app_x.png') == 'app'
+    with pytest.raises(ValueError):
+        discover.category_of('figure_x.png')
+
+
+@pytest.mark.parametrize('patterns, expected', [
+    ((), True),
+    (('Section3/app_*',), True),
+    (('app_dashboard.png',), True),
+    (('Section4/*',), False),
+    (('tech_*',), False),
+])
+def test_matches(patterns, expected):
+    assert discover.matches('Section3/app_dashboard', patterns) is expected
+
+
+def test_variant_outputs():
+    assert discover.variant_outputs('x.png', (1, 2), ('png', 'webp', 'svg')) == [
+        'x.webp', 'x.svg', 'x@2x.png', 'x@2x.webp']
@@ -0,0 +1,53 @@
+from figkit import graph
+
+
+def _graph(pages, images, figures):
+    return graph.Graph({page: {'sha256': page, 'images': refs} for page, refs in pages.items()},
+                       images, figures)
+
+
+def test_check_reports_orphaned_missing_and_unused():
+    result = graph.check(_graph(
+        pages={'CH7/Section1/技術説明.md': ['CH7/Section1/images/a.png', 'CH7/Section1/images/gone.png']},
+        images=['CH7/Section1/images/a.png', 'CH7/Section1/images/b.png', 'CH7/Section1/images/stray.png'],
+        figures={'CH7/Section1/images/a.png': 'Section1/a', 'CH7/Section1/images/b.png': 'Section1/b'},
+    ))
+
+    assert result.missing == [('CH7/Section1/技術説明.md', 'CH7/Section1/images/gone.png', None)]
+    assert result.unused == ['Section1/b']
+    assert result.orphaned == ['CH7/Section1/images/b.png', 'CH7/Section1/images/stray.png']
+
+
+def test_check_keeps_variants_of_referenced_images():
+    result = graph.check(_graph(
+        pages={'p.md': ['images/a.png']},
+        images=['images/a.png', 'images/a@2x.png', 'images/a.webp', 'images/a.svg'],
+        figures={'images/a.png': 'Section1/a', 'images/a.webp': 'Section1/a'},
+    ))
+
+    assert result == graph.Report([], [], [])
+
+
+def test_missing_names_the_figure_that_draws_it():
+    result = graph.check(_graph(
+        pages={'p.md': ['images/a.png']},
+        images=[],
+        figures={'images/a.png': 'Section1/a'},
+    ))
+
+    assert result.missing == [('p.md', 'images/a.png', 'Section1/a')]
+    assert result.unused == []
+
+
+def test_changed_figures_includes_removed_references():
+    old = {'p.md': {'sha256': '1', 'images': ['images/a.png']},
+           'q.md': {'sha256': '1', 'images': ['images/c.png']}}
+    new = _graph(
+        pages={'p.md': ['images/b.png'], 'q.md': ['images/c.png']},
+        images=[],
+        figures={'images/a.png': 'Section1/a', 'images/b.png': 'Section1/b', 'images/c.png': 'Section1/c'},
+    )
+    new.pages['q.md']['sha256'] = '1'
+
+    assert graph.changed_pages(old, new.pages) == ['p.md']
+    assert graph.changed_figures(old, new) == {'Section1/a', 'Section1/b'}
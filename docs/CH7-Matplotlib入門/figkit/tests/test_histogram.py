@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from figkit import histogram
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_accumulate_uses_common_edges(rng):
+    a, b = rng.normal(0, 1, 1000), rng.normal(3, 2, 500)
+    edges, (count_a, count_b) = histogram.accumulate([a, b], bins=12)
+
+    expected_edges = np.linspace(min(a.min(), b.min()), max(a.max(), b.max()), 13)
+    np.testing.assert_allclose(edges, expected_edges)
+    np.testing.assert_array_equal(count_a, np.histogram(a, bins=expected_edges)[0])
+    np.testing.assert_array_equal(count_b, np.histogram(b, bins=expected_edges)[0])
+
+
+def test_accumulate_counts_in_chunks(rng, monkeypatch):
+    values = rng.normal(0, 1, 1001)
+    _, (whole,) = histogram.accumulate([values], bins=10)
+    monkeypatch.setattr(histogram, 'CHUNK', 100)
+    _, (chunked,) = histogram.accumulate([values], bins=10)
+
+    np.testing.assert_array_equal(chunked, whole)
+    assert chunked.sum() == len(values)
+
+
+def test_accumulate_reads_generator_functions_twice(rng):
+    values = rng.normal(0, 1, 300)
+
+    def source():
+        yield values[:100]
+        yield values[100:]
+
+    edges, (counts,) = histogram.accumulate([source], bins=5)
+    np.testing.assert_array_equal(counts, np.histogram(values, bins=edges)[0])
+
+
+def test_accumulate_rejects_iterator_without_span(rng):
+    with pytest.raises(ValueError):
+        histogram.accumulate([iter([rng.normal(0, 1, 10)])], bins=5)
+
+
+def test_accumulate_iterator_with_span():
+    edges, (counts,) = histogram.accumulate([iter([np.arange(10)])], bins=10, span=(0, 10))
+    np.testing.assert_array_equal(counts, np.ones(10))
+
+
+def test_span_of_widens_constant_values():
+    assert histogram.span_of([[2.0, 2.0]]) == (1.5, 2.5)
+    assert histogram.span_of([[]]) == (0.0, 1.0)
@@ -0,0 +1,66 @@
+import math
+
+import numpy as np
+import pytest
+
+from figkit import sketch
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.mark.parametrize('values', [
+    np.random.default_rng(1).lognormal(3, 1, 20000),
+    np.random.default_rng(2).normal(0, 50, 20000),
+])
+@pytest.mark.parametrize('q', [0.01, 0.25, 0.5, 0.75, 0.99])
+def test_quantile_within_relative_accuracy(values, q):
+    quantiles = sketch.QuantileSketch(accuracy=0.01).add(values)
+    exact = np.sort(values)[int(q * (len(values) - 1))]
+
+    assert abs(quantiles.quantile(q) - exact) <= 0.01 * abs(exact) + 1e-12
+
+
+def test_sketch_keeps_exact_extremes_and_mean(rng):
+    values = rng.normal(10, 3, 5000)
+    quantiles = sketch.QuantileSketch()
+    for chunk in np.array_split(values, 7):
+        quantiles.add(chunk)
+
+    assert quantiles.count == len(values)
+    assert quantiles.min == values.min()
+    assert quantiles.max == values.max()
+    assert math.isclose(quantiles.total / quantiles.count, values.mean())
+
+
+def test_sketch_ignores_nan_and_inf():
+    quantiles = sketch.QuantileSketch().add([1.0, np.nan, np.inf, 3.0])
+    assert quantiles.count == 2
+
+
+def test_sketch_bins_stay_bounded(rng):
+    quantiles = sketch.QuantileSketch().add(rng.lognormal(0, 20, 100000))
+    assert len(quantiles.positive.counts) <= sketch.MAX_BINS
+
+
+def test_stats_close_to_boxplot_stats(rng):
+    from matplotlib import cbook
+
+    values = rng.normal(70, 12, 50000)
+    result = sketch.stats(sketch.QuantileSketch().add(values), label='A')
+    expected = cbook.boxplot_stats(values)[0]
+
+    assert result['label'] == 'A'
+    for key in ('med', 'q1', 'q3'):
+        assert math.isclose(result[key], expected[key], rel_tol=0.01)
+    assert math.isclose(result['mean'], expected['mean'])
+
+
+def test_stats_of_empty_group():
+    result = sketch.stats(sketch.QuantileSketch(), label='empty')
+
+    assert result['label'] == 'empty'
+    assert len(result['fliers']) == 0
+    assert all(math.isnan(result[key]) for key in ('med', 'q1', 'q3', 'whislo', 'whishi', 'mean'))
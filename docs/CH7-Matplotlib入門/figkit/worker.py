@@ -0,0 +1,224 @@
+"""
+matplotlib を読み込んだまま待機し、図の生成リクエストを受け付ける常駐ワーカー
+
+    python -m figkit.worker
+    python -m figkit.worker --scales 1 2 --formats png webp --optimize   # figkit.build と同じオプション
+
+標準入力から 1 行に 1 つの JSON リクエストを受け取り、標準出力に 1 行の JSON で返す。
+
+    {"cmd": "render", "patterns": ["Section3/app_*"]}
+    {"cmd": "render", "pages": ["Section5-複数グラフとエクスポート/演習.md"], "force": true}
+    {"cmd": "ping"}
+    {"cmd": "quit"}
+
+起動時に 1 行 {"ready": true, ...} を出力する。リクエストに "id" があれば応答にもそのまま付ける。
+
+matplotlib（Agg）・フォントマネージャ・mpl_toolkits・numpy・pandas は起動時に 1 回だけ読み込み、
+小さな図を 1 枚描いてフォントとレンダラを温めておく。Section のスクリプトは
+ファイルの内容が変わったときだけ読み込み直す（figkit 自体を変更したときはワーカーを再起動する）。
+
+描き直す図の選び方とキャッシュの扱いは figkit.build と同じで、出力される PNG も一致する。
+書き出す形式・レイアウト・最適化のオプションも figkit.build と同じものを起動時に受け取る
+（build.configure）。figkit.build で --optimize を付けて生成した図は、ワーカーにも --optimize を
+付けないと、オプションが違うものとして描き直される。
+Python から使うときは RenderClient を使う:
+
+    with RenderClient(['--optimize']) as worker:
+        reply = worker.render(['app_*'])
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+from . import build, cache, discover
+
+PRELOAD_MODULES = (
+    'matplotlib.pyplot',
+    'matplotlib.font_manager',
+    'matplotlib.gridspec',
+    'mpl_toolkits.axes_grid1.inset_locator',
+    'numpy',
+    'pandas',
+)
+
+
+def preload():
+    """重いモジュールを読み込み、1 枚描いてフォントキャッシュとレンダラを温める"""
+    import matplotlib
+    matplotlib.use('Agg')
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+
+    import matplotlib.pyplot as plt
+    fig = plt.figure(figsize=(2, 1))
+    fig.text(0.5, 0.5, 'warm up', ha='center')
+    fig.savefig(io.BytesIO(), format='png', dpi=150)
+    plt.close(fig)
+
+
+class Worker:
+    """読み込んだスクリプトのモジュールを、ソースのハッシュと一緒に保持する"""
+
+    def __init__(self, config=None):
+        # 書き出す形式などの設定（build.Config。None なら figkit.build の既定値）
+        self.config = config or build.configure()
+        # スクリプト -> (ソースのハッシュ, モジュール)
+        self.modules = {}
+
+    def module(self, script):
+        """スクリプトが変わっていれば読み込み直し、モジュールを返す"""
+        digest = cache.file_sha256(script)
+        entry = self.modules.get(script)
+        if entry is None or entry[0] != digest:
+            entry = (digest, discover.load_module(script))
+            self.modules[script] = entry
+        return entry[1]
+
+    def render(self, patterns=(), pages=(), force=False):
+        """figkit.build と同じ手順で対象の図を描き直し、結果を辞書で返す"""
+        start = time.perf_counter()
+        scanned = {script: discover.scan_script(script) for script in discover.find_scripts()}
+        selected = build.select(scanned, patterns, pages)
+        manifest = cache.load_manifest()
+        units, keys = build.plan(scanned, manifest, selected, force=force, options=self.config.options)
+
+        outcomes = []
+        reloaded = []
+        for script, names in units:
+            was_loaded = self.modules.get(script)
+            module = self.module(script)
+            if was_loaded is None or was_loaded[1] is not module:
+                reloaded.append(discover.section_name(script))
+            outcomes.append(build.call_functions(module, names))
+
+        by_name = build.collect(units, outcomes)
+        build.finish(manifest, scanned, keys, by_name, self.config)
+
+        figures = []
+        for script, funcs in scanned.items():
+            for func in funcs:
+                if (script, func.name) not in by_name:
+                    continue
+                _, seconds, error = by_name[(script, func.name)]
+                figures.append({
+                    'id': func.id,
+                    'path': discover.output_path(script, func),
+                    'seconds': round(seconds, 4),
+                    'error': error,
+                })
+        return {
+            'ok': not any(fig['error'] for fig in figures),
+            'figures': figures,
+            'up_to_date': len(selected) - len(figures),
+            'reloaded': sorted(set(reloaded)),
+            'seconds': round(time.perf_counter() - start, 4),
+        }
+
+    def handle(self, request):
+        cmd = request.get('cmd')
+        if cmd == 'render':
+            return self.render(request.get('patterns', ()), request.get('pages', ()),
+                               request.get('force', False))
+        if cmd == 'ping':
+            return {'ok': True}
+        return {'ok': False, 'error': f"unknown command: {cmd}"}
+
+
+def serve(stdin=sys.stdin, stdout=sys.stdout, config=None):
+    """リクエストを 1 行ずつ処理する（quit か EOF で終了）"""
+    start = time.perf_counter()
+    # 図の関数やライブラリの print が応答に混ざらないよう、処理中の標準出力は stderr に回す
+    with contextlib.redirect_stdout(sys.stderr):
+        preload()
+        worker = Worker(config)
+    _reply(stdout, {'ready': True, 'pid': os.getpid(),
+                    'startup': round(time.perf_counter() - start, 4)})
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            _reply(stdout, {'ok': False, 'error': f"invalid JSON: {e}"})
+            continue
+        if request.get('cmd') == 'quit':
+            reply = {'ok': True}
+        else:
+            with contextlib.redirect_stdout(sys.stderr):
+                try:
+                    reply = worker.handle(request)
+                except Exception as e:
+                    reply = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+        if 'id' in request:
+            reply['id'] = request['id']
+        _reply(stdout, reply)
+        if request.get('cmd') == 'quit':
+            break
+
+
+def _reply(stdout, message):
+    stdout.write(json.dumps(message, ensure_ascii=False) + '\n')
+    stdout.flush()
+
+
+class RenderClient:
+    """常駐ワーカーを子プロセスとして起動し、リクエストを送る（args は figkit.worker のオプション）"""
+
+    def __init__(self, args=()):
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'figkit.worker', *args], cwd=discover.CHAPTER_DIR,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, encoding='utf-8')
+        self.ready = self._receive()
+
+    def request(self, message):
+        self.process.stdin.write(json.dumps(message, ensure_ascii=False) + '\n')
+        self.process.stdin.flush()
+        return self._receive()
+
+    def render(self, patterns=(), pages=(), force=False):
+        return self.request({'cmd': 'render', 'patterns': list(patterns),
+                             'pages': list(pages), 'force': force})
+
+    def close(self):
+        if self.process.poll() is None:
+            self.request({'cmd': 'quit'})
+            self.process.stdin.close()
+            self.process.wait()
+
+    def _receive(self):
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("render worker exited unexpectedly")
+        return json.loads(line)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='matplotlib を読み込んだまま、標準入力の JSON リクエストで CH7 の図を生成する')
+    build.output_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        config = build.configure(args)
+    except ValueError as e:
+        parser.error(str(e))
+    serve(config=config)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
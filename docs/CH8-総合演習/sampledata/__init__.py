@@ -0,0 +1,7 @@
+"""
+CH8 で使う seaborn のデータセット（tips / penguins）を、ネットワークなしで読み込むためのツール群
+
+使い方（CH8-総合演習 ディレクトリで実行）:
+    python -m sampledata.build            # seaborn から 1 回だけダウンロードして data/ に保存する
+    python -m sampledata.build --check    # 保存したデータの確認と読み込み時間の計測
+"""
@@ -0,0 +1,87 @@
+"""
+CH8 のデータセットを data/ に保存する（ネットワークにつながる環境で 1 回だけ実行し、data/ をコミットする）
+
+    python -m sampledata.build                        # SCHEMAS の全データセットを seaborn からダウンロードして保存
+    python -m sampledata.build penguins               # 名前を指定する
+    python -m sampledata.build --source ~/seaborn-data   # ダウンロードせずに <DIR>/<名前>.csv から保存する
+    python -m sampledata.build --check                # 保存したデータを読み込んで、時間とメモリを表示する
+
+--source には seaborn-data リポジトリ（https://github.com/mwaskom/seaborn-data）を clone したディレクトリや、
+seaborn がダウンロードした CSV を残しているディレクトリ（seaborn.get_data_home()）を指定できる。
+--check は store.load() の時間（--repeat 回の中央値）と、seaborn.load_dataset() の dtype
+（文字列は object、測定値は float64）の場合と比べたメモリの量を表示する。
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from . import store
+
+
+def read_source(name, source=None):
+    """seaborn の CSV と同じ内容の DataFrame（source がなければ seaborn からダウンロードする）"""
+    if source is None:
+        return store.download(name)
+    import pandas as pd
+
+    return pd.read_csv(os.path.join(source, name + '.csv'))
+
+
+def _loose(df):
+    """seaborn.load_dataset() の CSV を読んだときと同じ大きさの dtype（文字列は object、数値は 64 ビット）"""
+    return df.astype({column: object if dtype.name == 'category' else 'float64'
+                      for column, dtype in df.dtypes.items()})
+
+
+def check(names, repeat=20):
+    print(f"{'dataset':<10}{'rows':>6}{'load':>10}{'memory':>10}{'unoptimized':>13}")
+    for name in names:
+        if not store.is_saved(name):
+            print(f"{name:<10}  not saved")
+            continue
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            df = store.load(name)
+            times.append(time.perf_counter() - start)
+        memory = df.memory_usage(deep=True).sum()
+        loose = _loose(df).memory_usage(deep=True).sum()
+        print(f"{name:<10}{len(df):>6}{statistics.median(times) * 1000:>8.2f}ms"
+              f"{memory / 1024:>8.1f}KB{loose / 1024:>11.1f}KB")
+        print('          ' + ', '.join(f"{column}:{dtype}" for column, dtype in df.dtypes.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CH8 のデータセットを .npy の列として data/ に保存する')
+    parser.add_argument('names', nargs='*', metavar='name',
+                        help=f"保存するデータセット（{' / '.join(sorted(store.SCHEMAS))}。省略するとすべて）")
+    parser.add_argument('--source', help='ダウンロードせずに <SOURCE>/<名前>.csv から保存する')
+    parser.add_argument('--check', action='store_true', help='保存せずに、保存したデータの読み込みを確かめる')
+    parser.add_argument('--repeat', type=int, default=20, help='--check で読み込む回数（既定: 20）')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in store.SCHEMAS]
+    if unknown:
+        parser.error(f"知らないデータセットです: {', '.join(unknown)}")
+    names = args.names or sorted(store.SCHEMAS)
+
+    if args.check:
+        check(names, args.repeat)
+        return 0 if all(store.is_saved(name) for name in names) else 1
+
+    for name in names:
+        try:
+            df = read_source(name, args.source)
+            path = store.save(df, name)
+        except Exception as e:
+            print(f"{name}: {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+        size = sum(os.path.getsize(os.path.join(path, filename)) for filename in os.listdir(path))
+        print(f"{name}: {len(df)} rows -> {os.path.relpath(path)} ({size / 1024:.1f}KB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
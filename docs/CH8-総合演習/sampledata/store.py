@@ -0,0 +1,201 @@
+"""
+データセットを列ごとの .npy ファイルに保存し、メモリマップで読み込む
+
+    from sampledata import store
+
+    df = store.load('penguins')                  # data/penguins/ から読む（保存していなければ FileNotFoundError）
+    df = store.load('penguins', fallback=True)   # 保存していなければ seaborn.load_dataset() でダウンロードする
+    store.install()                              # sns.load_dataset('tips') が data/ から読むようにする
+
+data/<名前>/ には次のファイルを置く（python -m sampledata.build で作る）:
+  meta.json  : 形式のバージョン・行数と、列の順番・dtype・カテゴリ
+  <列名>.npy : 列の値。カテゴリの列はカテゴリの番号（int8。欠損は -1）、ほかは SCHEMAS の dtype
+
+列の dtype は SCHEMAS で決める。文字列の列は category、測定値は float32、人数などの整数は int8 にする。
+読み込みは CSV を解析して型を推測する代わりに、.npy を np.load(mmap_mode='r') で開いて並べるだけなので、
+ほぼ一瞬で済む。DataFrame を作るときに値をコピーするので、読み込んだ DataFrame は書き換えてもよい
+（data/ のファイルは変わらない）。
+"""
+
+import hashlib
+import json
+import os
+
+# 保存する形式を変えたら上げる
+STORE_VERSION = 1
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# データセット名: [(列名, dtype またはカテゴリのリスト)]。列は seaborn の CSV と同じ順番
+# カテゴリの順番は seaborn.load_dataset() と同じにする（tips の day は曜日順、penguins はアルファベット順）
+SCHEMAS = {
+    'tips': [
+        ('total_bill', 'float32'),
+        ('tip', 'float32'),
+        ('sex', ['Male', 'Female']),
+        ('smoker', ['Yes', 'No']),
+        ('day', ['Thur', 'Fri', 'Sat', 'Sun']),
+        ('time', ['Lunch', 'Dinner']),
+        ('size', 'int8'),
+    ],
+    'penguins': [
+        ('species', ['Adelie', 'Chinstrap', 'Gentoo']),
+        ('island', ['Biscoe', 'Dream', 'Torgersen']),
+        ('bill_length_mm', 'float32'),
+        ('bill_depth_mm', 'float32'),
+        ('flipper_length_mm', 'float32'),
+        ('body_mass_g', 'float32'),
+        ('sex', ['Male', 'Female']),
+    ],
+}
+
+# カテゴリの番号の dtype
+CODE_DTYPE = 'int8'
+
+META_NAME = 'meta.json'
+
+
+def dataset_dir(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, name)
+
+
+def is_saved(name, data_dir=DATA_DIR):
+    """保存し終えているか（meta.json は最後に書くので、あれば列もそろっている）"""
+    return os.path.exists(os.path.join(dataset_dir(name, data_dir), META_NAME))
+
+
+def convert(df, name):
+    """DataFrame を SCHEMAS の列の順番と dtype にそろえる（カテゴリにない値があれば ValueError）"""
+    import pandas as pd
+
+    missing = [column for column, _ in SCHEMAS[name] if column not in df.columns]
+    if missing:
+        raise ValueError(f"{name} に列がありません: {', '.join(missing)}")
+    columns = {}
+    for column, dtype in SCHEMAS[name]:
+        values = df[column]
+        if isinstance(dtype, list):
+            unknown = sorted(set(values.dropna().astype(str)) - set(dtype))
+            if unknown:
+                raise ValueError(f"{name}.{column} にカテゴリにない値があります: {', '.join(unknown)}")
+            columns[column] = pd.Categorical(values.astype(object).where(values.notna(), None), categories=dtype)
+        else:
+            columns[column] = values.to_numpy().astype(dtype)
+    return pd.DataFrame(columns)
+
+
+def save(df, name, data_dir=DATA_DIR):
+    """DataFrame を SCHEMAS の形にそろえて data/<name>/ に保存し、保存したディレクトリを返す"""
+    import numpy as np
+
+    df = convert(df, name)
+    path = dataset_dir(name, data_dir)
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, META_NAME)
+    if os.path.exists(meta_path):
+        # 書き終えるまでは保存していない扱いにする
+        os.remove(meta_path)
+
+    columns = []
+    for column, dtype in SCHEMAS[name]:
+        if isinstance(dtype, list):
+            values = df[column].cat.codes.to_numpy().astype(CODE_DTYPE)
+            columns.append({'name': column, 'dtype': 'category', 'categories': dtype})
+        else:
+            values = df[column].to_numpy()
+            columns.append({'name': column, 'dtype': dtype})
+        np.save(os.path.join(path, column + '.npy'), values, allow_pickle=False)
+
+    meta = {'version': STORE_VERSION, 'rows': len(df), 'columns': columns}
+    tmp = meta_path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, meta_path)
+    return path
+
+
+def _read_meta(path):
+    with open(os.path.join(path, META_NAME), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != STORE_VERSION:
+        raise ValueError(f"{path} は古い形式（version {meta.get('version')}）です。"
+                         f"python -m sampledata.build で作り直してください")
+    return meta
+
+
+def download(name):
+    """seaborn.load_dataset() でダウンロードする（SCHEMAS にあるデータセットは dtype をそろえる）"""
+    import seaborn as sns
+
+    df = sns.load_dataset(name) if _original is None else _original(name)
+    return convert(df, name) if name in SCHEMAS else df
+
+
+def load(name, fallback=False, data_dir=DATA_DIR):
+    """
+    保存したデータセットを DataFrame として読み込む
+
+    保存していなければ、fallback なら download() でダウンロードし、そうでなければ FileNotFoundError。
+    """
+    import numpy as np
+    import pandas as pd
+
+    path = dataset_dir(name, data_dir)
+    if not is_saved(name, data_dir):
+        if fallback:
+            return download(name)
+        raise FileNotFoundError(f"データセット {name!r} は {path} に保存されていません。"
+                                f"CH8-総合演習 ディレクトリで python -m sampledata.build を実行してください")
+
+    meta = _read_meta(path)
+    columns = {}
+    for column in meta['columns']:
+        values = np.load(os.path.join(path, column['name'] + '.npy'), mmap_mode='r', allow_pickle=False)
+        if column['dtype'] == 'category':
+            columns[column['name']] = pd.Categorical.from_codes(np.array(values), categories=column['categories'])
+        else:
+            columns[column['name']] = np.array(values)
+    return pd.DataFrame(columns)
+
+
+def fingerprint(data_dir=DATA_DIR):
+    """保存してあるデータセットのファイルのハッシュ（1 つも保存していなければ None）"""
+    names = [name for name in sorted(SCHEMAS) if is_saved(name, data_dir)]
+    if not names:
+        return None
+    digest = hashlib.sha256()
+    for name in names:
+        path = dataset_dir(name, data_dir)
+        for filename in sorted(os.listdir(path)):
+            if filename == META_NAME or filename.endswith('.npy'):
+                digest.update(f"{name}/{filename}\0".encode('utf-8'))
+                with open(os.path.join(path, filename), 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+_original = None
+
+
+def install(fallback=False, data_dir=DATA_DIR):
+    """
+    seaborn.load_dataset() を、SCHEMAS のデータセットは保存したものを読むように置き換える
+
+    教材のコード（sns.load_dataset('tips')）を書き換えずに、ネットワークなしで実行できるようにする。
+    保存していないデータセットは、fallback なら元の load_dataset() でダウンロードし、そうでなければ
+    FileNotFoundError。SCHEMAS にないデータセットは元の load_dataset() に任せる。
+    """
+    global _original
+
+    import seaborn as sns
+
+    if _original is None:
+        _original = sns.load_dataset
+
+    def load_dataset(name, cache=True, data_home=None, **kws):
+        if name in SCHEMAS and (is_saved(name, data_dir) or not fallback):
+            return load(name, data_dir=data_dir)
+        return _original(name, cache=cache, data_home=data_home, **kws)
+
+    load_dataset.__doc__ = _original.__doc__
+    sns.load_dataset = load_dataset
@@ -0,0 +1,6 @@
+"""
+docs/ の各ページ（技術説明.md / 演習.md / 応用問題.md）に書かれた Python のコードブロックを実行して確かめるツール群
+
+使い方（tools ディレクトリで実行）:
+    python -m docexec.run --jobs 8
+"""
@@ -0,0 +1,197 @@
+"""
+コードブロックの実行結果を、そのブロックまでのセッションの内容から計算したキーで残すキャッシュ
+
+ブロック i のキーは、ブロック 0〜i のコードを順につないだもの（とページのパス・実行環境）のハッシュ:
+
+    chain[0] = sha256(sha256(環境 + ページ) + code[0])
+    chain[i] = sha256(chain[i - 1] + code[i])
+    key[i]   = sha256(chain[i] + 見出し[i] + 太字[i])
+
+前のブロックの結果は後のブロックの入力になるので、ブロック i の結果はキーが同じなら変わらない。
+ページのブロックを 1 つ書き換えると、そのブロックと後ろのブロックのキーだけが変わる。
+見出しと直前の太字は expected の判定にだけ使うので、つながずにそのブロックのキーにだけ含める。
+
+ブロックごとに .docexec/cells/ へ次のものを書く:
+  <key>.json   : 実行結果（session.Result の dict）
+  <key>.pickle : 実行後の状態のスナップショット（名前空間・作業ディレクトリのファイル・乱数の状態・rcParams）
+
+名前空間は pickle で保存する。モジュールは名前だけを残して読み込み直す。ブロックの中で定義した関数や
+クラスなど pickle できない値があるとき、大きすぎるときはスナップショットを残さない。
+書き換えたブロックを実行するときは、直前のブロックから遡って最初に見つかったスナップショットから状態を戻し、
+そこから先だけを実行する。最後のブロックだけを書き換えたなら、実行するのはそのブロック 1 つになる。
+
+キーに含める実行環境:
+  - CACHE_VERSION
+  - Python と VERSIONED_PACKAGES のバージョン
+  - 実行のしかたの設定（session.settings()。session.py のソース・input() の値・乱数の種など）
+pandas のオプション（pd.set_option）はスナップショットに含めない。
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import platform
+import random
+import types
+import warnings
+from importlib import metadata
+
+# キーの作り方・保存する内容を変えたら上げる
+CACHE_VERSION = 1
+
+STATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.docexec')
+CELLS_DIR = os.path.join(STATE_DIR, 'cells')
+
+VERSIONED_PACKAGES = ('numpy', 'pandas', 'matplotlib', 'seaborn')
+
+# これより大きなスナップショット（バイト）は保存しない
+SNAPSHOT_LIMIT = 64 * 1024 * 1024
+
+
+def package_versions():
+    """実行結果に影響するパッケージのバージョン（import せずに調べる）"""
+    versions = {'python': platform.python_version()}
+    for name in VERSIONED_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return versions
+
+
+def environment_key(settings):
+    """全ブロックのキーに共通して含める、実行環境のハッシュ"""
+    payload = {
+        'cache_version': CACHE_VERSION,
+        'versions': package_versions(),
+        'settings': settings,
+    }
+    text = json.dumps(payload, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def block_keys(environment, page, blocks):
+    """ブロックごとのキー（そのブロックまでのコードを順につないだもののハッシュ）"""
+    key = hashlib.sha256(f"{environment}\0{page}".encode('utf-8')).hexdigest()
+    keys = []
+    for block in blocks:
+        key = hashlib.sha256(f"{key}\0{block.code}".encode('utf-8')).hexdigest()
+        keys.append(hashlib.sha256(f"{key}\0{block.heading}\0{block.label}".encode('utf-8')).hexdigest())
+    return keys
+
+
+def _path(key, suffix):
+    return os.path.join(CELLS_DIR, key[:2], key + suffix)
+
+
+def _write(path, data):
+    """別のワーカーが読んでいても壊れないように、一時ファイルに書いてから置き換える"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_result(key):
+    """キャッシュした実行結果の dict（なければ None）"""
+    try:
+        with open(_path(key, '.json'), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def store_result(key, result):
+    _write(_path(key, '.json'), json.dumps(result, ensure_ascii=False).encode('utf-8'))
+
+
+def snapshot(namespace, workdir):
+    """名前空間と作業ディレクトリのファイルなどを pickle したバイト列（保存できないときは None）"""
+    import matplotlib
+    import numpy as np
+
+    modules = {}
+    values = {}
+    for name, value in namespace.items():
+        if name == '__builtins__':
+            continue
+        if isinstance(value, types.ModuleType):
+            modules[name] = value.__name__
+        else:
+            values[name] = value
+
+    files = {}
+    size = 0
+    for root, _, names in os.walk(workdir):
+        for name in names:
+            path = os.path.join(root, name)
+            size += os.path.getsize(path)
+            if size > SNAPSHOT_LIMIT:
+                return None
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, workdir)] = f.read()
+
+    state = {
+        'modules': modules,
+        'values': values,
+        'files': files,
+        'numpy_random': np.random.get_state(),
+        'random': random.getstate(),
+        'rcparams': {key: value for key, value in matplotlib.rcParams.items() if key != 'backend'},
+    }
+    try:
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception:
+        # ブロックで定義した関数・クラス、開いたファイルなど
+        return None
+    return data if len(data) <= SNAPSHOT_LIMIT else None
+
+
+def store_snapshot(key, data):
+    _write(_path(key, '.pickle'), data)
+
+
+def restore(key, namespace, workdir):
+    """スナップショットから名前空間と作業ディレクトリを戻す（なければ・読めなければ False）"""
+    import importlib
+
+    import matplotlib
+    import numpy as np
+
+    try:
+        with open(_path(key, '.pickle'), 'rb') as f:
+            state = pickle.load(f)
+        modules = {name: importlib.import_module(module) for name, module in state['modules'].items()}
+    except Exception:
+        return False
+
+    namespace.update(state['values'])
+    namespace.update(modules)
+    for name, data in state['files'].items():
+        path = os.path.join(workdir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    np.random.set_state(state['numpy_random'])
+    random.setstate(state['random'])
+    with warnings.catch_warnings():
+        # 非推奨の設定を書き戻したときの警告は出さない
+        warnings.simplefilter('ignore')
+        matplotlib.rcParams.update(state['rcparams'])
+    return True
+
+
+def prune(keep):
+    """keep（キーの集合）にないキャッシュを消し、消したキーの数を返す"""
+    removed = set()
+    if not os.path.isdir(CELLS_DIR):
+        return 0
+    for root, _, names in os.walk(CELLS_DIR):
+        for name in names:
+            key = name.split('.', 1)[0]
+            if key not in keep:
+                os.remove(os.path.join(root, name))
+                removed.add(key)
+    return len(removed)
@@ -0,0 +1,609 @@
+"""
+同じ問題の「基本解法」（for ループなど）と「発展解法」（groupby・ベクトル演算など）の解答例を組にして、
+データの件数を 10^2 から 10^7 行まで増やしながら時間を比べ、結果が同じかを確かめる
+
+    python -m docexec.compare                                   # 全ページ
+    python -m docexec.compare 'CH6-*'                           # CH6 の演習・応用問題だけ
+    python -m docexec.compare 'CH6-*/Section4-*' --max-rows 1000000 --budget 10
+
+組にするのは、同じ見出しの下で太字が「基本解法」で始まるブロックと、その後に続く「発展解法」で始まるブロック。
+その間（と前の組との間）にある太字のない同じ見出しのブロックは、問題文のデータとして先に実行する。
+
+解答例は教材のデータを自分で作ってから解いているので、ブロックを次の 2 つに分けて「解法」だけの時間を測る:
+  準備 : 先頭から続く import と、前の文で作った変数を使わない文（データの作成など）と、
+         DataFrame などのコンストラクタ・pd.to_datetime に渡すだけの文
+  解法 : それより後ろの文
+データは docexec.scaling で件数を factor 倍に書き換えて作る（教材のデータを繰り返した合成データ）。
+まず教材の件数（shipped）で測り、準備を実行した後の最大の DataFrame / Series / 配列の長さを行数とする。
+factor はその行数が目標の行数になるように決める。
+実行時間が MIN_SECONDS に満たなければ、準備からやり直して REPEAT 回まで測り、最小値を使う。
+次のときは、その組をそれより大きな件数では測らない（理由を表の下に書く。budget は書かない）:
+  - 基本解法か発展解法が budget 秒を超えた、失敗した、制限時間を超えた
+  - 基本解法と発展解法で行数が違う（作るデータが違うので、件数を増やすと同じ問題にならない）
+  - 件数を書き換えられず、行数が増えなかった
+
+結果を比べるのは、解法の最後の文が式ならその値、そうでなければ解法で最後に代入した変数（df['列'] = ... なら df）。
+ループの中で x[...] = ... や x.append(...) で作った変数も使う。出力するだけで変数に残さない解法は
+比べられないので unchecked になる。
+dict やリストは Series に、dict の dict は DataFrame に、1 列の DataFrame は Series にして、インデックスを並べ替えてから
+値を許容誤差つきで比べる（dtype・名前は比べない）。DataFrame は共通の列だけを比べ、ラベルの書き方だけが違う
+（'2024-01' と月末の日付など）ときは値を順に比べる。比べられない組み合わせは unchecked にする。
+教材のデータを繰り返すのでキーも重複する。ラベルをキーにした dict で集計する基本解法は重複をまとめてしまうので、
+件数を増やしたときだけ differ になる（重複したラベルを扱えない書き方だと分かる）。
+
+結果は .docexec/compare.json、表を Markdown にした .docexec/compare.md、
+速度比（基本解法の時間 / 発展解法の時間）を件数に対して描いた .docexec/compare.png に書き出す。
+グラフは CH7 の figkit.stress のグラフと同じ書き方（両対数、10 色で一周したら破線）で描く。
+時間を比べるので、ワーカープロセスは使わずに 1 つずつ測る。
+"""
+
+import argparse
+import ast
+import builtins
+import contextlib
+import json
+import math
+import numbers
+import os
+import sys
+import tempfile
+import time
+import warnings
+from collections import namedtuple
+
+from . import cache, extract, scaling, session
+
+# 測る行数
+SIZES = tuple(10 ** exponent for exponent in range(2, 8))
+
+# 基本解法か発展解法がこの秒数を超えたら、その組はそれより大きな件数では測らない
+BUDGET = 5.0
+
+# 準備・解法それぞれの制限時間（秒）
+TIMEOUT = 60
+
+# これより短い時間（秒）なら測り直して最小値を使う（最大 REPEAT 回）
+MIN_SECONDS = 0.2
+REPEAT = 5
+
+BASIC_LABEL = '基本解法'
+ADVANCED_LABEL = '発展解法'
+
+# 前の文で作った変数を使っていても準備とみなす、データを作る関数
+DATA_FUNCTIONS = scaling.CONSTRUCTORS + ('to_datetime', 'date_range')
+
+# 比べるときの許容誤差（相対）
+TOLERANCE = 1e-6
+
+COMPARE_JSON = os.path.join(cache.STATE_DIR, 'compare.json')
+COMPARE_MD = os.path.join(cache.STATE_DIR, 'compare.md')
+COMPARE_PNG = os.path.join(cache.STATE_DIR, 'compare.png')
+
+# 比べる解答例の組
+#   number   : 表・グラフで組を指す番号（1 から）
+#   basic    : 基本解法のブロック
+#   advanced : 発展解法のブロック
+#   context  : 組の前にある、同じ見出しの太字のないブロック（問題文のデータ）
+Pair = namedtuple('Pair', ['number', 'basic', 'advanced', 'context'])
+
+# 解答例 1 つを 1 つの件数で実行した結果
+#   rows    : 準備を実行した後の最大のデータの長さ
+#   seconds : 解法の時間（最小値）
+#   status  : 'ok' / 'timeout' / 'failed' / 'empty'（準備の後に文がない。「省略」と書いただけの解答など）
+#   error   : 例外の最後の行（なければ None）
+Run = namedtuple('Run', ['rows', 'seconds', 'status', 'error'])
+
+# 組 1 つを 1 つの件数で測った結果
+#   target   : 目標の行数
+#   factor   : 件数の倍率
+#   basic    : 基本解法の Run
+#   advanced : 発展解法の Run
+#   equal    : 結果が同じか（True / False、比べられなければ None）
+Measurement = namedtuple('Measurement', ['target', 'factor', 'basic', 'advanced', 'equal'])
+
+
+def find_pairs(sessions):
+    """ページの基本解法と、その後に続く発展解法を組にする（1 つの基本解法に発展解法が複数あればそれぞれ組にする）"""
+    pairs = []
+    for blocks in sessions.values():
+        basic = None
+        context = []
+        for block in blocks:
+            if block.label.startswith(BASIC_LABEL):
+                basic = block
+            elif block.label.startswith(ADVANCED_LABEL):
+                if basic is not None and basic.heading == block.heading:
+                    pairs.append(Pair(len(pairs) + 1, basic, block,
+                                      [b for b in context if b.heading == block.heading]))
+            elif not block.label:
+                if basic is not None:
+                    basic, context = None, []
+                context.append(block)
+            else:
+                basic = None
+    return pairs
+
+
+def _parse(block, factor):
+    """session.compile_block と同じようにブロックを読み、件数を factor 倍にした ast"""
+    source = '\n' * (block.line - 1) + session.MAGIC.sub(r'\1pass', block.code)
+    tree = ast.parse(source, filename=block.page)
+    if factor != 1:
+        tree, _ = scaling.scale_tree(tree, factor)
+    return tree
+
+
+def _targets(statement):
+    """文が代入する変数の名前（df['列'] = ... や df.列 = ... なら df）"""
+    if isinstance(statement, ast.Assign):
+        targets = statement.targets
+    elif isinstance(statement, (ast.AugAssign, ast.AnnAssign)):
+        targets = [statement.target]
+    else:
+        return []
+    names = []
+    for target in targets:
+        for node in ast.walk(target):
+            if isinstance(node, ast.Name):
+                names.append(node.id)
+                break
+    return names
+
+
+def _is_print(statement):
+    return (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)
+            and isinstance(statement.value.func, ast.Name) and statement.value.func.id == 'print')
+
+
+def _is_data(statement):
+    return (isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Call)
+            and scaling.call_name(statement.value) in DATA_FUNCTIONS)
+
+
+def split(tree):
+    """ブロックの文を (準備の文, 解法の文) に分ける"""
+    bound = set()
+    for position, statement in enumerate(tree.body):
+        if not isinstance(statement, (ast.Import, ast.ImportFrom)):
+            reads = {node.id for node in ast.walk(statement)
+                     if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)}
+            if reads & bound and not _is_data(statement):
+                return tree.body[:position], tree.body[position:]
+            bound.update(_targets(statement))
+    return tree.body, []
+
+
+# 呼ぶと中身が変わるメソッド（ループの中で結果を作る書き方）
+MUTATING_METHODS = ('append', 'extend', 'update', 'add', 'insert')
+
+
+def _stored(statement):
+    """
+    ループなどの中で中身を書き換えている変数の名前（書いた順）
+
+    x[...] = ... / x.append(...) などだけを数え、ループの中で名前ごと代入し直す変数（合計の途中の値など）は数えない。
+    """
+    names = []
+    rebound = set()
+    for node in ast.walk(statement):
+        if isinstance(node, (ast.Assign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if node is not statement:
+                rebound.update(target.id for target in targets if isinstance(target, ast.Name))
+            names.extend(target.value.id for target in targets
+                         if isinstance(target, ast.Subscript) and isinstance(target.value, ast.Name))
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+              and node.func.attr in MUTATING_METHODS and isinstance(node.func.value, ast.Name)):
+            names.append(node.func.value.id)
+    return [name for name in names if name not in rebound]
+
+
+def _is_literal(node):
+    try:
+        ast.literal_eval(node)
+    except ValueError:
+        return False
+    return True
+
+
+def result_of(solution):
+    """
+    比べる値の取り出し方: ('expr', None)（最後の式の値）/ ('name', 変数名) / (None, None)
+
+    変数は解法の文で代入したか中身を書き換えたものに限る（出力するだけの解法は、準備で作ったデータと
+    比べないように None にする）。
+    """
+    if solution and isinstance(solution[-1], ast.Expr) and not _is_print(solution[-1]):
+        return 'expr', None
+    for statement in reversed(solution):
+        if isinstance(statement, ast.Assign) and _is_literal(statement.value):
+            # 表示用のラベルのリストなど
+            continue
+        names = _targets(statement) or _stored(statement)[-1:]
+        if names:
+            return 'name', names[0]
+    return None, None
+
+
+def _compile(statements, path):
+    return compile(ast.Module(body=list(statements), type_ignores=[]), path, 'exec')
+
+
+def _rows(namespace):
+    """名前空間にある最大の DataFrame / Series / 配列 / リストの長さ"""
+    rows = 0
+    for name, value in namespace.items():
+        if name.startswith('__') or not hasattr(value, '__len__') or isinstance(value, (str, bytes, dict, type)):
+            continue
+        try:
+            rows = max(rows, len(value))
+        except TypeError:
+            pass
+    return rows
+
+
+def _last_line(error):
+    return f"{type(error).__name__}: {error}".splitlines()[0]
+
+
+def execute(pair, block, factor, timeout=TIMEOUT, keep=False):
+    """
+    問題文のデータと block の準備を実行してから、解法の時間を測る
+
+    (Run, 比べる値) を返す（keep でなければ値は None）。
+    """
+    path = os.path.join(extract.DOCS_DIR, block.page)
+    tree = _parse(block, factor)
+    setup, solution = split(tree)
+    kind, name = result_of(solution)
+    last = None
+    if kind == 'expr':
+        last = compile(ast.Expression(solution.pop().value), path, 'eval')
+    elif not solution:
+        return Run(0, 0.0, 'empty', 'no statements after the data setup'), None
+
+    namespace = {'__name__': '__main__', '__builtins__': builtins}
+    rows, seconds, value = 0, 0.0, None
+    session.reset()
+    # input() の呼び出し回数はブロックを実行するたびに数え直す
+    builtins.input = session.FakeInput()
+    try:
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            with session.deadline(timeout):
+                for context in pair.context:
+                    exec(_compile(_parse(context, factor).body, path), namespace)
+                exec(_compile(setup, path), namespace)
+            rows = _rows(namespace)
+            code = _compile(solution, path)
+            start = time.perf_counter()
+            with session.deadline(timeout):
+                exec(code, namespace)
+                if last is not None:
+                    value = eval(last, namespace)
+            seconds = time.perf_counter() - start
+    except session.BlockTimeout as e:
+        return Run(rows, timeout, 'timeout', str(e)), None
+    except (Exception, SystemExit) as e:
+        return Run(rows, 0.0, 'failed', _last_line(e)), None
+    finally:
+        import matplotlib.pyplot as plt
+        plt.close('all')
+
+    if keep and kind == 'name':
+        value = namespace.get(name)
+    return Run(rows, seconds, 'ok', None), value if keep else None
+
+
+def measure(pair, block, factor, timeout=TIMEOUT):
+    """execute() を MIN_SECONDS に届くまで REPEAT 回まで繰り返し、最小の時間の Run と比べる値を返す"""
+    run, value = execute(pair, block, factor, timeout, keep=True)
+    best = run
+    for _ in range(REPEAT - 1):
+        if best.status != 'ok' or best.seconds >= MIN_SECONDS:
+            break
+        again, _ = execute(pair, block, factor, timeout)
+        if again.status == 'ok' and again.seconds < best.seconds:
+            best = again
+    return best, value
+
+
+def _comparable(value):
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(value, dict) and value and all(isinstance(v, dict) for v in value.values()):
+        value = pd.DataFrame.from_dict(value, orient='index')
+    elif isinstance(value, dict):
+        value = pd.Series(value)
+    elif isinstance(value, (list, tuple)) or (isinstance(value, np.ndarray) and value.ndim == 1):
+        value = pd.Series(list(value) if isinstance(value, tuple) else value)
+    elif isinstance(value, np.ndarray) and value.ndim == 2:
+        value = pd.DataFrame(value)
+    if isinstance(value, pd.DataFrame) and value.shape[1] == 1:
+        value = value.iloc[:, 0]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        with contextlib.suppress(TypeError):
+            value = value.sort_index()
+        if isinstance(value, pd.DataFrame):
+            with contextlib.suppress(TypeError):
+                value = value.sort_index(axis=1)
+    return value
+
+
+def same(a, b):
+    """2 つの結果が同じか（True / False。比べられない組み合わせなら None）"""
+    import pandas as pd
+
+    a, b = _comparable(a), _comparable(b)
+    if isinstance(a, numbers.Number) and isinstance(b, numbers.Number):
+        return math.isclose(a, b, rel_tol=TOLERANCE) or (a != a and b != b)
+    if isinstance(a, pd.Series) and isinstance(b, pd.Series):
+        check = pd.testing.assert_series_equal
+        options = {}
+    elif isinstance(a, pd.DataFrame) and isinstance(b, pd.DataFrame):
+        check = pd.testing.assert_frame_equal
+        options = {'check_column_type': False}
+        # 途中の計算用の列を残しているかどうかの違いは比べない
+        common = [column for column in a.columns if column in b.columns]
+        if common and (len(common) < len(a.columns) or len(common) < len(b.columns)):
+            a, b = a[common], b[common]
+    else:
+        return None
+    options.update(check_dtype=False, check_names=False, check_index_type=False, check_exact=False,
+                   rtol=TOLERANCE, check_freq=False, check_flags=False, check_categorical=False)
+    for _ in range(2):
+        try:
+            check(a, b, **options)
+            return True
+        except (AssertionError, TypeError, ValueError):
+            # '2024-01' と月末の日付のようにラベルの書き方だけが違うときは、値を順に比べる
+            a, b = a.reset_index(drop=True), b.reset_index(drop=True)
+    return False
+
+
+def stopped(measurement, previous_rows=0, budget=BUDGET):
+    """その件数で測るのをやめる理由（続けるなら None）"""
+    basic, advanced = measurement.basic, measurement.advanced
+    for name, run in (('basic', basic), ('advanced', advanced)):
+        if run.status != 'ok':
+            return f"{name} {run.status}: {run.error}"
+    if basic.rows != advanced.rows:
+        # 基本解法と発展解法で作るデータが違うので、件数を増やすと同じ問題にならない
+        return f"data sizes differ ({basic.rows} vs {advanced.rows} rows)"
+    if basic.rows <= previous_rows:
+        return f"data did not grow past {basic.rows} rows"
+    if max(basic.seconds, advanced.seconds) > budget:
+        return 'budget'
+    return None
+
+
+def compare_pair(pair, sizes=SIZES, budget=BUDGET, timeout=TIMEOUT):
+    """組を教材の件数（target は None）と sizes の行数で順に測って Measurement のリストを返す"""
+    measurements = []
+    shipped_rows = previous_rows = 0
+    for target in (None,) + tuple(sizes):
+        if target is not None and target <= shipped_rows:
+            # 教材のデータがもともとこの行数より多い
+            continue
+        factor = 1 if target is None else max(2, round(target / shipped_rows))
+        basic, basic_value = measure(pair, pair.basic, factor, timeout)
+        advanced, advanced_value = measure(pair, pair.advanced, factor, timeout)
+        equal = None
+        if basic.status == advanced.status == 'ok' and basic.rows == advanced.rows:
+            equal = same(basic_value, advanced_value)
+        del basic_value, advanced_value
+        measurement = Measurement(target, factor, basic, advanced, equal)
+        measurements.append(measurement)
+        if stopped(measurement, previous_rows, budget):
+            break
+        shipped_rows = shipped_rows or basic.rows
+        previous_rows = basic.rows
+    return measurements
+
+
+def speedup(measurement):
+    """基本解法の時間 / 発展解法の時間（求められなければ None）"""
+    basic, advanced = measurement.basic, measurement.advanced
+    if basic.status != 'ok' or advanced.status != 'ok' or advanced.seconds <= 0:
+        return None
+    return basic.seconds / advanced.seconds
+
+
+def _where(block):
+    return f"{block.page}:{block.line}"
+
+
+def _verdict(measurements):
+    """組全体の判定: 'equal' / 'differ' / 'unchecked' / 'failed'"""
+    if any(m.equal is False for m in measurements):
+        return 'differ'
+    if not any(m.basic.status == m.advanced.status == 'ok' for m in measurements):
+        return 'failed'
+    if all(m.equal for m in measurements if m.equal is not None) and any(m.equal for m in measurements):
+        return 'equal'
+    return 'unchecked'
+
+
+def _ratio(measurement):
+    value = speedup(measurement)
+    if value is None:
+        for run in (measurement.basic, measurement.advanced):
+            if run.status != 'ok':
+                return run.status
+        return '-'
+    mark = '' if measurement.equal is not False else ' (!)'
+    return f"x{value:.3g}{mark}"
+
+
+def table(pairs, results, sizes=SIZES):
+    """表の行（見出しを含む文字列のリスト）。セルは各行数での速度比"""
+    header = ['#', 'basic', 'advanced', 'result', 'shipped'] + [f"1e{round(math.log10(size))}" for size in sizes]
+    lines = [header]
+    for pair in pairs:
+        measurements = results[pair.number]
+        by_target = {m.target: m for m in measurements}
+        cells = [_ratio(by_target[size]) if size in by_target else '' for size in (None,) + tuple(sizes)]
+        lines.append([str(pair.number), _where(pair.basic), pair.advanced.label, _verdict(measurements)] + cells)
+    return lines
+
+
+def stop_reasons(pairs, results):
+    """制限時間の budget 以外の理由で途中でやめた組の (組, 行数, 理由)"""
+    for pair in pairs:
+        measurements = results[pair.number]
+        previous_rows = measurements[-2].basic.rows if len(measurements) > 1 else 0
+        reason = stopped(measurements[-1], previous_rows, budget=math.inf)
+        if reason:
+            yield pair, measurements[-1].target, reason
+
+
+def report(pairs, results, sizes=SIZES):
+    rendered = table(pairs, results, sizes)
+    widths = [max(len(cells[i]) for cells in rendered) for i in range(len(rendered[0]))]
+    for cells in rendered:
+        print('  '.join(cell.ljust(width) if i in (1, 2, 3) else cell.rjust(width)
+                        for i, (cell, width) in enumerate(zip(cells, widths))).rstrip())
+    problems = list(stop_reasons(pairs, results))
+    if problems:
+        print()
+        for pair, target, reason in problems:
+            print(f"#{pair.number} stopped at {target or 'shipped size'}: {reason}")
+    differ = [pair for pair in pairs if _verdict(results[pair.number]) == 'differ']
+    for pair in differ:
+        print(f"#{pair.number} results differ: {_where(pair.basic)} / {_where(pair.advanced)}")
+
+
+def write_markdown(path, pairs, results, sizes, elapsed):
+    verdicts = [_verdict(results[pair.number]) for pair in pairs]
+    lines = [
+        '# Basic vs advanced solutions',
+        '',
+        f"{len(pairs)} pairs, {elapsed:.1f}s. Cells are the speedup of the advanced solution "
+        f"(basic time / advanced time) at each row count; (!) marks a size where the results differ. "
+        + ', '.join(f"{verdicts.count(v)} {v}" for v in ('equal', 'differ', 'unchecked', 'failed')) + '.',
+        '',
+    ]
+    rendered = table(pairs, results, sizes)
+    lines.append('| ' + ' | '.join(rendered[0]) + ' |')
+    lines.append('|' + '---|' * len(rendered[0]))
+    lines.extend('| ' + ' | '.join(cells) + ' |' for cells in rendered[1:])
+    problems = list(stop_reasons(pairs, results))
+    if problems:
+        lines += ['', '## Stopped', '']
+        lines.extend(f"- #{pair.number} at {target or 'shipped size'}: `{reason}`" for pair, target, reason in problems)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_json(path, pairs, results):
+    data = [{
+        'number': pair.number,
+        'basic': {'page': pair.basic.page, 'line': pair.basic.line, 'label': pair.basic.label},
+        'advanced': {'page': pair.advanced.page, 'line': pair.advanced.line, 'label': pair.advanced.label},
+        'heading': pair.basic.heading,
+        'result': _verdict(results[pair.number]),
+        'measurements': [{
+            'target': m.target,
+            'factor': m.factor,
+            'rows': m.basic.rows,
+            'speedup': speedup(m),
+            'equal': m.equal,
+            'basic': m.basic._asdict(),
+            'advanced': m.advanced._asdict(),
+        } for m in results[pair.number]],
+    } for pair in pairs]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def plot(pairs, results, path=COMPARE_PNG):
+    """行数に対する速度比の両対数グラフ（章ごとに色を分け、線の端に組の番号を書く）"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    chapters = sorted({extract.chapter_number(pair.basic.page) for pair in pairs})
+    colors = {chapter: f"C{i % 10}" for i, chapter in enumerate(chapters)}
+    fig, ax = plt.subplots(figsize=(12, 7))
+    labelled = set()
+    for pair in pairs:
+        points = [(m.basic.rows, speedup(m)) for m in results[pair.number]
+                  if speedup(m) is not None and m.basic.rows == m.advanced.rows]
+        if not points:
+            continue
+        chapter = extract.chapter_number(pair.basic.page)
+        rows, ratios = zip(*points)
+        # 色は 10 色で一周するので、2 周目は破線にして見分ける
+        style = {'color': colors[chapter], 'linestyle': '-' if chapters.index(chapter) < 10 else '--',
+                 'marker': 'o', 'linewidth': 1.5, 'alpha': 0.8}
+        if chapter not in labelled:
+            style['label'] = f"CH{chapter}"
+            labelled.add(chapter)
+        ax.plot(rows, ratios, **style)
+        ax.annotate(f"#{pair.number}", (rows[-1], ratios[-1]), xytext=(4, 0), textcoords='offset points',
+                    fontsize=7, va='center', color=colors[chapter])
+    ax.axhline(1, color='gray', linestyle='--', linewidth=1)
+    ax.text(0.01, 1, 'same speed', va='bottom', color='gray', transform=ax.get_yaxis_transform())
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xlabel('Rows (n)', fontsize=12)
+    ax.set_ylabel('Speedup (basic time / advanced time)', fontsize=12)
+    ax.set_title('Advanced vs Basic Solutions by Data Size', fontsize=14)
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(loc='upper left', fontsize=10)
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='基本解法と発展解法の解答例を、件数を増やしながら比べる')
+    parser.add_argument('patterns', nargs='*',
+                        help="比べるページのパターン（例: 'CH6-*'）。省略すると全ページ")
+    parser.add_argument('--max-rows', type=int, default=SIZES[-1],
+                        help=f'測る最大の行数（既定: {SIZES[-1]:.0e}。10^2 から 10 倍ずつ増やす）')
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help=f'この秒数を超えた組はそれより大きな件数で測らない（既定: {BUDGET}）')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT,
+                        help=f'準備・解法それぞれの制限時間（秒。既定: {TIMEOUT}）')
+    args = parser.parse_args(argv)
+    sizes = tuple(size for size in SIZES if size <= args.max_rows)
+    if not sizes:
+        parser.error(f"最大の行数は {SIZES[0]} 以上です: {args.max_rows}")
+
+    start = time.perf_counter()
+    pairs = find_pairs(extract.sessions(args.patterns))
+    if not pairs:
+        print("No solution pairs matched.", file=sys.stderr)
+        return 1
+    session.preload()
+    original_input = builtins.input
+    cwd = os.getcwd()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix='docexec-') as workdir, warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            os.chdir(workdir)
+            for pair in pairs:
+                results[pair.number] = compare_pair(pair, sizes, args.budget, args.timeout)
+    finally:
+        os.chdir(cwd)
+        builtins.input = original_input
+        session.reset()
+    elapsed = time.perf_counter() - start
+
+    report(pairs, results, sizes)
+    write_json(COMPARE_JSON, pairs, results)
+    write_markdown(COMPARE_MD, pairs, results, sizes, elapsed)
+    plot(pairs, results)
+    print(f"\n{len(pairs)} pairs compared up to {sizes[-1]:,} rows in {elapsed:.2f}s -> {COMPARE_MD}, {COMPARE_PNG}")
+    return 1 if any(_verdict(results[pair.number]) == 'differ' for pair in pairs) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
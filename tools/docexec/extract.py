@@ -0,0 +1,112 @@
+"""
+Markdown ページから ```python のコードブロックを取り出し、ページごとのセッションにまとめる
+
+ノートブックと同じく、同じページのブロックは上から順に 1 つの名前空間で実行する前提で書かれている
+（後のブロックが前のブロックで作った変数や import を使う）。そのためページを実行の単位（セッション）にする。
+取り出すのは行頭の ```python から ``` までで、```markdown などの中に書かれたものは対象にしない。
+"""
+
+import fnmatch
+import glob
+import os
+import re
+from collections import namedtuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DOCS_DIR = os.path.join(ROOT_DIR, 'docs')
+
+# コードブロックを実行するページ
+PAGE_NAMES = ('技術説明.md', '演習.md', '応用問題.md')
+
+# コードブロック 1 つ分
+#   page    : docs/ からの相対パス（区切りは '/'）
+#   index   : ページ内での番号（0 から）
+#   line    : コードの 1 行目の行番号（1 から）
+#   code    : コード
+#   heading : 直前の見出し（'問題 1-1' など）
+#   label   : 直前の太字の行（'基本解法（for ループ）' など。なければ ''）
+Block = namedtuple('Block', ['page', 'index', 'line', 'code', 'heading', 'label'])
+
+FENCE = re.compile(r'^(`{3,}|~{3,})\s*([\w+-]*)')
+HEADING = re.compile(r'^#{1,6}\s+(.*?)\s*#*\s*$')
+LABEL = re.compile(r'^\*\*(.+?)\*\*\s*$')
+
+
+def chapter_number(page):
+    """'CH6-Pandas応用/...' -> 6（CH で始まらなければ 0）"""
+    match = re.match(r'CH(\d+)', page)
+    return int(match.group(1)) if match else 0
+
+
+def _relative(path, docs_dir=DOCS_DIR):
+    return os.path.relpath(path, docs_dir).replace(os.sep, '/')
+
+
+def find_pages(patterns=(), docs_dir=DOCS_DIR):
+    """
+    CH*/Section*/ の実行対象のページを章・Section 順に返す（docs/ からの相対パス）
+
+    パターンは fnmatch 形式で、'CH6-*/Section4-*/演習.md' のように docs/ からの相対パスでも、
+    'CH6-*' のように先頭の部分だけでも指定できる。
+    """
+    pages = []
+    for name in PAGE_NAMES:
+        pages.extend(_relative(path, docs_dir)
+                     for path in glob.glob(os.path.join(docs_dir, 'CH*', 'Section*', name)))
+    pages.sort(key=lambda page: (chapter_number(page), page.rsplit('/', 1)[0],
+                                 PAGE_NAMES.index(page.rsplit('/', 1)[1])))
+    if not patterns:
+        return pages
+    return [page for page in pages
+            if any(fnmatch.fnmatchcase(page, pattern) or fnmatch.fnmatchcase(page, pattern.rstrip('/') + '/*')
+                   for pattern in patterns)]
+
+
+def extract_blocks(page, docs_dir=DOCS_DIR):
+    """ページの Python のコードブロックを上から順に Block のリストで返す"""
+    with open(os.path.join(docs_dir, page), encoding='utf-8') as f:
+        lines = f.read().splitlines()
+
+    blocks = []
+    heading = ''
+    label = ''
+    fence = None
+    for number, line in enumerate(lines, 1):
+        if fence is None:
+            match = FENCE.match(line)
+            if match:
+                fence = (match.group(1), match.group(2).lower() == 'python', number, [])
+                continue
+            if HEADING.match(line):
+                heading, label = HEADING.match(line).group(1), ''
+            elif LABEL.match(line):
+                label = LABEL.match(line).group(1).rstrip(':：').strip()
+            elif line.strip():
+                label = ''
+            continue
+
+        marker, is_python, start, body = fence
+        if line.strip() == marker or (line.startswith(marker) and not line.strip(marker[0]).strip()):
+            if is_python:
+                blocks.append(Block(page, len(blocks), start + 1, '\n'.join(body) + '\n', heading, label))
+            fence = None
+            label = ''
+            continue
+        body.append(line)
+    return blocks
+
+
+def sessions(patterns=(), docs_dir=DOCS_DIR):
+    """{ページ: [Block]}（コードブロックのないページは含めない）"""
+    result = {}
+    for page in find_pages(patterns, docs_dir):
+        blocks = extract_blocks(page, docs_dir)
+        if blocks:
+            result[page] = blocks
+    return result
+
+
+def block_id(block):
+    """'CH6-.../演習.md#3' の形の名前"""
+    return f"{block.page}#{block.index}"
+
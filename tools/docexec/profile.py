@@ -0,0 +1,253 @@
+"""
+docs/ のコードブロックの実行時間と確保したメモリを、教材の件数と件数を増やした場合の 2 通りで測り、
+件数を増やしたときに時間のかかる順に並べる
+
+    python -m docexec.profile                          # 全ページ、件数 100 倍
+    python -m docexec.profile 'CH4-*' 'CH5-*' 'CH6-*' --scale 1000 --top 30
+    python -m docexec.profile --timeout 60             # 件数を増やした実行も最後まで測る
+
+各ページを次の 2 通りの件数で実行する:
+  shipped : 教材に書かれたままのコード
+  scaled  : データの件数を --scale 倍に書き換えたコード（docexec.scaling）
+キャッシュ（docexec.cache）は使わない。tracemalloc で測っている間は Python のコードが遅くなり、
+遅くなり方もコードによって違うので、それぞれの件数で 2 回実行し、時間はメモリを測らない実行から、
+メモリは tracemalloc を使う実行（session.run_block の measure）から取る。
+
+growth は件数を k 倍にしたときの時間の増え方の指数（log(scaled / shipped) / log(k)）で、
+1 ならデータの件数に比例、2 なら 2 乗で増えている。shipped が MIN_SECONDS 未満のブロックは
+誤差が大きいので求めない。
+教材の件数で ok だったブロックだけを順位に入れ、件数を増やして制限時間を超えたものを先頭に、
+あとは scaled の時間の長い順に並べる。件数を増やしたときだけ失敗したブロックは別に数える。
+pattern 列には、ブロックに含まれる時間が増えやすい書き方（PATTERNS）を示す。
+
+結果は .docexec/profile.json と、順位表を Markdown にした .docexec/profile.md に書き出す。
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from . import cache, extract, run, session
+
+# 件数の倍率の既定値
+SCALE = 100
+
+# これより短い時間（秒）からは growth を求めない
+MIN_SECONDS = 0.001
+
+PROFILE_JSON = os.path.join(cache.STATE_DIR, 'profile.json')
+PROFILE_MD = os.path.join(cache.STATE_DIR, 'profile.md')
+
+# 件数が増えると時間がかかりやすい書き方
+PATTERNS = (
+    ('for-range', re.compile(r'\bfor\s+[\w, ]+\s+in\s+range\(')),
+    ('iterrows', re.compile(r'\.iterrows\(')),
+    ('itertuples', re.compile(r'\.itertuples\(')),
+    ('apply', re.compile(r'\.apply\(')),
+    ('while', re.compile(r'^\s*while\b', re.M)),
+)
+
+# ブロック 1 つ分の測定結果
+#   block    : extract.Block
+#   shipped  : 教材の件数で実行した session.Result
+#   scaled   : 件数を増やして実行した session.Result
+#   patterns : ブロックに含まれる PATTERNS の名前
+Row = namedtuple('Row', ['block', 'shipped', 'scaled', 'patterns'])
+
+
+def patterns_of(code):
+    return [name for name, pattern in PATTERNS if pattern.search(code)]
+
+
+def measure_session(page, blocks, timeout, scale=1):
+    """
+    ページを実行して Result のリストを返す
+
+    時間はメモリを測らない実行の値、peak は tracemalloc を使った 2 回目の実行の値にする。
+    2 回の status が違うブロック（測っている間だけ制限時間を超えたなど）の peak は None にする。
+    """
+    timed = session.run_session(page, blocks, timeout, use_cache=False, scale=scale)
+    traced = session.run_session(page, blocks, timeout, use_cache=False, scale=scale, measure=True)
+    return [result._replace(peak=memory.peak if memory.status == result.status else None)
+            for result, memory in zip(timed, traced)]
+
+
+def profile_session(page, blocks, factor, timeout):
+    """ページを教材の件数と factor 倍の件数で実行し、(shipped の Result, scaled の Result) を返す"""
+    shipped = measure_session(page, blocks, timeout)
+    scaled = measure_session(page, blocks, timeout, factor)
+    return shipped, scaled
+
+
+def profile_sessions(sessions, factor, jobs, timeout=session.TIMEOUT):
+    """全ページを測って Row のリストをページ順に返す"""
+    order = run.schedule(sessions, run.load_results())
+    if jobs <= 1:
+        measured = {page: profile_session(page, sessions[page], factor, timeout) for page in order}
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=session.preload) as pool:
+            futures = {page: pool.submit(profile_session, page, sessions[page], factor, timeout)
+                       for page in order}
+            measured = {page: future.result() for page, future in futures.items()}
+
+    rows = []
+    for page, blocks in sessions.items():
+        shipped, scaled = measured[page]
+        rows.extend(Row(block, a, b, patterns_of(block.code)) for block, a, b in zip(blocks, shipped, scaled))
+    return rows
+
+
+def growth(row, factor):
+    """件数を factor 倍にしたときの時間の増え方の指数（求められなければ None）"""
+    if row.scaled.status != 'ok' or row.shipped.seconds < MIN_SECONDS:
+        return None
+    return math.log(row.scaled.seconds / row.shipped.seconds) / math.log(factor)
+
+
+def rank(rows):
+    """教材の件数で ok だったブロックを、制限時間を超えたもの、scaled の時間の長い順に並べる"""
+    ranked = [row for row in rows if row.shipped.status == 'ok' and row.scaled.status in ('ok', 'timeout')]
+    return sorted(ranked, key=lambda row: (row.scaled.status != 'timeout', -row.scaled.seconds))
+
+
+def _seconds(result):
+    if result.status == 'timeout':
+        return f">{result.seconds:.0f}s"
+    return f"{result.seconds * 1000:.1f}ms" if result.seconds < 1 else f"{result.seconds:.2f}s"
+
+
+def _size(nbytes):
+    if nbytes is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB'):
+        if nbytes < 1024:
+            return f"{nbytes:.0f}{unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f}GB"
+
+
+def _growth(value):
+    return '-' if value is None else f"{value:.2f}"
+
+
+def table(rows, factor):
+    """順位表の行（見出しを含む文字列のリスト）"""
+    header = ['#', 'block', 'scaled', 'shipped', 'growth', 'peak scaled', 'peak shipped', 'patterns']
+    lines = [header]
+    for number, row in enumerate(rows, 1):
+        lines.append([str(number), f"{row.block.page}:{row.block.line}", _seconds(row.scaled),
+                      _seconds(row.shipped), _growth(growth(row, factor)), _size(row.scaled.peak),
+                      _size(row.shipped.peak), ', '.join(row.patterns)])
+    return lines
+
+
+def pattern_summary(rows):
+    """{パターン: (ブロック数, scaled の合計秒数)}"""
+    summary = {}
+    for name, _ in PATTERNS:
+        matched = [row for row in rows if name in row.patterns]
+        summary[name] = (len(matched), sum(row.scaled.seconds for row in matched))
+    return summary
+
+
+def write_markdown(path, rows, ranked, factor, top, elapsed):
+    failed_scaled = [row for row in rows if row.shipped.status == 'ok' and row.scaled.status == 'failed']
+    lines = [
+        '# Documentation example profile',
+        '',
+        f"{len(rows)} blocks, data sizes scaled x{factor}, {elapsed:.1f}s. "
+        f"{sum(row.scaled.status == 'timeout' for row in ranked)} block(s) hit the time limit at scale; "
+        f"{len(failed_scaled)} block(s) failed only at scale.",
+        '',
+        '## Slowest blocks at scale',
+        '',
+    ]
+    rendered = table(ranked[:top], factor)
+    lines.append('| ' + ' | '.join(rendered[0]) + ' |')
+    lines.append('|' + '---|' * len(rendered[0]))
+    lines.extend('| ' + ' | '.join(cells) + ' |' for cells in rendered[1:])
+    lines += ['', '## Patterns', '', '| pattern | blocks | scaled total |', '|---|---|---|']
+    for name, (count, seconds) in pattern_summary(ranked).items():
+        lines.append(f"| {name} | {count} | {seconds:.2f}s |")
+    if failed_scaled:
+        lines += ['', '## Failed only at scale', '']
+        lines.extend(f"- {row.block.page}:{row.block.line} `{run.first_line(row.scaled.error)}`"
+                     for row in failed_scaled)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_json(path, rows, factor):
+    data = {
+        'scale': factor,
+        'blocks': [{
+            'page': row.block.page,
+            'line': row.block.line,
+            'heading': row.block.heading,
+            'label': row.block.label,
+            'patterns': row.patterns,
+            'growth': growth(row, factor),
+            'shipped': {key: getattr(row.shipped, key) for key in ('status', 'seconds', 'peak')},
+            'scaled': {key: getattr(row.scaled, key) for key in ('status', 'seconds', 'peak')},
+        } for row in rows],
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+
+def report(ranked, factor, top):
+    rendered = table(ranked[:top], factor)
+    widths = [max(len(cells[i]) for cells in rendered) for i in range(len(rendered[0]))]
+    for cells in rendered:
+        print('  '.join(cell.ljust(width) if i in (1, 7) else cell.rjust(width)
+                        for i, (cell, width) in enumerate(zip(cells, widths))).rstrip())
+    print()
+    for name, (count, seconds) in pattern_summary(ranked).items():
+        print(f"{name:<12}{count:>5} blocks{seconds:>10.2f}s at scale")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='docs/ のコードブロックの時間とメモリを、件数を増やして測る')
+    parser.add_argument('patterns', nargs='*',
+                        help="測るページのパターン（例: 'CH6-*'）。省略すると全ページ")
+    parser.add_argument('--scale', type=int, default=SCALE,
+                        help=f'データの件数の倍率（既定: {SCALE}）')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='ワーカープロセス数（既定: CPU コア数）')
+    parser.add_argument('--timeout', type=float, default=session.TIMEOUT,
+                        help=f'1 ブロックの制限時間（秒。既定: {session.TIMEOUT}）')
+    parser.add_argument('--top', type=int, default=20,
+                        help='表示する件数（既定: 20。profile.md にも同じ件数を書く）')
+    args = parser.parse_args(argv)
+    if args.scale <= 1:
+        parser.error(f"倍率は 2 以上の整数です: {args.scale}")
+    factor = args.scale
+
+    start = time.perf_counter()
+    sessions = extract.sessions(args.patterns)
+    if not sessions:
+        print("No pages matched.", file=sys.stderr)
+        return 1
+    jobs = max(1, min(args.jobs, len(sessions)))
+    rows = profile_sessions(sessions, factor, jobs, args.timeout)
+    ranked = rank(rows)
+    elapsed = time.perf_counter() - start
+
+    report(ranked, factor, args.top)
+    write_json(PROFILE_JSON, rows, factor)
+    write_markdown(PROFILE_MD, rows, ranked, factor, args.top, elapsed)
+    print(f"\n{len(rows)} blocks in {len(sessions)} pages profiled at x1 and x{factor} "
+          f"in {elapsed:.2f}s -> {PROFILE_MD}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
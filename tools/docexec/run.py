@@ -0,0 +1,170 @@
+"""
+docs/ の各ページの Python のコードブロックを、ページごとのセッションとしてプロセスプールで並列に実行する
+
+    python -m docexec.run                           # CPU コア数のワーカーで全ページ
+    python -m docexec.run 'CH6-*'                   # パターンに一致するページだけ
+    python -m docexec.run 'CH6-*/Section4-*/演習.md' -v  # 失敗したブロックのトレースバックと出力も表示する
+    python -m docexec.run --jobs 1 --timeout 60     # 1 プロセスで、1 ブロック 60 秒まで
+
+ワーカーは起動時に numpy・pandas・matplotlib を読み込んで温めておき（session.preload）、
+同じワーカーでページを次々に実行する。ページの中のブロックは上から順に 1 つの名前空間で実行する。
+時間のかかるページ（前回の記録がなければブロックの多いページ）から先に割り当て、
+結果はページ順に表示する。
+
+前回と同じブロックは実行せずにキャッシュの結果を使い、書き換えたブロックとその後ろのブロックだけを実行する
+（docexec.cache を参照）。すべて実行し直すときは --no-cache を付ける。
+パターンを付けずに全ページを実行したときは、どのページにも使われていないキャッシュを消す。
+
+結果は .docexec/results.json に残る（Git 管理外）。failed / timeout のブロックがあると終了コード 1 を返す。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import cache, extract, session
+
+RESULTS_PATH = os.path.join(cache.STATE_DIR, 'results.json')
+
+# 終了コード 1 にする status
+FAILING = ('failed', 'timeout')
+
+
+def load_results(path=RESULTS_PATH):
+    """前回の結果 {ページ: [Result]}（なければ空）"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {page: [session.Result(**result) for result in results] for page, results in data.items()}
+
+
+def save_results(results, path=RESULTS_PATH):
+    """今回実行したページの結果を、前回の結果に上書きして保存する"""
+    data = {page: [result._asdict() for result in page_results]
+            for page, page_results in load_results(path).items()}
+    data.update({page: [result._asdict() for result in page_results] for page, page_results in results.items()})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def schedule(sessions, previous):
+    """時間がかかりそうなページから順に並べる（前回の秒数、なければブロック数で見積もる）"""
+    def cost(page):
+        if page in previous:
+            return sum(result.seconds for result in previous[page])
+        return len(sessions[page])
+    return sorted(sessions, key=cost, reverse=True)
+
+
+def run_sessions(sessions, jobs, timeout=session.TIMEOUT, previous=None, use_cache=True):
+    """全ページを実行して {ページ: [Result]} を返す"""
+    order = schedule(sessions, previous or {})
+    if jobs <= 1:
+        return {page: session.run_session(page, sessions[page], timeout, use_cache=use_cache) for page in order}
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=session.preload) as pool:
+        futures = {page: pool.submit(session.run_session, page, sessions[page], timeout, use_cache=use_cache)
+                   for page in order}
+        return {page: future.result() for page, future in futures.items()}
+
+
+def prune_cache(sessions):
+    """sessions のブロックのキーにないキャッシュを消し、消した数を返す"""
+    environment = cache.environment_key(session.settings())
+    keep = set()
+    for page, blocks in sessions.items():
+        keep.update(cache.block_keys(environment, page, blocks))
+    return cache.prune(keep)
+
+
+def first_line(error):
+    """トレースバックの最後の行（例外の種類とメッセージ）"""
+    return error.strip().splitlines()[-1] if error else ''
+
+
+def _indent(text, prefix='    '):
+    return ''.join(prefix + line for line in text.rstrip().splitlines(True)) + '\n'
+
+
+def report(sessions, results, elapsed, jobs, verbose=False, slowest=10):
+    """ページ順に失敗したブロックを表示し、status ごとの件数を返す"""
+    counts = dict.fromkeys(session.STATUSES, 0)
+    timings = []
+    cached = 0
+    for page, blocks in sessions.items():
+        first_failure = None
+        for block, result in zip(blocks, results[page]):
+            counts[result.status] += 1
+            cached += result.cached
+            timings.append((result.seconds, block, result.cached))
+            if result.status not in FAILING and not (verbose and result.status != 'ok'):
+                continue
+            where = f"{page}:{block.line}"
+            context = ' / '.join(part for part in (block.heading, block.label) if part)
+            message = first_line(result.error)
+            # 前のブロックが失敗して変数が作られなかったときの NameError は、その失敗の影響と分かるようにする
+            if first_failure is not None and message.startswith('NameError'):
+                message += f"  (after the failure at line {first_failure})"
+            if result.status in FAILING and first_failure is None:
+                first_failure = block.line
+            print(f"{result.status.upper():<9}{where}  ({context})")
+            print(f"         {message}")
+            if verbose:
+                sys.stdout.write(_indent(result.error or ''))
+                if result.output:
+                    print("    --- output ---")
+                    sys.stdout.write(_indent(result.output))
+
+    if slowest:
+        print("\nSlowest blocks:")
+        for seconds, block, _ in sorted(timings, key=lambda item: item[0], reverse=True)[:slowest]:
+            print(f"  {seconds:>7.2f}s  {block.page}:{block.line}")
+
+    busy = sum(seconds for seconds, _, from_cache in timings if not from_cache)
+    summary = ', '.join(f"{counts[status]} {status}" for status in session.STATUSES)
+    print(f"\n{len(timings)} blocks in {len(sessions)} pages: {summary} "
+          f"in {elapsed:.2f}s (jobs={jobs}, {len(timings) - cached} run in {busy:.2f}s, {cached} cached)")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='docs/ のページの Python のコードブロックを並列に実行して確かめる')
+    parser.add_argument('patterns', nargs='*',
+                        help="実行するページのパターン（例: 'CH6-*', 'CH6-*/Section4-*/演習.md'）。省略すると全ページ")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='ワーカープロセス数（既定: CPU コア数）')
+    parser.add_argument('--timeout', type=float, default=session.TIMEOUT,
+                        help=f'1 ブロックの制限時間（秒。既定: {session.TIMEOUT}）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='キャッシュを使わずにすべてのブロックを実行する（結果もキャッシュしない）')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='失敗以外（expected / input）も含めて、トレースバックと出力を表示する')
+    parser.add_argument('--slowest', type=int, default=10,
+                        help='時間のかかったブロックを何件表示するか（既定: 10）')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    sessions = extract.sessions(args.patterns)
+    if not sessions:
+        print("No pages matched.", file=sys.stderr)
+        return 1
+    jobs = max(1, min(args.jobs, len(sessions)))
+    results = run_sessions(sessions, jobs, args.timeout, load_results(), use_cache=not args.no_cache)
+    save_results(results)
+    if not args.patterns and not args.no_cache:
+        prune_cache(sessions)
+
+    counts = report(sessions, results, time.perf_counter() - start, jobs, args.verbose, args.slowest)
+    return 1 if any(counts[status] for status in FAILING) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
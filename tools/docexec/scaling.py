@@ -0,0 +1,150 @@
+"""
+コードブロックのデータの件数を、ソースを書き換えて factor 倍にする（docexec.profile・docexec.compare で使う）
+
+教材の例は小さなデータで書かれているので、件数を増やしたときに時間やメモリがどう増えるかを見るため、
+ast で次の「件数」の部分だけを factor 倍にしてから実行する（件数は MAX_COUNT で頭打ちにする）:
+
+  - range(N) / np.arange(N) の終わりの値
+  - np.random.rand(N) / randn(N) / normal(μ, σ, N) / randint(a, b, N) / choice(a, N) などの件数の引数、
+    np.zeros(N) / np.linspace(a, b, N) など
+  - size= / periods= / num= のキーワード引数（pd.date_range(..., periods=N) など）
+  - pd.DataFrame / pd.Series / np.array に直接書いたリスト（[...] を [...] * factor にする。
+    {'列': [...]} の形なら各列のリストを同じ倍率にするので、列の長さはそろったまま。
+    pd.to_datetime([...]) のように関数に通したリストも同じ倍率にする）
+  - df['列'] = [...] のように列に代入するリスト
+  - data = {'列': [...], ...} のように、コンストラクタに渡す前に変数に入れた列のリストの dict
+
+書き換えるのは整数・リストのリテラルだけで、len(df) のように前のデータから決まる件数はそのまま増える。
+MIN_COUNT 未満の整数（range(3) の繰り返しや rand(3) の形など）は書き換えない。ただし DataFrame などの
+コンストラクタに渡すデータの中では、列の長さがそろうように MIN_COUNT 未満の件数も書き換える。
+range(start, stop) は要素の数が factor 倍になるように stop を start + (stop - start) * factor にする。
+件数を増やすと成り立たなくなる例（index に書いた 3 つのラベルを参照するなど）は、倍率を上げた実行だけが失敗する。
+リストを繰り返すとキーも重複するので、そのキーで merge / join する例は結果の行数が factor の 2 乗で増える。
+"""
+
+import ast
+
+# この値以上の整数リテラルだけを件数とみなす
+MIN_COUNT = 10
+
+# 書き換えた後の件数の上限（元の件数がこれより大きければ元のまま）
+MAX_COUNT = 10 ** 7
+
+# 関数名: 件数を表す位置引数の番号
+SIZE_ARGS = {
+    'rand': 0, 'randn': 0, 'standard_normal': 0, 'random': 0,
+    'zeros': 0, 'ones': 0, 'empty': 0, 'full': 0,
+    'choice': 1, 'poisson': 1, 'exponential': 1,
+    'normal': 2, 'uniform': 2, 'randint': 2, 'integers': 2, 'binomial': 2, 'lognormal': 2,
+    'linspace': 2,
+}
+
+# range(start, stop) のように、引数が 1 つなら 0 番目、2 つ以上なら 1 番目が終わりの値になる関数
+RANGE_FUNCS = ('range', 'arange')
+
+SIZE_KEYWORDS = ('size', 'periods', 'num')
+
+# 直接書いたリストを繰り返して件数を増やすコンストラクタ
+CONSTRUCTORS = ('DataFrame', 'Series', 'array')
+CONSTRUCTOR_KEYWORDS = ('data', 'index')
+
+
+def call_name(call):
+    """呼び出している関数の名前（pd.DataFrame(...) なら 'DataFrame'。名前がなければ None）"""
+    func = call.func
+    return func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+
+
+def _is_int(node):
+    return isinstance(node, ast.Constant) and type(node.value) is int
+
+
+def _is_table(node):
+    """{'列': [...], '列': range(...)} の形の dict（DataFrame に渡すデータ）か"""
+    return (isinstance(node, ast.Dict) and node.values
+            and all(isinstance(value, (ast.List, ast.Call)) for value in node.values)
+            and any(isinstance(value, ast.List) and len(value.elts) >= 2 for value in node.values))
+
+
+class ScaleSizes(ast.NodeTransformer):
+    """件数のリテラルを factor 倍にする。書き換えた箇所の数を changes に数える"""
+
+    def __init__(self, factor):
+        self.factor = factor
+        self.changes = 0
+        self.min_count = MIN_COUNT
+
+    def _count(self, node, start=0):
+        """start から node までの件数を factor 倍にした終わりの値"""
+        if not _is_int(node) or not self.min_count <= node.value - start < MAX_COUNT:
+            return node
+        self.changes += 1
+        count = min((node.value - start) * self.factor, MAX_COUNT)
+        return ast.copy_location(ast.Constant(start + count), node)
+
+    def _repeat(self, node):
+        """[...] -> [...] * factor、{'列': [...]} -> 各列のリストを factor 倍"""
+        if isinstance(node, ast.List) and len(node.elts) >= 2:
+            self.changes += 1
+            repeated = ast.BinOp(left=node, op=ast.Mult(), right=ast.Constant(self.factor))
+            return ast.copy_location(repeated, node)
+        if isinstance(node, ast.Dict):
+            node.values = [self._repeat(value) for value in node.values]
+        elif isinstance(node, ast.Call) and node.args and isinstance(node.args[0], ast.List):
+            # {'日付': pd.to_datetime([...])} のように、リストを関数に通してから渡す列
+            node.args[0] = self._repeat(node.args[0])
+        return node
+
+    def _visit_data(self, node):
+        """データの中の件数は、列の長さがそろうように小さくても書き換える"""
+        saved, self.min_count = self.min_count, 1
+        self.generic_visit(node)
+        self.min_count = saved
+
+    def visit_Call(self, node):
+        name = call_name(node)
+        if name in CONSTRUCTORS:
+            self._visit_data(node)
+        else:
+            self.generic_visit(node)
+
+        if name in RANGE_FUNCS and len(node.args) == 1:
+            node.args[0] = self._count(node.args[0])
+        elif name in RANGE_FUNCS and node.args:
+            start = node.args[0].value if _is_int(node.args[0]) else 0
+            node.args[1] = self._count(node.args[1], start)
+        elif name in SIZE_ARGS and len(node.args) > SIZE_ARGS[name]:
+            position = SIZE_ARGS[name]
+            node.args[position] = self._count(node.args[position])
+        elif name in CONSTRUCTORS and node.args:
+            node.args[0] = self._repeat(node.args[0])
+
+        for keyword in node.keywords:
+            if keyword.arg in SIZE_KEYWORDS:
+                keyword.value = self._count(keyword.value)
+            elif name in CONSTRUCTORS and keyword.arg in CONSTRUCTOR_KEYWORDS:
+                keyword.value = self._repeat(keyword.value)
+        return node
+
+    def visit_Assign(self, node):
+        if _is_table(node.value):
+            self._visit_data(node)
+            node.value = self._repeat(node.value)
+            return node
+        self.generic_visit(node)
+        if all(isinstance(target, ast.Subscript) for target in node.targets):
+            node.value = self._repeat(node.value)
+        return node
+
+
+def scale_tree(tree, factor):
+    """ast のモジュールの件数を factor 倍にして (tree, 書き換えた箇所の数) を返す（tree はその場で書き換える）"""
+    transformer = ScaleSizes(factor)
+    tree = ast.fix_missing_locations(transformer.visit(tree))
+    return tree, transformer.changes
+
+
+def scale_source(source, factor):
+    """ソースの件数を factor 倍にしたソース（確認用）"""
+    tree, _ = scale_tree(ast.parse(source), factor)
+    return ast.unparse(tree)
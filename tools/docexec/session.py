@@ -0,0 +1,416 @@
+"""
+1 ページ分のコードブロックを、1 つの名前空間で上から順に実行する（ワーカープロセスの中で動く）
+
+ワーカーは起動時に preload() で numpy・pandas・matplotlib（Agg）などを読み込んでおき、
+ページ（セッション）ごとに run_session() を呼ぶ。ページの間では名前空間を捨て、
+matplotlib の rcParams・pandas のオプション・乱数の種を元に戻すので、前のページの影響は残らない。
+
+ノートブックで実行したときと同じになるように、次のように扱う:
+  - 最後の文が式なら、その値の repr を出力する（None は出力しない）
+  - ブロックを実行し終えるたびに図をすべて閉じる（plt.show() は何もしない）
+  - 行頭の ! と %（シェルコマンドとマジック）は実行しない
+  - 作業ディレクトリはページごとの一時ディレクトリ（to_csv で書いたファイルは同じページの中だけで読める）
+  - input() は INPUT_VALUE を返し、INPUT_LIMIT 回を超えたら止める
+  - sns.load_dataset('tips') などは、CH8 の sampledata に保存してあればそこから読む（ネットワークを使わない）
+
+結果の status:
+  ok       : 最後まで実行できた
+  expected : 例外で止まるか制限時間を超えたが、わざと失敗させている例だと分かる。
+             例外の名前がブロックのコメントに書かれている（# ZeroDivisionError! など）か、
+             見出し・直前の太字・コメントにある EXPECTED_MARKERS の印が、その例外を表しているとき
+             （❌ の例ならコードの誤りで起きる例外、穴埋めの問題なら SyntaxError / NameError、
+             無限ループの例なら制限時間切れ）。見出しが SYNTAX_HEADINGS（書き方だけを示す擬似コード）のときは
+             SyntaxError / NameError。
+             ファイルやネットワークの例外（OSError。URLError も含む）と、前のブロックが失敗したために
+             定義されていない名前の NameError は、印があっても expected にしない
+  input    : input() を INPUT_LIMIT 回呼んでも終わらなかった（対話的な例）
+  timeout  : TIMEOUT 秒を超えた
+  failed   : それ以外の例外で止まった
+"""
+
+import ast
+import builtins
+import contextlib
+import hashlib
+import importlib
+import io
+import os
+import random
+import re
+import signal
+import sys
+import tempfile
+import time
+import tracemalloc
+import traceback
+import warnings
+from collections import namedtuple
+
+from . import cache, extract, scaling
+
+PRELOAD_MODULES = (
+    'numpy',
+    'pandas',
+    'matplotlib.pyplot',
+    'matplotlib.font_manager',
+)
+
+# 入っていれば読み込んでおくモジュール
+OPTIONAL_MODULES = ('seaborn', 'japanize_matplotlib')
+
+# CH8 のデータセットの保存先（sampledata パッケージのあるディレクトリ）
+SAMPLEDATA_DIR = os.path.join(extract.DOCS_DIR, 'CH8-総合演習')
+
+# 1 ブロックの制限時間（秒）。教材の例はどれも数秒で終わる
+TIMEOUT = 10
+
+# input() が返す値と、1 ブロックで呼べる回数
+INPUT_VALUE = '1'
+INPUT_LIMIT = 20
+
+# 結果に残す出力の長さ（文字数）
+OUTPUT_LIMIT = 20000
+
+# セッションの始めに設定する乱数の種
+SEED = 0
+
+STATUSES = ('ok', 'expected', 'input', 'timeout', 'failed')
+
+# キャッシュしない status（ネットワークや時間など、実行した環境によって変わりうる結果）
+UNCACHED = ('timeout', 'failed')
+
+# ブロック 1 つ分の実行結果
+#   index   : Block.index
+#   status  : STATUSES のどれか
+#   seconds : 実行にかかった秒数
+#   output  : 標準出力と標準エラー出力（OUTPUT_LIMIT 文字まで）
+#   error   : 例外のトレースバック（なければ None）
+#   peak    : 実行中に確保したメモリの最大値（バイト。measure=True で実行したときだけ。ほかは None）
+#             measure=True の seconds は tracemalloc の分だけ長い
+#   cached  : 実行せずにキャッシュ（docexec.cache）から読んだ結果か（seconds は実行したときの秒数）
+Result = namedtuple('Result', ['index', 'status', 'seconds', 'output', 'error', 'peak', 'cached'],
+                    defaults=(None, False))
+
+MAGIC = re.compile(r'^(\s*)[!%].*$', re.M)
+
+
+class BlockTimeout(BaseException):
+    """制限時間を超えた（ブロックの except Exception で捕まらないように BaseException から派生させる）"""
+
+
+class InputExhausted(EOFError):
+    """input() を INPUT_LIMIT 回より多く呼んだ"""
+
+
+# 書きかけのコード（穴埋めの問題や擬似コード）で起きる例外
+TEMPLATE_ERRORS = (SyntaxError, NameError)
+
+# ❌ の例のような、コードそのものの誤りで起きる例外
+MISTAKE_ERRORS = (SyntaxError, NameError, TypeError, ValueError, ArithmeticError, LookupError, AttributeError)
+
+# 見出し・直前の太字・コメントにあれば、わざと失敗させている例とみなす言葉と、その例で起きてよい例外
+EXPECTED_MARKERS = {
+    '❌': MISTAKE_ERRORS,
+    'エラー例': MISTAKE_ERRORS,
+    'エラー:': MISTAKE_ERRORS,
+    'エラーになる': MISTAKE_ERRORS,
+    '無限ループ': (BlockTimeout,),
+    'ここにコードを書く': TEMPLATE_ERRORS,
+}
+
+# 実行できない書き方の説明（擬似コード）を置いている見出し
+SYNTAX_HEADINGS = ('構文',)
+
+# 印やコメントがあっても、わざと失敗させている例とはみなさない例外（実行する環境の問題）
+ENVIRONMENT_ERRORS = (OSError,)
+
+
+class FakeInput:
+    """input() の代わり。プロンプトを出力して INPUT_VALUE を返す"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, prompt=''):
+        self.calls += 1
+        if self.calls > INPUT_LIMIT:
+            raise InputExhausted(f"input() was called more than {INPUT_LIMIT} times")
+        print(f"{prompt}{INPUT_VALUE}")
+        return INPUT_VALUE
+
+
+def settings():
+    """実行結果に影響する、このモジュールの設定（docexec.cache のキーに含める）"""
+    with open(__file__, 'rb') as f:
+        source = hashlib.sha256(f.read()).hexdigest()
+    store = _sampledata()
+    return {
+        'session': source,
+        'input': [INPUT_VALUE, INPUT_LIMIT],
+        'seed': SEED,
+        'output_limit': OUTPUT_LIMIT,
+        'sampledata': store.fingerprint() if store else None,
+    }
+
+
+def _sampledata():
+    """CH8 の sampledata.store モジュール（読み込めなければ None）"""
+    sys.path.insert(0, SAMPLEDATA_DIR)
+    try:
+        return importlib.import_module('sampledata.store')
+    except ImportError:
+        return None
+    finally:
+        sys.path.remove(SAMPLEDATA_DIR)
+
+
+_preloaded = False
+
+
+def preload():
+    """重いモジュールを読み込み、1 枚描いてフォントキャッシュとレンダラを温める（2 回目からは何もしない）"""
+    global _preloaded
+
+    if _preloaded:
+        return
+    _preloaded = True
+    import matplotlib
+    matplotlib.use('Agg')
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    for name in OPTIONAL_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+    store = _sampledata()
+    if store is not None and 'seaborn' in sys.modules:
+        # 保存していないデータセットは、これまでどおり seaborn がダウンロードする
+        store.install(fallback=True)
+
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(2, 1))
+    ax.plot([0, 1], [0, 1])
+    ax.set_title('warm up')
+    fig.savefig(io.BytesIO(), format='png')
+    plt.close(fig)
+
+
+def reset():
+    """ページの間で、前のページが変えたライブラリの状態を元に戻す"""
+    import matplotlib
+    import matplotlib.pyplot as plt
+    import numpy as np
+    import pandas as pd
+
+    plt.close('all')
+    matplotlib.rcdefaults()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        pd.reset_option('all')
+    np.random.seed(SEED)
+    random.seed(SEED)
+
+
+@contextlib.contextmanager
+def deadline(seconds):
+    """seconds 秒を超えたら BlockTimeout を送る（SIGALRM が使える環境だけ）"""
+    if not seconds or not hasattr(signal, 'setitimer'):
+        yield
+        return
+
+    def expire(signum, frame):
+        raise BlockTimeout(f"block did not finish in {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def compile_block(block, path, scale=1):
+    """
+    ブロックを (文のコード, 最後の式のコード または None) にコンパイルする
+
+    ファイル名は Markdown のパス、行番号はページの行番号にそろえるので、トレースバックにページの行が出る。
+    scale が 1 でなければ、データの件数を scale 倍に書き換える（docexec.scaling）。
+    """
+    source = '\n' * (block.line - 1) + MAGIC.sub(r'\1pass', block.code)
+    tree = ast.parse(source, filename=path)
+    if scale != 1:
+        tree, _ = scaling.scale_tree(tree, scale)
+    last = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        last = ast.Expression(tree.body.pop().value)
+        last = compile(last, path, 'eval')
+    return compile(tree, path, 'exec'), last
+
+
+def _comments(block):
+    return ' '.join(line.split('#', 1)[1] for line in block.code.splitlines() if '#' in line)
+
+
+def _allowed(block):
+    """見出し・直前の太字・コメントの印から、この例で起きてよい例外のクラスのタプル"""
+    text = ' '.join((block.heading, block.label, _comments(block)))
+    allowed = TEMPLATE_ERRORS if block.heading in SYNTAX_HEADINGS else ()
+    for marker, errors in EXPECTED_MARKERS.items():
+        if marker in text:
+            allowed += errors
+    return allowed
+
+
+def _expected(block, error, defined=frozenset()):
+    """
+    わざと失敗させている例の例外か
+
+    例外（またはその基底クラス）の名前がブロックのコメントに書かれているか、印が表す例外なら True。
+    ENVIRONMENT_ERRORS と、defined（前のブロックで定義しているはずの名前）の NameError は False。
+    """
+    if isinstance(error, ENVIRONMENT_ERRORS):
+        return False
+    if isinstance(error, NameError) and getattr(error, 'name', None) in defined:
+        # 前のブロックが失敗して、定義されなかった名前を使っている
+        return False
+    comments = _comments(block)
+    names = [cls.__name__ for cls in type(error).__mro__ if cls not in (Exception, BaseException, object)]
+    return isinstance(error, _allowed(block)) or any(re.search(rf'\b{name}\b', comments) for name in names)
+
+
+def bound_names(block):
+    """ブロックがモジュール直下で定義する名前の集合（構文エラーのブロックは空）"""
+    try:
+        tree = ast.parse(MAGIC.sub(r'\1pass', block.code))
+    except SyntaxError:
+        return set()
+    names = set()
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            # 関数やクラスの中の名前はローカル
+            names.add(node.name)
+            continue
+        if isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+            continue
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            names.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split('.')[0] for alias in node.names)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def _traceback(error, path):
+    """ページの中のフレームから下だけのトレースバック"""
+    tb = error.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != path:
+        tb = tb.tb_next
+    return ''.join(traceback.format_exception(type(error), error, tb))
+
+
+def run_block(block, namespace, path, timeout=TIMEOUT, scale=1, measure=False, defined=frozenset()):
+    """
+    ブロックを namespace で実行して Result を返す
+
+    defined は前のブロックで定義しているはずの名前（bound_names）。その名前の NameError は expected にしない。
+    measure なら tracemalloc で確保したメモリの最大値を測る。Python のコードが遅くなるので、
+    このときの seconds は時間の比較に使わない（docexec.profile は時間を測る実行を別にする）。
+    """
+    import matplotlib.pyplot as plt
+
+    out = io.StringIO()
+    status = 'ok'
+    error = None
+    peak = None
+    builtins.input = FakeInput()
+    if measure:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+        try:
+            with deadline(timeout):
+                statements, last = compile_block(block, path, scale)
+                exec(statements, namespace)
+                if last is not None:
+                    value = eval(last, namespace)
+                    if value is not None:
+                        print(repr(value))
+        except BlockTimeout as e:
+            status = 'expected' if _expected(block, e) else 'timeout'
+            error = str(e)
+        except InputExhausted as e:
+            status, error = 'input', str(e)
+        except (Exception, SystemExit) as e:
+            status = 'expected' if _expected(block, e, defined) else 'failed'
+            error = _traceback(e, path)
+        finally:
+            seconds = time.perf_counter() - start
+            if measure:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            plt.close('all')
+    return Result(block.index, status, seconds, out.getvalue()[:OUTPUT_LIMIT], error, peak)
+
+
+def run_session(page, blocks, timeout=TIMEOUT, docs_dir=extract.DOCS_DIR, use_cache=True, scale=1,
+                measure=False):
+    """
+    ページのブロックを 1 つの名前空間で順に実行し、Result のリストを返す
+
+    use_cache なら、結果がキャッシュにあるブロックは実行しない。最初にキャッシュにないブロックの手前まで
+    スナップショットから状態を戻し、そこから先のブロックだけを実行して、結果とスナップショットを保存する。
+    UNCACHED の結果（制限時間切れと失敗）はキャッシュせず、次の実行でそのブロックから実行し直す。
+    scale（件数の倍率）と measure（メモリの計測）を指定したときは、キャッシュを読み書きしない。
+    """
+    path = os.path.join(docs_dir, page)
+    use_cache = use_cache and scale == 1 and not measure
+    keys = cache.block_keys(cache.environment_key(settings()), page, blocks)
+    cached = [cache.load_result(key) if use_cache else None for key in keys]
+    if all(cached):
+        return [Result(**dict(result, cached=True)) for result in cached]
+
+    preload()
+    namespace = {'__name__': '__main__', '__builtins__': builtins}
+    original_input = builtins.input
+    cwd = os.getcwd()
+    first = cached.index(None)
+    results = []
+    reset()
+    try:
+        with tempfile.TemporaryDirectory(prefix='docexec-') as workdir, warnings.catch_warnings():
+            # Agg で plt.show() を呼んだときの警告は出さない
+            warnings.filterwarnings('ignore', message='.*non-interactive.*cannot be shown')
+            warnings.filterwarnings('ignore', message='FigureCanvasAgg is non-interactive')
+            os.chdir(workdir)
+            sys.path.insert(0, workdir)
+            try:
+                # 最初に実行し直すブロックの手前から遡って、戻せるスナップショットを探す
+                start = 0
+                for index in range(first - 1, -1, -1):
+                    if cache.restore(keys[index], namespace, workdir):
+                        start = index + 1
+                        break
+                results.extend(Result(**dict(result, cached=True)) for result in cached[:start])
+                defined = set()
+                for block in blocks[:start]:
+                    defined |= bound_names(block)
+                for block, key in zip(blocks[start:], keys[start:]):
+                    result = run_block(block, namespace, path, timeout, scale, measure, frozenset(defined))
+                    defined |= bound_names(block)
+                    results.append(result)
+                    if use_cache and result.status not in UNCACHED:
+                        cache.store_result(key, result._asdict())
+                        data = cache.snapshot(namespace, workdir)
+                        if data is not None:
+                            cache.store_snapshot(key, data)
+            finally:
+                sys.path.remove(workdir)
+                os.chdir(cwd)
+    finally:
+        builtins.input = original_input
+        reset()
+    return results
@@ -0,0 +1,4 @@
+"""
+docexec のテスト（tools ディレクトリで実行）:
+    python -m pytest docexec/tests
+"""
@@ -0,0 +1,43 @@
+from docexec import cache
+from docexec.extract import Block
+
+
+def _blocks(*codes, heading='見出し', label=''):
+    return [Block('CH1/技術説明.md', index, index * 10 + 1, code, heading, label)
+            for index, code in enumerate(codes)]
+
+
+def test_block_keys_are_stable():
+    blocks = _blocks('a = 1', 'b = a + 1', 'print(b)')
+    assert cache.block_keys('env', 'page.md', blocks) == cache.block_keys('env', 'page.md', blocks)
+
+
+def test_editing_a_block_changes_it_and_later_keys():
+    before = cache.block_keys('env', 'page.md', _blocks('a = 1', 'b = a + 1', 'print(b)'))
+    after = cache.block_keys('env', 'page.md', _blocks('a = 1', 'b = a + 2', 'print(b)'))
+
+    assert after[0] == before[0]
+    assert after[1] != before[1]
+    assert after[2] != before[2]
+
+
+def test_heading_and_label_change_only_their_block():
+    blocks = _blocks('a = 1', 'b = a + 1', 'print(b)')
+    before = cache.block_keys('env', 'page.md', blocks)
+    blocks[1] = blocks[1]._replace(heading='❌ 間違い', label='エラー例')
+    after = cache.block_keys('env', 'page.md', blocks)
+
+    assert [a == b for a, b in zip(before, after)] == [True, False, True]
+
+
+def test_environment_and_page_change_every_key():
+    blocks = _blocks('a = 1', 'print(a)')
+    keys = cache.block_keys('env', 'page.md', blocks)
+
+    assert not set(keys) & set(cache.block_keys('other env', 'page.md', blocks))
+    assert not set(keys) & set(cache.block_keys('env', 'other.md', blocks))
+
+
+def test_environment_key_covers_settings():
+    assert cache.environment_key({'seed': 0}) == cache.environment_key({'seed': 0})
+    assert cache.environment_key({'seed': 0}) != cache.environment_key({'seed': 1})
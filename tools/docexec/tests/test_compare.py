@@ -0,0 +1,79 @@
+import ast
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from docexec import compare
+
+
+def _split(source):
+    preparation, solution = compare.split(ast.parse(source))
+    return [ast.unparse(s) for s in preparation], [ast.unparse(s) for s in solution]
+
+
+def test_split_separates_data_from_solution():
+    preparation, solution = _split(
+        "import pandas as pd\n"
+        "df = pd.DataFrame({'a': [1, 2]})\n"
+        "n = 3\n"
+        "total = df['a'].sum() * n\n"
+        "print(total)\n"
+    )
+
+    assert preparation == ['import pandas as pd', "df = pd.DataFrame({'a': [1, 2]})", 'n = 3']
+    assert solution == ["total = df['a'].sum() * n", 'print(total)']
+
+
+def test_split_keeps_data_built_from_other_data():
+    preparation, solution = _split(
+        "dates = pd.date_range('2024-01-01', periods=3)\n"
+        "df = pd.DataFrame({'date': dates, 'v': [1, 2, 3]})\n"
+        "df['month'] = df['date'].dt.month\n"
+    )
+
+    assert len(preparation) == 2
+    assert solution == ["df['month'] = df['date'].dt.month"]
+
+
+def test_split_without_solution():
+    preparation, solution = _split("import numpy as np\nx = [1, 2, 3]\n")
+    assert len(preparation) == 2 and solution == []
+
+
+@pytest.mark.parametrize('source, expected', [
+    ("result = df.groupby('k').sum()\nresult", ('expr', None)),
+    ("result = df.groupby('k').sum()\nprint(result)", ('name', 'result')),
+    ("out = []\nfor v in values:\n    out.append(v * 2)", ('name', 'out')),
+    ("print(df.head())", (None, None)),
+])
+def test_result_of(source, expected):
+    assert compare.result_of(ast.parse(source).body) == expected
+
+
+@pytest.mark.parametrize('a, b', [
+    (1.0, 1.0 + 1e-9),
+    (float('nan'), float('nan')),
+    ([1, 2, 3], np.array([1, 2, 3])),
+    ({'x': 1, 'y': 2}, pd.Series({'y': 2, 'x': 1})),
+    # 列の順序・途中の計算用の列の違いは比べない
+    (pd.DataFrame({'a': [1, 2], 'b': [3, 4]}), pd.DataFrame({'b': [3, 4], 'a': [1, 2], 'tmp': [0, 0]})),
+    # ラベルの書き方だけが違う
+    (pd.Series([1, 2], index=['2024-01', '2024-02']),
+     pd.Series([1, 2], index=pd.to_datetime(['2024-01-31', '2024-02-29']))),
+])
+def test_same(a, b):
+    assert compare.same(a, b) is True
+
+
+@pytest.mark.parametrize('a, b', [
+    (1.0, 1.1),
+    ([1, 2, 3], [1, 2, 4]),
+    (pd.DataFrame({'a': [1, 2]}), pd.DataFrame({'a': [1, 2, 3]})),
+])
+def test_not_same(a, b):
+    assert compare.same(a, b) is False
+
+
+def test_same_cannot_compare_other_types():
+    assert compare.same('text', pd.Series([1])) is None
@@ -0,0 +1,51 @@
+import ast
+
+import pytest
+
+from docexec import scaling
+
+
+@pytest.mark.parametrize('source, expected', [
+    ('x = np.random.rand(100)', 'x = np.random.rand(1000)'),
+    ('x = rng.normal(0, 1, 50)', 'x = rng.normal(0, 1, 500)'),
+    ('x = np.linspace(0, 1, num=50)', 'x = np.linspace(0, 1, num=500)'),
+    ("d = pd.date_range('2024-01-01', periods=30)", "d = pd.date_range('2024-01-01', periods=300)"),
+    ('r = range(5, 25)', 'r = range(5, 205)'),
+    ('r = np.arange(100)', 'r = np.arange(1000)'),
+    ("s = pd.Series([1, 2])", "s = pd.Series([1, 2] * 10)"),
+    ("df = pd.DataFrame({'a': [1, 2, 3], 'b': range(3)})",
+     "df = pd.DataFrame({'a': [1, 2, 3] * 10, 'b': range(30)})"),
+    ("df.loc[3] = [1, 2]", "df.loc[3] = [1, 2] * 10"),
+])
+def test_scale_source(source, expected):
+    assert scaling.scale_source(source, 10) == expected
+
+
+@pytest.mark.parametrize('source', [
+    # 件数とみなさない小さな数
+    'r = range(5)',
+    'x = rng.normal(0, 1, 3)',
+    # 件数を表さない位置の引数
+    'x = rng.normal(100, 15)',
+    'x = round(123.456, 2)',
+])
+def test_scale_source_leaves_other_literals(source):
+    assert scaling.scale_source(source, 10) == source
+
+
+def test_counts_are_capped():
+    assert scaling.scale_source('a = np.zeros(5000000)', 10) == f'a = np.zeros({scaling.MAX_COUNT})'
+    # 元から上限より大きい件数は書き換えない
+    assert scaling.scale_source('a = np.zeros(20000000)', 10) == 'a = np.zeros(20000000)'
+
+
+def test_scale_tree_counts_changes():
+    tree = ast.parse('a = np.random.rand(100)\nb = range(5)\nc = pd.Series([1, 2, 3])\n')
+    _, changes = scaling.scale_tree(tree, 10)
+    assert changes == 2
+
+
+def test_call_name():
+    assert scaling.call_name(ast.parse('pd.DataFrame()').body[0].value) == 'DataFrame'
+    assert scaling.call_name(ast.parse('range(3)').body[0].value) == 'range'
+    assert scaling.call_name(ast.parse('f()()').body[0].value) is None
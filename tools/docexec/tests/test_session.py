@@ -0,0 +1,98 @@
+import urllib.error
+
+import pytest
+
+from docexec import session
+from docexec.extract import Block
+
+
+def _block(code, heading='見出し', label=''):
+    return Block('CH1/技術説明.md', 0, 1, code, heading, label)
+
+
+def _error(code):
+    try:
+        exec(code, {})
+    except Exception as e:
+        return e
+    raise AssertionError(f"no error: {code}")
+
+
+@pytest.mark.parametrize('block, error', [
+    (_block("# ❌ 文字列と数値は足せない\n'1' + 1"), _error("'1' + 1")),
+    (_block("int('abc')", label='エラー例'), _error("int('abc')")),
+    (_block("# ここにコードを書く\nprint(answer)"), _error('print(answer)')),
+    (_block('for i in range(3)\n    print(i)', heading='構文'), SyntaxError('invalid syntax')),
+    (_block("d = {}\nd['x']  # KeyError になる"), _error("{}['x']")),
+    # 基底クラスの名前でもよい
+    (_block("[][1]  # LookupError"), _error('[][1]')),
+    (_block('while True:\n    pass', label='無限ループ'), session.BlockTimeout('timeout')),
+])
+def test_expected(block, error):
+    assert session._expected(block, error)
+
+
+@pytest.mark.parametrize('block, error', [
+    # 印がない
+    (_block("'1' + 1"), _error("'1' + 1")),
+    # 穴埋めの印は SyntaxError / NameError だけを許す
+    (_block("# ここにコードを書く\nint('abc')"), _error("int('abc')")),
+    # 印が表さない例外
+    (_block('while True:\n    pass', label='無限ループ'), _error("int('abc')")),
+    # コメントの別の言葉の一部
+    (_block("x = 1  # NotKeyErrorHandler\n{}['x']"), _error("{}['x']")),
+])
+def test_not_expected(block, error):
+    assert not session._expected(block, error)
+
+
+@pytest.mark.parametrize('error', [
+    urllib.error.URLError('network is unreachable'),
+    FileNotFoundError('data.csv'),
+])
+def test_environment_errors_are_never_expected(error):
+    block = _block("# ❌ エラー例（URLError / FileNotFoundError）\ndf = pd.read_csv(url)", label='エラー例')
+    assert not session._expected(block, error)
+
+
+def test_name_error_of_a_previous_block_is_not_expected():
+    block = _block("# ❌ 未定義の変数\nprint(df_clean)")
+    error = _error('print(df_clean)')
+
+    assert session._expected(block, error)
+    assert not session._expected(block, error, defined=frozenset({'df_clean'}))
+
+
+def test_bound_names():
+    block = _block(
+        "import numpy as np\n"
+        "import os.path\n"
+        "from math import sqrt as root\n"
+        "x, (y, z) = 1, (2, 3)\n"
+        "for i in range(3):\n"
+        "    total = i\n"
+        "with open('f') as f:\n"
+        "    pass\n"
+        "squares = [n * n for n in range(3)]\n"
+        "def helper(a):\n"
+        "    local = a\n"
+        "class Point:\n"
+        "    attribute = 1\n"
+        "%timeit helper(1)\n"
+    )
+
+    assert session.bound_names(block) == {
+        'np', 'os', 'root', 'x', 'y', 'z', 'i', 'total', 'f', 'squares', 'helper', 'Point'}
+
+
+def test_bound_names_of_invalid_block():
+    assert session.bound_names(_block('for i in range(3)\n    print(i)')) == set()
+
+
+def test_fake_input_is_limited_per_instance(capsys):
+    fake = session.FakeInput()
+    for _ in range(session.INPUT_LIMIT):
+        assert fake('> ') == session.INPUT_VALUE
+    with pytest.raises(session.InputExhausted):
+        fake()
+    assert session.FakeInput()() == session.INPUT_VALUE